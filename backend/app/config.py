@@ -32,6 +32,11 @@ class Settings(BaseSettings):
     algorithm: str = Field("HS256", env="ALGORITHM")
     access_token_expire_minutes: int = Field(525600, env="ACCESS_TOKEN_EXPIRE_MINUTES")  # 1 year (365 * 24 * 60)
     access_token_expire_days: int = Field(365, env="ACCESS_TOKEN_EXPIRE_DAYS")  # 1 year
+    principal_cache_ttl_seconds: float = Field(30.0, env="PRINCIPAL_CACHE_TTL_SECONDS")
+    principal_cache_max_entries: int = Field(10000, env="PRINCIPAL_CACHE_MAX_ENTRIES")
+    roster_context_cache_ttl_seconds: float = Field(60.0, env="ROSTER_CONTEXT_CACHE_TTL_SECONDS")
+    roster_context_cache_max_entries: int = Field(20000, env="ROSTER_CONTEXT_CACHE_MAX_ENTRIES")
+    password_hash_workers: int = Field(2, env="PASSWORD_HASH_WORKERS")  # 0 hashes on threads instead
 
     # CORS
     cors_origins: List[str] = Field(
@@ -52,6 +57,19 @@ class Settings(BaseSettings):
     aws_region: str = Field("ap-south-1", env="AWS_REGION")
     aws_s3_bucket_name: str = Field("edinai-storage", env="AWS_S3_BUCKET_NAME")
     s3_enabled: bool = Field(True, env="S3_ENABLED")
+    storage_backend: str = Field("s3", env="STORAGE_BACKEND")  # s3 | local
+    local_storage_root: Optional[str] = Field(None, env="LOCAL_STORAGE_ROOT")
+    s3_max_pool_connections: int = Field(20, env="S3_MAX_POOL_CONNECTIONS")
+    s3_max_attempts: int = Field(5, env="S3_MAX_ATTEMPTS")
+    s3_executor_workers: int = Field(16, env="S3_EXECUTOR_WORKERS")
+    s3_multipart_part_size: int = Field(8 * 1024 * 1024, env="S3_MULTIPART_PART_SIZE")
+    s3_multipart_concurrency: int = Field(4, env="S3_MULTIPART_CONCURRENCY")
+    upload_session_expiry_seconds: int = Field(3600, env="UPLOAD_SESSION_EXPIRY_SECONDS")
+    material_preprocess_concurrency: int = Field(2, env="MATERIAL_PREPROCESS_CONCURRENCY")
+    roster_import_max_bytes: int = Field(50 * 1024 * 1024, env="ROSTER_IMPORT_MAX_BYTES")
+    material_cache_root: Optional[str] = Field(None, env="MATERIAL_CACHE_ROOT")
+    material_cache_max_bytes: int = Field(5 * 1024 * 1024 * 1024, env="MATERIAL_CACHE_MAX_BYTES")
+    material_cache_revalidate_seconds: int = Field(300, env="MATERIAL_CACHE_REVALIDATE_SECONDS")
 
     # Model Config (initial, later override below)
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
@@ -169,6 +187,53 @@ class Settings(BaseSettings):
         description="Default Runway image aspect ratio",
     )
 
+    tts_slide_concurrency: int = Field(
+        4,
+        env="TTS_SLIDE_CONCURRENCY",
+        description="Maximum number of lecture slides synthesized concurrently",
+    )
+    tts_chunk_concurrency: int = Field(
+        4,
+        env="TTS_CHUNK_CONCURRENCY",
+        description="Maximum number of text chunks per audio file sent to TTS concurrently",
+    )
+    lecture_qa_retrieval_enabled: bool = Field(True, env="LECTURE_QA_RETRIEVAL_ENABLED")
+    lecture_qa_top_k: int = Field(
+        4,
+        env="LECTURE_QA_TOP_K",
+        description="Lecture passages retrieved into the prompt for each question",
+    )
+    lecture_qa_context_max_chars: int = Field(
+        1000,
+        env="LECTURE_QA_CONTEXT_MAX_CHARS",
+        description="Upper bound on the lecture context sent with a question",
+    )
+    lecture_qa_index_cache_size: int = Field(256, env="LECTURE_QA_INDEX_CACHE_SIZE")
+    lecture_answer_cache_enabled: bool = Field(True, env="LECTURE_ANSWER_CACHE_ENABLED")
+    lecture_answer_cache_backend: Literal["memory", "redis"] = Field(
+        "memory",
+        env="LECTURE_ANSWER_CACHE_BACKEND",
+        description="Keep cached lecture chat answers per process (memory) or share them across workers (redis)",
+    )
+    lecture_answer_cache_ttl_seconds: int = Field(6 * 3600, env="LECTURE_ANSWER_CACHE_TTL_SECONDS")
+    lecture_answer_cache_max_entries: int = Field(5000, env="LECTURE_ANSWER_CACHE_MAX_ENTRIES")
+    lecture_answer_cache_match_similar: bool = Field(
+        False,
+        env="LECTURE_ANSWER_CACHE_MATCH_SIMILAR",
+        description="Treat questions with the same indexed terms in any order as the same question",
+    )
+    tts_cache_enabled: bool = Field(True, env="TTS_CACHE_ENABLED")
+    tts_cache_root: Optional[str] = Field(
+        None,
+        env="TTS_CACHE_ROOT",
+        description="Directory for content-addressed TTS audio blobs (defaults to storage/tts_cache)",
+    )
+    tts_cache_max_bytes: int = Field(
+        2 * 1024 * 1024 * 1024,
+        env="TTS_CACHE_MAX_BYTES",
+        description="Upper bound on TTS cache size before least-recently-used blobs are evicted",
+    )
+
     topic_extract_max_workers: int = Field(1, env="TOPIC_EXTRACT_MAX_WORKERS")
     topic_extract_queue_limit: int = Field(0, env="TOPIC_EXTRACT_QUEUE_LIMIT")
     topic_extract_queue_timeout_seconds: int = Field(
@@ -187,6 +252,44 @@ class Settings(BaseSettings):
         900,
         env="TOPIC_EXTRACT_QUEUE_LEASE_SECONDS",
     )
+    single_flight_backend: Literal["memory", "redis"] = Field(
+        "memory",
+        env="SINGLE_FLIGHT_BACKEND",
+        description="Coordinate on-demand generation per process (memory) or across workers (redis)",
+    )
+    single_flight_lease_seconds: int = Field(120, env="SINGLE_FLIGHT_LEASE_SECONDS")
+    realtime_backend: Literal["memory", "local", "redis"] = Field(
+        "memory",
+        env="REALTIME_BACKEND",
+        description="Socket.IO message bus and presence store: single process (memory), in-process pub/sub (local) or Redis",
+    )
+    realtime_channel: str = Field("socketio", env="REALTIME_CHANNEL")
+    realtime_presence_ttl_seconds: int = Field(90, env="REALTIME_PRESENCE_TTL_SECONDS")
+    realtime_presence_flush_ms: int = Field(250, env="REALTIME_PRESENCE_FLUSH_MS")
+    video_watch_flush_seconds: float = Field(
+        5.0,
+        env="VIDEO_WATCH_FLUSH_SECONDS",
+        description="Interval for batching student watch heartbeats (0 writes every heartbeat directly)",
+    )
+    video_watch_buffer_backend: Literal["memory", "redis"] = Field(
+        "memory",
+        env="VIDEO_WATCH_BUFFER_BACKEND",
+    )
+    realtime_rate_limit_enabled: bool = Field(True, env="REALTIME_RATE_LIMIT_ENABLED")
+    realtime_lecture_chat_per_minute: float = Field(12.0, env="REALTIME_LECTURE_CHAT_PER_MINUTE")
+    realtime_lecture_chat_burst: int = Field(3, env="REALTIME_LECTURE_CHAT_BURST")
+    realtime_send_message_per_minute: float = Field(60.0, env="REALTIME_SEND_MESSAGE_PER_MINUTE")
+    realtime_send_message_burst: int = Field(10, env="REALTIME_SEND_MESSAGE_BURST")
+    realtime_signal_per_second: float = Field(20.0, env="REALTIME_SIGNAL_PER_SECOND")
+    realtime_signal_burst: int = Field(60, env="REALTIME_SIGNAL_BURST")
+    realtime_typing_coalesce_ms: int = Field(400, env="REALTIME_TYPING_COALESCE_MS")
+    realtime_identity_rate_multiplier: float = Field(
+        2.0,
+        env="REALTIME_IDENTITY_RATE_MULTIPLIER",
+        description="Allowance of one student/user across all their sockets, relative to a single socket",
+    )
+    realtime_max_pending_per_connection: int = Field(2, env="REALTIME_MAX_PENDING_PER_CONNECTION")
+    single_flight_poll_interval_ms: int = Field(200, env="SINGLE_FLIGHT_POLL_INTERVAL_MS")
     redis_url: Optional[str] = Field(None, env="REDIS_URL")
     redis_host: str = Field("localhost", env="REDIS_HOST")
     redis_port: int = Field(6379, env="REDIS_PORT")
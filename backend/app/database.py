@@ -98,7 +98,17 @@ def _ensure_chapter_material_schema() -> None:
             columns = {col["name"]: col for col in inspector.get_columns("chapter_materials")}
             statements: list[str] = []
 
-            optional_columns = {}
+            optional_columns = {
+                "content_hash": "ALTER TABLE chapter_materials ADD COLUMN content_hash VARCHAR(64)",
+                "blob_hash": "ALTER TABLE chapter_materials ADD COLUMN blob_hash VARCHAR(64)",
+                "page_count": "ALTER TABLE chapter_materials ADD COLUMN page_count INTEGER",
+                "text_layer_pages": "ALTER TABLE chapter_materials ADD COLUMN text_layer_pages JSONB",
+                "language_code": "ALTER TABLE chapter_materials ADD COLUMN language_code VARCHAR(16)",
+                "thumbnail_url": "ALTER TABLE chapter_materials ADD COLUMN thumbnail_url VARCHAR(512)",
+                "page_text_path": "ALTER TABLE chapter_materials ADD COLUMN page_text_path VARCHAR(512)",
+                "preprocess_status": "ALTER TABLE chapter_materials ADD COLUMN preprocess_status VARCHAR(16)",
+                "preprocessed_at": "ALTER TABLE chapter_materials ADD COLUMN preprocessed_at TIMESTAMPTZ",
+            }
 
             for column_name, ddl in optional_columns.items():
                 if column_name not in columns:
@@ -131,6 +141,11 @@ def _ensure_chapter_material_schema() -> None:
                     "ALTER TABLE chapter_materials ALTER COLUMN created_at SET DEFAULT NOW()"
                 )
 
+            statements.append(
+                "CREATE INDEX IF NOT EXISTS ix_chapter_materials_content_hash "
+                "ON chapter_materials (content_hash)"
+            )
+
             for stmt in statements:
                 connection.execute(text(stmt))
 
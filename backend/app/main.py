@@ -1,5 +1,7 @@
 """FastAPI application factory for the modular backend."""
 from __future__ import annotations
+import asyncio
+import logging
 import time
 from pathlib import Path
 from fastapi import FastAPI, Request, Response, HTTPException
@@ -33,7 +35,10 @@ from .routes import (
     vision_router,
 )
 from .utils.file_handler import UPLOAD_DIR, ensure_upload_dir, ensure_upload_subdir
+from .utils.passwords import shutdown_password_pool
+from .services.watch_heartbeat_buffer import flush_watch_heartbeats
 from .services.auth_service import ensure_dev_admin_account
+from .services.lecture_service import get_shared_lecture_service
 from .realtime.socket_server import sio
 from .routes.chapter_material_routes import chapter_material_http_exception_handler
 # ----------------------------------
@@ -49,6 +54,19 @@ HTTP_REQUEST_LATENCY = Histogram(
     "HTTP request latency",
     ["path"],
 )
+logger = logging.getLogger(__name__)
+
+_background_tasks: set = set()
+
+
+async def _prewarm_pause_prompt_audio() -> None:
+    """Fill the TTS cache with the pause prompt for each supported language."""
+    try:
+        await get_shared_lecture_service().prewarm_pause_prompts()
+    except Exception as exc:  # pragma: no cover - TTS/S3 may be unavailable
+        logger.warning("Pause prompt audio pre-warm skipped: %s", exc)
+
+
 def create_app() -> FastAPI:
     app = FastAPI(title=settings.app_name)
     # ----------------------------------
@@ -104,7 +122,25 @@ def create_app() -> FastAPI:
     storage_dir = (Path(__file__).parent.parent / "storage").resolve()
     storage_dir.mkdir(parents=True, exist_ok=True)
     app.mount("/storage", StaticFiles(directory=storage_dir), name="storage")
-    ensure_dev_admin_account()
+
+    @app.on_event("startup")
+    async def seed_dev_admin() -> None:
+        await ensure_dev_admin_account()
+
+    @app.on_event("startup")
+    async def prewarm_tts_cache() -> None:
+        if settings.tts_cache_enabled:
+            task = asyncio.create_task(_prewarm_pause_prompt_audio())
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+    @app.on_event("shutdown")
+    def stop_password_pool() -> None:
+        shutdown_password_pool()
+
+    @app.on_event("shutdown")
+    async def flush_watch_progress() -> None:
+        await flush_watch_heartbeats()
     # ----------------------------------
     # ROUTERS
     # ----------------------------------
@@ -23,6 +23,16 @@ class ChapterMaterial(Base):
     file_path = Column(String(512), nullable=False)
     file_size = Column(BigInteger, nullable=False, default=0)
     is_global = Column(Boolean, nullable=False, server_default="false")
+    content_hash = Column(String(64), nullable=True, index=True)
+    # Set only when the row holds a reference on ``material_blobs``; released on delete.
+    blob_hash = Column(String(64), nullable=True)
+    page_count = Column(Integer, nullable=True)
+    text_layer_pages = Column(JSON, nullable=True)
+    language_code = Column(String(16), nullable=True)
+    thumbnail_url = Column(String(512), nullable=True)
+    page_text_path = Column(String(512), nullable=True)
+    preprocess_status = Column(String(16), nullable=True)
+    preprocessed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
@@ -41,6 +51,13 @@ class ChapterMaterial(Base):
             "file_name": self.file_name,
             "file_path": self.file_path,
             "file_size": self.file_size,
+            "content_hash": self.content_hash,
+            "page_count": self.page_count,
+            "text_layer_pages": self.text_layer_pages,
+            "language_code": self.language_code,
+            "thumbnail_url": self.thumbnail_url,
+            "preprocess_status": self.preprocess_status,
+            "preprocessed_at": self.preprocessed_at,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
@@ -0,0 +1,54 @@
+"""
+bcrypt primitives run by the password hashing pool.
+
+This module imports nothing but bcrypt and lives outside ``app.utils`` (whose
+package import pulls in the repositories and their database pools), so pool
+workers started with ``forkserver``/``spawn`` stay small and thread-free.
+"""
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import bcrypt
+
+_MAX_BCRYPT_BYTES = 72
+
+
+def _truncate(password: str) -> bytes:
+    encoded = password.encode("utf-8")
+    if len(encoded) <= _MAX_BCRYPT_BYTES:
+        return encoded
+
+    trimmed = encoded[:_MAX_BCRYPT_BYTES]
+    while True:
+        try:
+            return trimmed.decode("utf-8").encode("utf-8")
+        except UnicodeDecodeError:
+            trimmed = trimmed[:-1]
+            if not trimmed:
+                raise ValueError("Password is empty after truncation")
+
+
+def truncate_password(password: str) -> str:
+    """Return a UTF-8 string whose encoded form fits bcrypt requirements."""
+    return _truncate(password).decode("utf-8")
+
+
+def hash_password(password: str) -> str:
+    safe = _truncate(password)
+    return bcrypt.hashpw(safe, bcrypt.gensalt()).decode("utf-8")
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    try:
+        safe = _truncate(password)
+        return bcrypt.checkpw(safe, hashed_password.encode("utf-8"))
+    except ValueError:
+        return False
+
+
+def hash_many(passwords: Sequence[str]) -> List[str]:
+    return [hash_password(password) for password in passwords]
+
+
+__all__ = ["hash_many", "hash_password", "truncate_password", "verify_password"]
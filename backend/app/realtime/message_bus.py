@@ -0,0 +1,84 @@
+"""Pluggable pub/sub client managers so Socket.IO emits reach every worker."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import quote
+
+import socketio
+
+from ..config import get_settings
+from ..utils.redis_client import redis_available
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryPubSubManager(socketio.AsyncPubSubManager):
+    """
+    Pub/sub manager whose bus is an in-process fan-out.
+
+    Several ``AsyncServer`` instances built with the same ``channel`` in one
+    process behave like separate workers sharing a broker, which lets tests
+    exercise cross-node emits without Redis.
+    """
+
+    name = "inmemory"
+    _subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+
+    def __init__(self, channel: str = "socketio", write_only: bool = False, logger=None) -> None:
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def _publish(self, data: Any) -> None:
+        for queue in list(self._subscribers[self.channel]):
+            queue.put_nowait(data)
+
+    async def _listen(self) -> AsyncIterator[Any]:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._subscribers[self.channel].append(self._queue)
+        try:
+            while True:
+                yield await self._queue.get()
+        finally:
+            if self._queue in self._subscribers[self.channel]:
+                self._subscribers[self.channel].remove(self._queue)
+            self._queue = None
+
+
+def _redis_url() -> str:
+    settings = get_settings()
+    if settings.redis_url:
+        return settings.redis_url
+    scheme = "rediss" if settings.redis_ssl else "redis"
+    credentials = f":{quote(settings.redis_password, safe='')}@" if settings.redis_password else ""
+    return f"{scheme}://{credentials}{settings.redis_host}:{settings.redis_port}/{settings.redis_db}"
+
+
+def build_client_manager() -> Optional[socketio.AsyncManager]:
+    """
+    Return the Socket.IO client manager for the configured realtime backend.
+
+    ``memory`` keeps the default single-process manager (``None``), ``local``
+    uses :class:`InMemoryPubSubManager` and ``redis`` shares emits and rooms
+    across workers and nodes through Redis pub/sub.
+    """
+    settings = get_settings()
+    backend = (settings.realtime_backend or "memory").lower()
+    channel = settings.realtime_channel
+    if backend == "local":
+        return InMemoryPubSubManager(channel=channel)
+    if backend == "redis":
+        if not redis_available():
+            logger.warning(
+                "Realtime backend configured for Redis, but redis package is not installed. "
+                "Socket.IO emits will only reach clients of this worker."
+            )
+            return None
+        return socketio.AsyncRedisManager(_redis_url(), channel=channel)
+    return None
+
+
+__all__ = ["InMemoryPubSubManager", "build_client_manager"]
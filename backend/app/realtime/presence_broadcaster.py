@@ -0,0 +1,85 @@
+"""Coalesces presence changes into one batched diff per class room and interval."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_CHANGES = Counter(
+    "realtime_presence_changes_total",
+    "Student presence transitions reported by connect/disconnect",
+    ["status"],
+)
+PRESENCE_EMITS = Counter(
+    "realtime_presence_emits_total",
+    "Batched presence diffs emitted to class rooms",
+)
+PRESENCE_FANOUT = Counter(
+    "realtime_presence_fanout_total",
+    "Presence diffs times online students in the receiving room",
+)
+PRESENCE_BATCH_SIZE = Histogram(
+    "realtime_presence_batch_size",
+    "Enrollments carried by one presence diff",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+EmitFunc = Callable[[str, Dict[str, List[str]]], Awaitable[None]]
+RecipientsFunc = Callable[[str], Awaitable[int]]
+
+
+class PresenceBroadcaster:
+    """
+    Buffers presence transitions per room and flushes them every ``interval_seconds``.
+
+    Only the net change per enrollment is sent, so a student who drops and
+    reconnects within one interval (a page refresh) produces no message at all.
+    """
+
+    def __init__(self, emit: EmitFunc, *, interval_seconds: float, recipients: Optional[RecipientsFunc] = None) -> None:
+        self._emit = emit
+        self._recipients = recipients
+        self._interval = max(0.01, interval_seconds)
+        # room -> enrollment -> (status before this window, latest status)
+        self._pending: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def mark(self, room: str, enrollment: str, status: str) -> None:
+        PRESENCE_CHANGES.labels(status=status).inc()
+        changes = self._pending.setdefault(room, {})
+        previous = changes.get(enrollment)
+        before = previous[0] if previous else ("offline" if status == "online" else "online")
+        changes[enrollment] = (before, status)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.flush()
+            except Exception as exc:  # pragma: no cover - keep presence flowing
+                logger.warning("Presence flush failed: %s", exc)
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        for room, changes in pending.items():
+            diff: Dict[str, List[str]] = {"online": [], "offline": []}
+            for enrollment, (before, status) in changes.items():
+                if status != before:
+                    diff[status].append(enrollment)
+            size = len(diff["online"]) + len(diff["offline"])
+            if not size:
+                continue
+            await self._emit(room, diff)
+            PRESENCE_EMITS.inc()
+            PRESENCE_BATCH_SIZE.observe(size)
+            if self._recipients is not None:
+                PRESENCE_FANOUT.inc(await self._recipients(room))
+
+
+__all__ = ["PresenceBroadcaster"]
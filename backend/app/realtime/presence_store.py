@@ -0,0 +1,207 @@
+"""Connection and presence registries for the student Socket.IO namespace."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..config import get_settings
+from ..utils.redis_client import create_redis_client, redis_available
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceStore(ABC):
+    """
+    Tracks which students are online, across tabs and (for shared backends) workers.
+
+    Socket sessions themselves stay on the worker that owns the socket, since
+    Socket.IO always delivers a socket's events there; only the per-student
+    connection counts and per-room online sets are shared.
+    """
+
+    def __init__(self) -> None:
+        # sid -> session data for sockets connected to this worker
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+
+    def get_session(self, sid: str) -> Optional[Dict[str, Any]]:
+        return self._sessions.get(sid)
+
+    @abstractmethod
+    async def register(self, sid: str, session: Dict[str, Any], *, room: str) -> bool:
+        """Record a new connection; returns True if it is the student's first one."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def unregister(self, sid: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Forget a connection; returns its session and whether it was the student's last one."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def online_in_room(self, room: str) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def connection_count(self, enrollment: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryPresenceStore(PresenceStore):
+    """Process-local registry; correct for a single worker."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        # enrollment_number -> set of active sids
+        self._student_connections: Dict[str, Set[str]] = {}
+        # class room -> enrollments with at least one connection
+        self._room_members: Dict[str, Set[str]] = {}
+
+    async def register(self, sid: str, session: Dict[str, Any], *, room: str) -> bool:
+        enrollment = session["enrollment"]
+        self._sessions[sid] = {**session, "room": room}
+        sids = self._student_connections.setdefault(enrollment, set())
+        first = not sids
+        sids.add(sid)
+        self._room_members.setdefault(room, set()).add(enrollment)
+        return first
+
+    async def unregister(self, sid: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        session = self._sessions.pop(sid, None)
+        if session is None:
+            return None, False
+        enrollment = session["enrollment"]
+        sids = self._student_connections.get(enrollment)
+        if sids is None:
+            return session, False
+        sids.discard(sid)
+        if sids:
+            return session, False
+        self._student_connections.pop(enrollment, None)
+        members = self._room_members.get(session["room"])
+        if members is not None:
+            members.discard(enrollment)
+            if not members:
+                self._room_members.pop(session["room"], None)
+        return session, True
+
+    async def online_in_room(self, room: str) -> List[str]:
+        return sorted(self._room_members.get(room, ()))
+
+    async def connection_count(self, enrollment: str) -> int:
+        return len(self._student_connections.get(enrollment, ()))
+
+
+class RedisPresenceStore(PresenceStore):
+    """
+    Presence shared through Redis sorted sets scored by lease expiry.
+
+    Each worker refreshes the leases of its own sockets every third of the TTL,
+    so connections of a crashed worker age out instead of staying online forever.
+    """
+
+    def __init__(self, redis_client, *, ttl_seconds: int, prefix: str) -> None:
+        super().__init__()
+        self.redis = redis_client
+        self.ttl_seconds = max(10, ttl_seconds)
+        self.prefix = prefix
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def _student_key(self, enrollment: str) -> str:
+        return f"{self.prefix}:presence:student:{enrollment}"
+
+    def _room_key(self, room: str) -> str:
+        return f"{self.prefix}:presence:room:{room}"
+
+    def _ensure_heartbeat(self) -> None:
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._refresh_leases())
+
+    async def _refresh_leases(self) -> None:
+        interval = self.ttl_seconds / 3
+        while self._sessions:
+            await asyncio.sleep(interval)
+            expires_at = time.time() + self.ttl_seconds
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for sid, session in list(self._sessions.items()):
+                    student_key = self._student_key(session["enrollment"])
+                    room_key = self._room_key(session["room"])
+                    pipe.zadd(student_key, {sid: expires_at})
+                    pipe.zadd(room_key, {session["enrollment"]: expires_at})
+                    pipe.expire(student_key, self.ttl_seconds * 2)
+                    pipe.expire(room_key, self.ttl_seconds * 2)
+                await pipe.execute()
+            except Exception as exc:
+                logger.warning("Failed to refresh presence leases: %s", exc)
+
+    async def register(self, sid: str, session: Dict[str, Any], *, room: str) -> bool:
+        enrollment = session["enrollment"]
+        self._sessions[sid] = {**session, "room": room}
+        now = time.time()
+        student_key = self._student_key(enrollment)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zremrangebyscore(student_key, "-inf", now)
+        pipe.zadd(student_key, {sid: now + self.ttl_seconds})
+        pipe.zcard(student_key)
+        pipe.zadd(self._room_key(room), {enrollment: now + self.ttl_seconds})
+        pipe.expire(student_key, self.ttl_seconds * 2)
+        pipe.expire(self._room_key(room), self.ttl_seconds * 2)
+        results = await pipe.execute()
+        self._ensure_heartbeat()
+        return int(results[2]) == 1
+
+    async def unregister(self, sid: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        session = self._sessions.pop(sid, None)
+        if session is None:
+            return None, False
+        student_key = self._student_key(session["enrollment"])
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zrem(student_key, sid)
+        pipe.zremrangebyscore(student_key, "-inf", time.time())
+        pipe.zcard(student_key)
+        results = await pipe.execute()
+        if int(results[2]) > 0:
+            return session, False
+        await self.redis.zrem(self._room_key(session["room"]), session["enrollment"])
+        return session, True
+
+    async def online_in_room(self, room: str) -> List[str]:
+        room_key = self._room_key(room)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zremrangebyscore(room_key, "-inf", time.time())
+        pipe.zrange(room_key, 0, -1)
+        _, members = await pipe.execute()
+        return sorted(member.decode() if isinstance(member, bytes) else member for member in members)
+
+    async def connection_count(self, enrollment: str) -> int:
+        return int(await self.redis.zcount(self._student_key(enrollment), time.time(), "+inf"))
+
+
+def build_presence_store() -> PresenceStore:
+    settings = get_settings()
+    if (settings.realtime_backend or "memory").lower() == "redis":
+        if not redis_available():
+            logger.warning(
+                "Realtime backend configured for Redis, but redis package is not installed. "
+                "Presence is tracked per worker."
+            )
+        else:
+            try:
+                return RedisPresenceStore(
+                    create_redis_client(),
+                    ttl_seconds=settings.realtime_presence_ttl_seconds,
+                    prefix=settings.realtime_channel,
+                )
+            except Exception as exc:
+                logger.exception("Failed to initialize Redis presence store: %s", exc)
+    return MemoryPresenceStore()
+
+
+__all__ = [
+    "MemoryPresenceStore",
+    "PresenceStore",
+    "RedisPresenceStore",
+    "build_presence_store",
+]
@@ -0,0 +1,202 @@
+"""Token-bucket limits, typing coalescing and bounded work slots for realtime events."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+REALTIME_EVENTS_LIMITED = Counter(
+    "realtime_events_limited_total",
+    "Realtime events refused by rate limits or work queue bounds",
+    ["event", "reason"],
+)
+REALTIME_EVENTS_COALESCED = Counter(
+    "realtime_events_coalesced_total",
+    "Realtime events folded into a later emit instead of being sent",
+    ["event"],
+)
+REALTIME_WORK_IN_FLIGHT = Gauge(
+    "realtime_work_in_flight",
+    "Expensive realtime handlers running or queued across connections",
+    ["event"],
+)
+
+_IDLE_BUCKET_SECONDS = 600
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """``rate`` tokens per second with room for ``burst`` back-to-back events."""
+
+    rate: float
+    burst: int
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, limit: RateLimit, now: Optional[float] = None) -> None:
+        self.rate = max(0.0, limit.rate)
+        self.capacity = float(max(1, limit.burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def take(self, now: float) -> bool:
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = max(self.updated, now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class RealtimeRateLimiter:
+    """
+    Per-connection and per-identity token buckets keyed by event name.
+
+    A student with several tabs gets one bucket per socket plus a shared bucket
+    for the enrollment scaled by ``identity_multiplier``, so opening more tabs
+    does not multiply their allowance without bound.
+    """
+
+    def __init__(self, limits: Dict[str, RateLimit], *, identity_multiplier: float = 2.0) -> None:
+        self._limits = limits
+        self._identity_multiplier = max(1.0, identity_multiplier)
+        self._sid_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._identity_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._last_sweep = time.monotonic()
+
+    def allow(self, event: str, sid: str, identity: Optional[str] = None) -> bool:
+        limit = self._limits.get(event)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        self._sweep(now)
+
+        sid_bucket = self._sid_buckets.get((sid, event))
+        if sid_bucket is None:
+            sid_bucket = self._sid_buckets[(sid, event)] = TokenBucket(limit, now)
+        if not sid_bucket.take(now):
+            REALTIME_EVENTS_LIMITED.labels(event=event, reason="connection_rate").inc()
+            return False
+
+        if identity:
+            identity_bucket = self._identity_buckets.get((identity, event))
+            if identity_bucket is None:
+                scaled = RateLimit(
+                    rate=limit.rate * self._identity_multiplier,
+                    burst=int(limit.burst * self._identity_multiplier),
+                )
+                identity_bucket = self._identity_buckets[(identity, event)] = TokenBucket(scaled, now)
+            if not identity_bucket.take(now):
+                REALTIME_EVENTS_LIMITED.labels(event=event, reason="identity_rate").inc()
+                return False
+        return True
+
+    def forget(self, sid: str) -> None:
+        for key in [key for key in self._sid_buckets if key[0] == sid]:
+            del self._sid_buckets[key]
+
+    def _sweep(self, now: float) -> None:
+        # Identity buckets outlive sockets; drop the ones idle long enough to be full again.
+        if now - self._last_sweep < _IDLE_BUCKET_SECONDS:
+            return
+        self._last_sweep = now
+        for buckets in (self._sid_buckets, self._identity_buckets):
+            for key in [key for key, bucket in buckets.items() if now - bucket.updated > _IDLE_BUCKET_SECONDS]:
+                del buckets[key]
+
+
+class EventCoalescer:
+    """
+    Leading + trailing throttle per key: the first event goes out immediately,
+    later ones inside ``interval_seconds`` only replace the pending payload,
+    which is sent once when the window closes.
+    """
+
+    def __init__(self, event: str, *, interval_seconds: float) -> None:
+        self._event = event
+        self._interval = max(0.0, interval_seconds)
+        self._windows: Dict[Any, Dict[str, Any]] = {}
+
+    async def submit(self, key: Any, payload: Any, send: Callable[[Any], Awaitable[None]]) -> None:
+        window = self._windows.get(key)
+        if window is not None:
+            REALTIME_EVENTS_COALESCED.labels(event=self._event).inc()
+            window["payload"] = payload
+            window["send"] = send
+            window["dirty"] = True
+            return
+        await send(payload)
+        if self._interval <= 0:
+            return
+        window = self._windows[key] = {"payload": payload, "send": send, "dirty": False}
+        window["task"] = asyncio.create_task(self._close_window(key))
+
+    async def _close_window(self, key: Any) -> None:
+        try:
+            await asyncio.sleep(self._interval)
+        finally:
+            window = self._windows.pop(key, None)
+        if window and window["dirty"]:
+            try:
+                await window["send"](window["payload"])
+            except Exception as exc:  # pragma: no cover - receiver went away
+                logger.debug("Coalesced %s emit failed: %s", self._event, exc)
+
+    def forget(self, predicate: Callable[[Any], bool]) -> None:
+        for key in [key for key in self._windows if predicate(key)]:
+            window = self._windows.pop(key)
+            window["task"].cancel()
+
+
+class ConnectionWorkLimiter:
+    """
+    Bounds expensive handlers per connection: ``max_pending`` calls may be
+    running or queued for one socket, and they run one at a time so a burst
+    from one client cannot occupy the loop's LLM/TTS/DB capacity.
+    """
+
+    def __init__(self, *, max_pending: int) -> None:
+        self._max_pending = max(1, max_pending)
+        self._pending: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def slot(self, sid: str, event: str) -> AsyncIterator[bool]:
+        """Yield ``False`` (without running) when the connection's queue is full."""
+        if self._pending.get(sid, 0) >= self._max_pending:
+            REALTIME_EVENTS_LIMITED.labels(event=event, reason="queue_full").inc()
+            yield False
+            return
+        self._pending[sid] = self._pending.get(sid, 0) + 1
+        REALTIME_WORK_IN_FLIGHT.labels(event=event).inc()
+        lock = self._locks.setdefault(sid, asyncio.Lock())
+        try:
+            async with lock:
+                yield True
+        finally:
+            REALTIME_WORK_IN_FLIGHT.labels(event=event).dec()
+            remaining = self._pending.get(sid, 1) - 1
+            if remaining > 0:
+                self._pending[sid] = remaining
+            else:
+                self._pending.pop(sid, None)
+                self._locks.pop(sid, None)
+
+
+__all__ = [
+    "ConnectionWorkLimiter",
+    "EventCoalescer",
+    "RateLimit",
+    "RealtimeRateLimiter",
+    "TokenBucket",
+]
@@ -1,20 +1,23 @@
 """Socket.IO server setup for student portal realtime features."""
 from __future__ import annotations
 
+import asyncio
 import logging
-from contextlib import contextmanager
 from typing import Any, Dict, Iterable, Optional
 from urllib.parse import parse_qs
 
 import socketio
 
 from ..config import settings
-from ..database import SessionLocal
 from ..services import student_portal_service
-from ..services.lecture_service import LectureService
+from ..services.lecture_service import get_shared_lecture_service
 from ..utils.dependencies import resolve_user_from_token
 from ..utils.student_token import decode_student_token
 from fastapi import HTTPException
+from .message_bus import build_client_manager
+from .presence_broadcaster import PresenceBroadcaster
+from .presence_store import build_presence_store
+from .rate_limiter import ConnectionWorkLimiter, EventCoalescer, RateLimit, RealtimeRateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +28,7 @@ else:
 
 sio = socketio.AsyncServer(
     async_mode="asgi",
+    client_manager=build_client_manager(),
     cors_allowed_origins=_CORS_ORIGINS,
     engineio_options={
         "cors_allowed_origins": _CORS_ORIGINS,
@@ -33,10 +37,9 @@ sio = socketio.AsyncServer(
     },
 )
 
-# sid -> session data
-_ACTIVE_CLIENTS: Dict[str, Dict[str, object]] = {}
-# enrollment_number -> set of active sids
-_STUDENT_CONNECTIONS: Dict[str, set[str]] = {}
+# Student sessions, per-student connection counts and per-class online sets.
+_PRESENCE = build_presence_store()
+# Lecture sockets are only ever served by the worker that owns them.
 _LECTURE_CLIENTS: Dict[str, Dict[str, Any]] = {}
 LECTURE_NAMESPACE = "/lecture-player"
 
@@ -50,12 +53,77 @@ def _class_room(context: Dict[str, Optional[str]]) -> str:
     return f"class:{context['admin_id']}:{context['std']}:{division}".lower()
 
 
-async def _broadcast_presence(context: Dict[str, Optional[str]], enrollment: str, status: str) -> None:
-    payload = {
-        "enrollment": enrollment,
-        "status": status,
-    }
-    await sio.emit("presence:update", payload, room=_class_room(context))
+async def _emit_presence_diff(room: str, diff: Dict[str, list]) -> None:
+    await sio.emit("presence:update", diff, room=room)
+
+
+async def _room_audience(room: str) -> int:
+    return len(await _PRESENCE.online_in_room(room))
+
+
+# presence:update carries {"online": [...], "offline": [...]} per flush interval.
+_PRESENCE_BROADCASTER = PresenceBroadcaster(
+    _emit_presence_diff,
+    interval_seconds=settings.realtime_presence_flush_ms / 1000,
+    recipients=_room_audience,
+)
+
+
+def _broadcast_presence(context: Dict[str, Optional[str]], enrollment: str, status: str) -> None:
+    _PRESENCE_BROADCASTER.mark(_class_room(context), enrollment, status)
+
+
+def _build_rate_limiter() -> Optional[RealtimeRateLimiter]:
+    if not settings.realtime_rate_limit_enabled:
+        return None
+    lecture_chat = RateLimit(
+        rate=settings.realtime_lecture_chat_per_minute / 60,
+        burst=settings.realtime_lecture_chat_burst,
+    )
+    return RealtimeRateLimiter(
+        {
+            "lecture:chat": lecture_chat,
+            "lecture:pause_prompt": lecture_chat,
+            "send_message": RateLimit(
+                rate=settings.realtime_send_message_per_minute / 60,
+                burst=settings.realtime_send_message_burst,
+            ),
+            "signal": RateLimit(
+                rate=settings.realtime_signal_per_second,
+                burst=settings.realtime_signal_burst,
+            ),
+        },
+        identity_multiplier=settings.realtime_identity_rate_multiplier,
+    )
+
+
+_RATE_LIMITER = _build_rate_limiter()
+# LLM/TTS/DB backed handlers run one at a time per socket with a small queue behind them.
+_WORK_LIMITER = ConnectionWorkLimiter(max_pending=settings.realtime_max_pending_per_connection)
+# Only the latest typing state per (sid, peer) matters; intermediate flips are folded.
+_TYPING_COALESCER = EventCoalescer(
+    "typing",
+    interval_seconds=settings.realtime_typing_coalesce_ms / 1000 if settings.realtime_rate_limit_enabled else 0,
+)
+
+
+def _allow_event(event: str, sid: str, identity: Optional[str]) -> bool:
+    return _RATE_LIMITER is None or _RATE_LIMITER.allow(event, sid, identity)
+
+
+def _forget_connection(sid: str) -> None:
+    if _RATE_LIMITER is not None:
+        _RATE_LIMITER.forget(sid)
+    _TYPING_COALESCER.forget(lambda key: key[0] == sid)
+
+
+def _student_identity(session: Dict[str, Any]) -> str:
+    return f"student:{session['context']['admin_id']}:{session['enrollment']}".lower()
+
+
+def _lecture_identity(session: Dict[str, Any]) -> str:
+    user = session["user"]
+    return f"{user['role']}:{user['id']}"
 
 async def broadcast_chat_message(*, admin_id: int, enrollments: Iterable[str], payload: dict, skip_sid: str | None = None) -> None:
     unique_enrollments = {enrollment.lower() for enrollment in enrollments if enrollment}
@@ -97,9 +165,6 @@ async def connect(sid: str, environ: dict, auth: dict | None = None) -> None:
         "context": context,
     }
     await sio.save_session(sid, session_payload)
-    _ACTIVE_CLIENTS[sid] = session_payload
-
-    _STUDENT_CONNECTIONS.setdefault(enrollment, set()).add(sid)
 
     personal_room = _personal_room(context["admin_id"], enrollment)
     class_room = _class_room(context)
@@ -111,31 +176,27 @@ async def connect(sid: str, environ: dict, auth: dict | None = None) -> None:
     await sio.enter_room(sid, personal_room)
     await sio.enter_room(sid, class_room)
 
-    await _broadcast_presence(context, enrollment, "online")
+    # Extra tabs of an already online student do not change presence.
+    if await _PRESENCE.register(sid, session_payload, room=class_room):
+        _broadcast_presence(context, enrollment, "online")
     
     logger.info(f"Student {enrollment} connected via Socket.IO (sid: {sid})")
 
 
 @sio.event
 async def disconnect(sid: str) -> None:
-    session = _ACTIVE_CLIENTS.pop(sid, None)
+    _forget_connection(sid)
+    session, was_last = await _PRESENCE.unregister(sid)
     if not session:
         return
 
-    enrollment = session["enrollment"]
-    context = session["context"]
-
-    sid_set = _STUDENT_CONNECTIONS.get(enrollment)
-    if sid_set is not None:
-        sid_set.discard(sid)
-        if not sid_set:
-            _STUDENT_CONNECTIONS.pop(enrollment, None)
-            await _broadcast_presence(context, enrollment, "offline")
+    if was_last:
+        _broadcast_presence(session["context"], session["enrollment"], "offline")
 
 
 @sio.on("signal")
 async def handle_signal(sid: str, data: dict) -> None:
-    session = _ACTIVE_CLIENTS.get(sid)
+    session = _PRESENCE.get_session(sid)
     if not session:
         return
 
@@ -145,6 +206,8 @@ async def handle_signal(sid: str, data: dict) -> None:
 
     if not peer_enrollment or not signal_type:
         return
+    if not _allow_event("signal", sid, _student_identity(session)):
+        return
 
     current_context = session["context"]
     try:
@@ -166,7 +229,7 @@ async def handle_signal(sid: str, data: dict) -> None:
 
 @sio.on("typing")
 async def handle_typing(sid: str, data: dict) -> None:
-    session = _ACTIVE_CLIENTS.get(sid)
+    session = _PRESENCE.get_session(sid)
     if not session:
         return
 
@@ -176,25 +239,22 @@ async def handle_typing(sid: str, data: dict) -> None:
         return
 
     context = session["context"]
-    await sio.emit(
-        "typing",
+    room = _personal_room(context["admin_id"], peer_enrollment)
+
+    async def _send(payload: Dict[str, Any]) -> None:
+        await sio.emit("typing", payload, room=room, skip_sid=sid)
+
+    await _TYPING_COALESCER.submit(
+        (sid, room),
         {
             "sender_enrollment": session["enrollment"],
             "typing": is_typing,
         },
-        room=_personal_room(context["admin_id"], peer_enrollment),
-        skip_sid=sid,
+        _send,
     )
 
 
-@sio.on("send_message")
-async def handle_send_message(sid: str, data: dict) -> None:
-    """Handle incoming chat messages via Socket.IO (pure websocket, no REST API)"""
-    session = _ACTIVE_CLIENTS.get(sid)
-    if not session:
-        logger.warning(f"send_message from unknown sid: {sid}")
-        return
-
+async def _deliver_chat_message(sid: str, session: Dict[str, Any], data: dict) -> None:
     current_enrollment = session["enrollment"]
     current_context = session["context"]
     
@@ -224,8 +284,9 @@ async def handle_send_message(sid: str, data: dict) -> None:
         share_metadata=share_metadata
     )
     
-    # Save message to database
-    record = student_portal_service.send_chat_message(
+    # Save message to database off the event loop
+    record = await asyncio.to_thread(
+        student_portal_service.send_chat_message,
         payload=payload,
         current_context=current_context,
         peer_context=peer_context,
@@ -254,29 +315,63 @@ async def handle_send_message(sid: str, data: dict) -> None:
     logger.info(f"[Socket.IO] Message broadcast complete!")
 
 
-@sio.on("presence:request")
-async def handle_presence_request(sid: str) -> None:
-    session = _ACTIVE_CLIENTS.get(sid)
+@sio.on("chat:sync")
+async def handle_chat_sync(sid: str, data: dict | None) -> Dict[str, Any]:
+    """Ack with the messages a reconnecting client missed after its last seen id."""
+    session = _PRESENCE.get_session(sid)
+    if not session:
+        return {"messages": [], "has_more": False, "error": "unauthorized"}
+    try:
+        after_id = max(0, int((data or {}).get("after_id") or 0))
+    except (TypeError, ValueError):
+        return {"messages": [], "has_more": False, "error": "invalid after_id"}
+
+    async with _WORK_LIMITER.slot(sid, "chat:sync") as admitted:
+        if not admitted:
+            return {"messages": [], "has_more": True, "error": "busy"}
+        return await asyncio.to_thread(
+            student_portal_service.sync_chat_messages,
+            current_context=session["context"],
+            after_id=after_id,
+        )
+
+
+@sio.on("send_message")
+async def handle_send_message(sid: str, data: dict) -> None:
+    """Handle incoming chat messages via Socket.IO (pure websocket, no REST API)"""
+    session = _PRESENCE.get_session(sid)
     if not session:
+        logger.warning(f"send_message from unknown sid: {sid}")
         return
 
-    context = session["context"]
-    enrollment = session["enrollment"]
-    room = _class_room(context)
+    if not _allow_event("send_message", sid, _student_identity(session)):
+        await sio.emit(
+            "message:error",
+            {"code": "rate_limited", "peer_enrollment": (data or {}).get("peer_enrollment")},
+            room=sid,
+        )
+        return
 
-    # compile list of currently online peers in class
-    online = [other for other, sids in _STUDENT_CONNECTIONS.items() if sids]
-    await sio.emit("presence:snapshot", {"online": online}, room=sid)
-    await _broadcast_presence(context, enrollment, "online")
+    async with _WORK_LIMITER.slot(sid, "send_message") as admitted:
+        if not admitted:
+            await sio.emit(
+                "message:error",
+                {"code": "busy", "peer_enrollment": (data or {}).get("peer_enrollment")},
+                room=sid,
+            )
+            return
+        await _deliver_chat_message(sid, session, data)
 
 
-@contextmanager
-def _lecture_service_context() -> Iterable[LectureService]:
-    db = SessionLocal()
-    try:
-        yield LectureService(db=db)
-    finally:
-        db.close()
+@sio.on("presence:request")
+async def handle_presence_request(sid: str) -> None:
+    session = _PRESENCE.get_session(sid)
+    if not session:
+        return
+
+    # compile list of currently online peers in class; later changes arrive as diffs
+    online = await _PRESENCE.online_in_room(_class_room(session["context"]))
+    await sio.emit("presence:snapshot", {"online": online}, room=sid)
 
 
 @sio.event(namespace=LECTURE_NAMESPACE)
@@ -304,6 +399,7 @@ async def connect(sid: str, environ: dict, auth: dict | None = None) -> None:
 
 @sio.event(namespace=LECTURE_NAMESPACE)
 async def disconnect(sid: str) -> None:
+    _forget_connection(sid)
     if _LECTURE_CLIENTS.pop(sid, None):
         logger.info("Lecture socket disconnected: sid=%s", sid)
 
@@ -321,101 +417,115 @@ async def handle_pause_prompt(sid: str, data: dict | None) -> None:
     lecture_id = str((data or {}).get("lecture_id") or "").strip()
     if not lecture_id:
         return
+    if not _allow_event("lecture:pause_prompt", sid, _lecture_identity(session)):
+        return
 
     try:
-        with _lecture_service_context() as lecture_service:
-            record = await lecture_service.repository.get_lecture(lecture_id)
-            language = record.get("language", "English")
-            message = lecture_service.build_pause_prompt_message(language)
-
-            payload = {
-                "lecture_id": lecture_id,
-                "message": message,
-                "language": language,
-            }
-
-            audio_url = await lecture_service.synthesize_chat_answer_audio(
-                lecture_id=lecture_id,
-                text=message,
-                language=language,
-            )
-            if audio_url:
-                payload["audio_url"] = audio_url
+        lecture_service = get_shared_lecture_service()
+        record = await lecture_service.repository.get_lecture(lecture_id)
+        language = record.get("language", "English")
+        message = lecture_service.build_pause_prompt_message(language)
+
+        payload = {
+            "lecture_id": lecture_id,
+            "message": message,
+            "language": language,
+        }
+
+        audio_url = await lecture_service.synthesize_chat_answer_audio(
+            lecture_id=lecture_id,
+            text=message,
+            language=language,
+        )
+        if audio_url:
+            payload["audio_url"] = audio_url
 
-            await _emit_lecture_prompt(sid, payload)
+        await _emit_lecture_prompt(sid, payload)
     except Exception as exc:  # pragma: no cover
         logger.warning("Pause prompt failed: %s", exc)
 
 
-@sio.on("lecture:chat", namespace=LECTURE_NAMESPACE)
-async def handle_lecture_chat(sid: str, data: dict | None) -> None:
-    session = _LECTURE_CLIENTS.get(sid)
-    if not session:
+async def _answer_lecture_chat(sid: str, lecture_id: str, question: str, answer_type: Any) -> None:
+    payload: Dict[str, Any] | None = None
+
+    async def _emit_delta(delta: str) -> None:
         await sio.emit(
-            "lecture:error",
-            {"error": "Unauthorized session"},
+            "lecture:reply_delta",
+            {"lecture_id": lecture_id, "delta": delta},
             room=sid,
             namespace=LECTURE_NAMESPACE,
         )
-        return
 
-    lecture_id = str((data or {}).get("lecture_id") or "").strip()
-    question = str((data or {}).get("question") or "").strip()
-    answer_type = (data or {}).get("answer_type")
-
-    if not lecture_id or not question:
+    async def _emit_audio(index: int, text: str, audio_url: str) -> None:
         await sio.emit(
-            "lecture:error",
-            {"error": "Lecture ID and question are required"},
+            "lecture:reply_audio",
+            {"lecture_id": lecture_id, "index": index, "text": text, "audio_url": audio_url},
             room=sid,
             namespace=LECTURE_NAMESPACE,
         )
-        return
-
-    payload: Dict[str, Any] | None = None
 
     try:
-        with _lecture_service_context() as lecture_service:
-            lecture_record = await lecture_service.repository.get_lecture(lecture_id)
+        lecture_service = get_shared_lecture_service()
+        lecture_record = await lecture_service.repository.get_lecture(lecture_id)
+        if answer_type == "json":
+            # Structured answers are only meaningful once complete, so they are not streamed.
             answer = await lecture_service.answer_question(
                 lecture_id=lecture_id,
                 question=question,
                 answer_type=answer_type,
                 lecture_record=lecture_record,
             )
-
             payload = answer if isinstance(answer, dict) else {"answer": answer}
-            payload["lecture_id"] = lecture_id
-
-            assistant_text = str(
-                payload.get("answer")
-                or payload.get("display_text")
-                or payload.get("message")
-                or payload.get("content")
-                or ""
-            ).strip()
-            language = lecture_record.get("language") if isinstance(lecture_record, dict) else None
-            audio_url: Optional[str] = None
-            if assistant_text:
-                audio_url = await lecture_service.synthesize_chat_answer_audio(
-                    lecture_id=lecture_id,
-                    text=assistant_text,
-                    language=language or payload.get("language"),
-                )
-                if audio_url:
-                    payload["audio_url"] = audio_url
-
-            try:
-                await lecture_service.save_chat_interaction(
-                    lecture_id=lecture_id,
-                    question=question,
-                    response_text=assistant_text or payload.get("answer") or payload.get("message"),
-                    audio_url=audio_url,
-                    language=language or payload.get("language"),
-                    extra_data=payload,
-                )
-            except Exception as exc:  # pragma: no cover - persistence failures shouldn't break chat
-                logger.warning("Failed to persist lecture chat for %s: %s", lecture_id, exc)
+        else:
+            payload = await lecture_service.stream_chat_answer(
+                lecture_id=lecture_id,
+                question=question,
+                lecture_record=lecture_record,
+                on_delta=_emit_delta,
+                on_audio=_emit_audio,
+            )
+            payload["streamed"] = True
+        payload["lecture_id"] = lecture_id
+
+        assistant_text = str(
+            payload.get("answer")
+            or payload.get("display_text")
+            or payload.get("message")
+            or payload.get("content")
+            or ""
+        ).strip()
+        language = lecture_record.get("language") if isinstance(lecture_record, dict) else None
+        # Streamed answers are voiced per sentence; their clips are stored in
+        # ``audio_segments`` and there is no single recording of the whole answer.
+        audio_url: Optional[str] = None
+        if assistant_text and not payload.get("streamed"):
+            audio_url = await lecture_service.synthesize_chat_answer_audio(
+                lecture_id=lecture_id,
+                text=assistant_text,
+                language=language or payload.get("language"),
+            )
+            if audio_url:
+                payload["audio_url"] = audio_url
+
+        try:
+            await lecture_service.save_chat_interaction(
+                lecture_id=lecture_id,
+                question=question,
+                response_text=assistant_text or payload.get("answer") or payload.get("message"),
+                audio_url=audio_url,
+                language=language or payload.get("language"),
+                extra_data=payload,
+                cache_hit=bool(payload.get("cached")),
+            )
+        except Exception as exc:  # pragma: no cover - persistence failures shouldn't break chat
+            logger.warning("Failed to persist lecture chat for %s: %s", lecture_id, exc)
+
+        segments = payload.get("audio_segments") or []
+        if payload.get("streamed") and segments:
+            # Clients that predate lecture:reply_audio play ``audio_url``; flag that it
+            # is the first sentence's clip so newer clients play the segments instead.
+            payload["audio_url"] = segments[0]["audio_url"]
+            payload["audio_url_is_segment"] = True
     except FileNotFoundError:
         await sio.emit(
             "lecture:error",
@@ -448,4 +558,58 @@ async def handle_lecture_chat(sid: str, data: dict | None) -> None:
     await sio.emit("lecture:reply", payload, room=sid, namespace=LECTURE_NAMESPACE)
 
 
+
+@sio.on("lecture:chat", namespace=LECTURE_NAMESPACE)
+async def handle_lecture_chat(sid: str, data: dict | None) -> None:
+    session = _LECTURE_CLIENTS.get(sid)
+    if not session:
+        await sio.emit(
+            "lecture:error",
+            {"error": "Unauthorized session"},
+            room=sid,
+            namespace=LECTURE_NAMESPACE,
+        )
+        return
+
+    lecture_id = str((data or {}).get("lecture_id") or "").strip()
+    question = str((data or {}).get("question") or "").strip()
+    answer_type = (data or {}).get("answer_type")
+
+    if not lecture_id or not question:
+        await sio.emit(
+            "lecture:error",
+            {"error": "Lecture ID and question are required"},
+            room=sid,
+            namespace=LECTURE_NAMESPACE,
+        )
+        return
+
+    if not _allow_event("lecture:chat", sid, _lecture_identity(session)):
+        await sio.emit(
+            "lecture:error",
+            {
+                "error": "Too many questions, please wait a moment",
+                "code": "rate_limited",
+                "lecture_id": lecture_id,
+            },
+            room=sid,
+            namespace=LECTURE_NAMESPACE,
+        )
+        return
+
+    async with _WORK_LIMITER.slot(sid, "lecture:chat") as admitted:
+        if not admitted:
+            await sio.emit(
+                "lecture:error",
+                {
+                    "error": "Still answering your previous questions",
+                    "code": "busy",
+                    "lecture_id": lecture_id,
+                },
+                room=sid,
+                namespace=LECTURE_NAMESPACE,
+            )
+            return
+        await _answer_lecture_chat(sid, lecture_id, question, answer_type)
+
 __all__ = ["sio", "broadcast_chat_message"]
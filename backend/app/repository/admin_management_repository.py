@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from ..postgres import get_pg_cursor
+from ..utils.principal_cache import invalidate_admin
 
 logger = logging.getLogger(__name__)
 
@@ -199,6 +200,7 @@ def update_admin(admin_id: int, **fields: Any) -> Optional[Dict[str, Any]]:
     with get_pg_cursor() as cur:
         cur.execute(query, params)
         row = cur.fetchone()
+    invalidate_admin(admin_id)
     return _row_to_admin(row)
 
 
@@ -209,6 +211,7 @@ def delete_admin(admin_id: int) -> Optional[Dict[str, Any]]:
     with get_pg_cursor() as cur:
         cur.execute(query, {"admin_id": admin_id})
         row = cur.fetchone()
+    invalidate_admin(admin_id)
     return _row_to_admin(row)
 
 
@@ -223,6 +226,7 @@ def extend_admin_subscription(admin_id: int, days: int) -> Optional[Dict[str, An
     with get_pg_cursor() as cur:
         cur.execute(query, params)
         row = cur.fetchone()
+    invalidate_admin(admin_id)
 
     admin = _row_to_admin(row)
     if admin and admin["active"] is False and admin["expiry_date"] and admin["expiry_date"] >= now:
@@ -6,6 +6,8 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 
 from ..postgres import get_pg_cursor
+from ..utils.principal_cache import invalidate_admin, invalidate_member
+from .registration_repository import _ADMIN_COLUMNS as _REGISTRATION_ADMIN_COLUMNS
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +96,35 @@ def get_admin_by_id(admin_id: int) -> Optional[Dict[str, Any]]:
     return _row_to_admin(row)
 
 
+def get_admin_principal(admin_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Look an admin up in ``admins`` and, failing that, ``administrators`` in one query.
+
+    Rows from ``admins`` win; the result has the columns of whichever table matched.
+    """
+    _ensure_admin_profile_photo_column()
+    select_list = ", ".join(
+        [f"a.{column} AS a_{column}" for column in _ADMIN_COLUMNS]
+        + [f"r.{column} AS r_{column}" for column in _REGISTRATION_ADMIN_COLUMNS]
+    )
+    query = (
+        f"SELECT {select_list} "
+        "FROM (SELECT %(admin_id)s::integer AS id) AS lookup "
+        "LEFT JOIN admins AS a ON a.admin_id = lookup.id "
+        "LEFT JOIN administrators AS r ON r.admin_aid = lookup.id AND a.admin_id IS NULL"
+    )
+    with get_pg_cursor() as cur:
+        cur.execute(query, {"admin_id": admin_id})
+        row = cur.fetchone()
+    if row is None:
+        return None
+    if row.get("a_admin_id") is not None:
+        return {column: row.get(f"a_{column}") for column in _ADMIN_COLUMNS}
+    if row.get("r_admin_aid") is not None:
+        return {column: row.get(f"r_{column}") for column in _REGISTRATION_ADMIN_COLUMNS}
+    return None
+
+
 def fetch_member_by_email(email: str) -> Optional[Dict[str, Any]]:
     query = (
         f"SELECT {', '.join(_MEMBER_COLUMNS)} FROM members "
@@ -133,9 +164,12 @@ def update_admin_password(
                 "admin_id": admin_id,
             },
         )
+    invalidate_admin(admin_id)
 
 
 def update_member_password(member_id: int, hashed_password: str) -> None:
     query = "UPDATE members SET password = %(password)s WHERE member_id = %(member_id)s"
     with get_pg_cursor(dict_rows=False) as cur:
-        cur.execute(query, {"password": hashed_password, "member_id": member_id})
\ No newline at end of file
+        cur.execute(query, {"password": hashed_password, "member_id": member_id})
+    invalidate_member(member_id)
+
@@ -105,9 +105,9 @@ def create_chapter_material(
     # Build INSERT query based on whether is_global column exists
     if has_is_global:
         query = """
-            INSERT INTO chapter_materials (admin_id, std, sem, board, subject, chapter_number, chapter_title, file_name, file_path, file_size, is_global)
-            VALUES (%(admin_id)s, %(std)s, %(sem)s, %(board)s, %(subject)s, %(chapter_number)s, %(chapter_title)s, %(file_name)s, %(file_path)s, %(file_size)s, %(is_global)s)
-            RETURNING id, admin_id, std, sem, board, subject, chapter_number, chapter_title, file_name, file_path, file_size, is_global, created_at, updated_at
+            INSERT INTO chapter_materials (admin_id, std, sem, board, subject, chapter_number, chapter_title, file_name, file_path, file_size, is_global, blob_hash)
+            VALUES (%(admin_id)s, %(std)s, %(sem)s, %(board)s, %(subject)s, %(chapter_number)s, %(chapter_title)s, %(file_name)s, %(file_path)s, %(file_size)s, %(is_global)s, %(blob_hash)s)
+            RETURNING id, admin_id, std, sem, board, subject, chapter_number, chapter_title, file_name, file_path, file_size, is_global, blob_hash, created_at, updated_at
         """
         params = {
             "admin_id": admin_id,
@@ -121,12 +121,13 @@ def create_chapter_material(
             "file_path": file_info["s3_url"],
             "file_size": file_info["file_size"],
             "is_global": file_info.get("is_global", False),
+            "blob_hash": file_info.get("blob_hash"),
         }
     else:
         query = """
-            INSERT INTO chapter_materials (admin_id, std, sem, board, subject, chapter_number, chapter_title, file_name, file_path, file_size)
-            VALUES (%(admin_id)s, %(std)s, %(sem)s, %(board)s, %(subject)s, %(chapter_number)s, %(chapter_title)s, %(file_name)s, %(file_path)s, %(file_size)s)
-            RETURNING id, admin_id, std, sem, board, subject, chapter_number, chapter_title, file_name, file_path, file_size, created_at, updated_at
+            INSERT INTO chapter_materials (admin_id, std, sem, board, subject, chapter_number, chapter_title, file_name, file_path, file_size, blob_hash)
+            VALUES (%(admin_id)s, %(std)s, %(sem)s, %(board)s, %(subject)s, %(chapter_number)s, %(chapter_title)s, %(file_name)s, %(file_path)s, %(file_size)s, %(blob_hash)s)
+            RETURNING id, admin_id, std, sem, board, subject, chapter_number, chapter_title, file_name, file_path, file_size, blob_hash, created_at, updated_at
         """
         params = {
             "admin_id": admin_id,
@@ -139,6 +140,7 @@ def create_chapter_material(
             "file_name": file_info["filename"],
             "file_path": file_info["s3_url"],
             "file_size": file_info["file_size"],
+            "blob_hash": file_info.get("blob_hash"),
         }
     
     with get_pg_cursor() as cur:
@@ -542,6 +544,101 @@ def update_chapter_material_db(
     return result if result else {}
 
 
+PREPROCESS_FIELDS = (
+    "content_hash",
+    "page_count",
+    "text_layer_pages",
+    "language_code",
+    "thumbnail_url",
+    "page_text_path",
+    "preprocess_status",
+    "preprocessed_at",
+)
+
+
+def update_material_preprocessing(material_id: int, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Store upload-time preprocessing results on a chapter material row."""
+    updates = {key: value for key, value in fields.items() if key in PREPROCESS_FIELDS}
+    if not updates:
+        return {}
+    if "text_layer_pages" in updates and updates["text_layer_pages"] is not None:
+        updates["text_layer_pages"] = json.dumps(updates["text_layer_pages"])
+    assignments = ", ".join(f"{key} = %({key})s" for key in updates)
+    query = f"UPDATE chapter_materials SET {assignments} WHERE id = %(id)s RETURNING *"
+    with get_pg_cursor() as cur:
+        cur.execute(query, {**updates, "id": material_id})
+        result = cur.fetchone()
+    return result if result else {}
+
+
+def attach_material_blob(material_id: int, *, blob_hash: str, file_path: str) -> Dict[str, Any]:
+    """
+    Point a material at a shared blob it took a reference on.
+
+    Only rows without a blob reference are updated; an empty result means the row
+    is gone or already holds one, and the caller must give its reference back.
+    """
+    query = """
+        UPDATE chapter_materials
+        SET blob_hash = %(blob_hash)s, file_path = %(file_path)s
+        WHERE id = %(id)s AND blob_hash IS NULL
+        RETURNING *
+    """
+    with get_pg_cursor() as cur:
+        cur.execute(query, {"id": material_id, "blob_hash": blob_hash, "file_path": file_path})
+        result = cur.fetchone()
+    return result if result else {}
+
+
+def find_materials_by_content_hash(content_hash: str, *, exclude_id: Optional[int] = None, limit: int = 5) -> List[Dict[str, Any]]:
+    """Return preprocessed materials with the same content, most recently processed first."""
+    query = """
+        SELECT * FROM chapter_materials
+        WHERE content_hash = %(content_hash)s
+          AND preprocess_status = 'ready'
+          AND (%(exclude_id)s IS NULL OR id <> %(exclude_id)s)
+        ORDER BY preprocessed_at DESC NULLS LAST
+        LIMIT %(limit)s
+    """
+    with get_pg_cursor() as cur:
+        cur.execute(query, {"content_hash": content_hash, "exclude_id": exclude_id, "limit": limit})
+        return cur.fetchall()
+
+
+def _page_text_path(admin_id: int, material_id: int) -> str:
+    admin_dir = os.path.join(UPLOAD_DIR, f"chapter_materials/admin_{admin_id}")
+    os.makedirs(admin_dir, exist_ok=True)
+    return os.path.join(admin_dir, f"page_text_{material_id}.json")
+
+
+def save_material_page_text(admin_id: int, material_id: int, pages: List[str], language_code: Optional[str]) -> str:
+    path = _page_text_path(admin_id, material_id)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as fh:
+        json.dump({"language_code": language_code, "pages": pages}, fh, ensure_ascii=False)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_material_page_text(material: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Return cached per-page text for a preprocessed material, if available."""
+    if not material or material.get("preprocess_status") != "ready":
+        return None
+    path = material.get("page_text_path")
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            payload = json.load(fh)
+    except (OSError, json.JSONDecodeError) as exc:
+        logger.warning("Failed to read cached page text for material %s: %s", material.get("id"), exc)
+        return None
+    pages = payload.get("pages")
+    if not isinstance(pages, list):
+        return None
+    return payload
+
+
 def delete_chapter_material_db(material_id: int) -> bool:
     # Get file path before deleting
     current = get_chapter_material(material_id)
@@ -1200,7 +1297,7 @@ def add_assistant_topics_to_file(admin_id: int, material_id: int, chapter_number
 def read_pdf_context_for_material(material_file_path: str, max_chars: int = 12_000) -> str:
     try:
         from app.utils.topic_extractor import read_pdf
-        return read_pdf(Path(material_file_path))[:max_chars]
+        return read_pdf(Path(material_file_path), max_chars=max_chars)[:max_chars]
     except Exception:
         logger.debug("read_pdf not available or failed; returning empty string")
         return ""
@@ -0,0 +1,104 @@
+"""Repository helpers for reference-counted, content-addressed material blobs."""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from ..postgres import get_pg_cursor
+
+
+def _ensure_table_exists() -> None:
+    create_table_sql = """
+        CREATE TABLE IF NOT EXISTS material_blobs (
+            content_hash VARCHAR(64) PRIMARY KEY,
+            s3_key TEXT NOT NULL,
+            file_url TEXT NOT NULL,
+            file_size BIGINT NOT NULL DEFAULT 0,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """
+
+    with get_pg_cursor(dict_rows=False) as cur:
+        cur.execute(create_table_sql)
+
+
+_ensure_table_exists()
+
+
+def acquire_blob(
+    *,
+    content_hash: str,
+    s3_key: str,
+    file_url: str,
+    file_size: int,
+) -> Dict[str, Any]:
+    """
+    Take a reference on the blob for ``content_hash``.
+
+    The first upload of some content registers its object; later uploads of the
+    same content get the existing row back (``created`` is False) and should
+    point at its object instead of their own.
+    """
+    query = """
+        INSERT INTO material_blobs (content_hash, s3_key, file_url, file_size, ref_count)
+        VALUES (%(content_hash)s, %(s3_key)s, %(file_url)s, %(file_size)s, 1)
+        ON CONFLICT (content_hash) DO UPDATE
+        SET ref_count = material_blobs.ref_count + 1,
+            updated_at = NOW()
+        RETURNING content_hash, s3_key, file_url, file_size, ref_count, (xmax = 0) AS created
+    """
+    with get_pg_cursor() as cur:
+        cur.execute(
+            query,
+            {
+                "content_hash": content_hash,
+                "s3_key": s3_key,
+                "file_url": file_url,
+                "file_size": file_size,
+            },
+        )
+        return dict(cur.fetchone())
+
+
+def release_blob(content_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Drop one reference; returns the blob row when this was the last reference.
+
+    The row is deleted in that case and the caller is responsible for removing
+    the stored object.
+    """
+    with get_pg_cursor() as cur:
+        cur.execute(
+            """
+            UPDATE material_blobs
+            SET ref_count = GREATEST(ref_count - 1, 0),
+                updated_at = NOW()
+            WHERE content_hash = %(content_hash)s
+            RETURNING ref_count
+            """,
+            {"content_hash": content_hash},
+        )
+        row = cur.fetchone()
+        if row is None or row["ref_count"] > 0:
+            return None
+        cur.execute(
+            """
+            DELETE FROM material_blobs
+            WHERE content_hash = %(content_hash)s AND ref_count = 0
+            RETURNING content_hash, s3_key, file_url, file_size
+            """,
+            {"content_hash": content_hash},
+        )
+        deleted = cur.fetchone()
+    return dict(deleted) if deleted else None
+
+
+def get_blob(content_hash: str) -> Optional[Dict[str, Any]]:
+    with get_pg_cursor() as cur:
+        cur.execute(
+            "SELECT * FROM material_blobs WHERE content_hash = %(content_hash)s",
+            {"content_hash": content_hash},
+        )
+        row = cur.fetchone()
+    return dict(row) if row else None
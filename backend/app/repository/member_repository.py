@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import Any, Dict, Iterable, List, Optional
 
 from ..postgres import get_pg_cursor
+from ..utils.principal_cache import invalidate_member
 
 _MEMBER_COLUMNS: List[str] = [
     "member_id",
@@ -189,6 +190,7 @@ def update_member(member_id: int, **fields: Any) -> Optional[Dict[str, Any]]:
     with get_pg_cursor() as cur:
         cur.execute(query, params)
         row = cur.fetchone()
+    invalidate_member(member_id)
 
     return _row_to_member(row)
 
@@ -197,4 +199,6 @@ def delete_member(member_id: int) -> bool:
 
     with get_pg_cursor(dict_rows=False) as cur:
         cur.execute(query, {"member_id": member_id})
-        return cur.rowcount > 0
+        deleted = cur.rowcount > 0
+    invalidate_member(member_id)
+    return deleted
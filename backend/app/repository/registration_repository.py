@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
 from ..postgres import get_pg_cursor
+from ..utils.principal_cache import invalidate_admin
 from . import admin_portal_repository
 
 _ADMIN_COLUMNS = [
@@ -165,6 +166,7 @@ def update_admin(admin_id: int, **fields: Any) -> Optional[Dict[str, Any]]:
     with get_pg_cursor() as cur:
         cur.execute(query, params)
         row = cur.fetchone()
+    invalidate_admin(admin_id)
 
     return _row_to_admin(row)
 
@@ -0,0 +1,90 @@
+"""Repository helpers for background student roster import jobs."""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Optional
+
+from ..postgres import get_pg_cursor
+
+_JOB_FIELDS = (
+    "status",
+    "total_rows",
+    "processed_rows",
+    "records_added",
+    "duplicate_count",
+    "error",
+    "result",
+    "finished_at",
+)
+
+
+def _ensure_table_exists() -> None:
+    create_table_sql = """
+        CREATE TABLE IF NOT EXISTS student_roster_import_jobs (
+            job_id VARCHAR(36) PRIMARY KEY,
+            admin_id INTEGER NOT NULL,
+            member_id INTEGER,
+            file_name TEXT,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            total_rows INTEGER NOT NULL DEFAULT 0,
+            processed_rows INTEGER NOT NULL DEFAULT 0,
+            records_added INTEGER NOT NULL DEFAULT 0,
+            duplicate_count INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            result JSONB,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            finished_at TIMESTAMPTZ
+        )
+    """
+    create_index_sql = (
+        "CREATE INDEX IF NOT EXISTS ix_student_roster_import_jobs_admin "
+        "ON student_roster_import_jobs (admin_id, created_at DESC)"
+    )
+
+    with get_pg_cursor(dict_rows=False) as cur:
+        cur.execute(create_table_sql)
+        cur.execute(create_index_sql)
+
+
+_ensure_table_exists()
+
+
+def create_job(*, job_id: str, admin_id: int, member_id: Optional[int], file_name: Optional[str]) -> Dict[str, Any]:
+    query = """
+        INSERT INTO student_roster_import_jobs (job_id, admin_id, member_id, file_name)
+        VALUES (%(job_id)s, %(admin_id)s, %(member_id)s, %(file_name)s)
+        RETURNING *
+    """
+    with get_pg_cursor() as cur:
+        cur.execute(
+            query,
+            {"job_id": job_id, "admin_id": admin_id, "member_id": member_id, "file_name": file_name},
+        )
+        return dict(cur.fetchone())
+
+
+def update_job(job_id: str, **fields: Any) -> None:
+    updates = {key: value for key, value in fields.items() if key in _JOB_FIELDS}
+    if not updates:
+        return
+    if updates.get("result") is not None:
+        updates["result"] = json.dumps(updates["result"], default=str)
+    assignments = ", ".join(f"{key} = %({key})s" for key in updates)
+    query = (
+        f"UPDATE student_roster_import_jobs SET {assignments}, updated_at = NOW() "
+        "WHERE job_id = %(job_id)s"
+    )
+    with get_pg_cursor(dict_rows=False) as cur:
+        cur.execute(query, {**updates, "job_id": job_id})
+
+
+def get_job(job_id: str, *, admin_id: int) -> Optional[Dict[str, Any]]:
+    query = (
+        "SELECT * FROM student_roster_import_jobs "
+        "WHERE job_id = %(job_id)s AND admin_id = %(admin_id)s"
+    )
+    with get_pg_cursor() as cur:
+        cur.execute(query, {"job_id": job_id, "admin_id": admin_id})
+        row = cur.fetchone()
+    return dict(row) if row else None
@@ -5,6 +5,7 @@ import json
 from typing import Any, Dict, Iterable, List, Optional
 
 from ..postgres import get_pg_cursor
+from ..utils.roster_context_cache import invalidate_roster_context
 
 
 def _table_exists(table_name: str) -> bool:
@@ -54,35 +55,50 @@ def fetch_other_admin_enrollments(admin_id: int, enrollments: Iterable[str]) ->
         cur.execute(query, {"admin_id": admin_id, "enrollments": enrollment_list})
         return cur.fetchall()
 
-def insert_roster_entries(admin_id: int, entries: List[Dict[str, Any]]) -> None:
-    """Insert roster entries for an admin."""
+def insert_roster_entries(admin_id: int, entries: List[Dict[str, Any]]) -> List[str]:
+    """
+    Insert roster entries for an admin with one multi-row ``INSERT``.
+
+    Rows that collide with an existing entry are skipped; the enrollment numbers
+    that were actually inserted are returned. Callers batch large imports so the
+    statement stays well below PostgreSQL's bind-parameter limit.
+    """
 
     if not entries:
-        return
+        return []
 
+    columns = (
+        "admin_id, enrollment_number, first_name, middle_name, last_name, "
+        "std, division, auto_password, assigned_member_id"
+    )
+    row_placeholder = "(" + ", ".join(["%s"] * 9) + ")"
     insert_sql = (
-        "INSERT INTO student_roster_entries "
-        "(admin_id, enrollment_number, first_name,middle_name, last_name, std, division, auto_password, assigned_member_id) "
-        "VALUES (%(admin_id)s, %(enrollment_number)s, %(first_name)s, %(middle_name)s, %(last_name)s, %(std)s, %(division)s, %(auto_password)s, %(assigned_member_id)s)"
+        f"INSERT INTO student_roster_entries ({columns}) "
+        f"VALUES {', '.join([row_placeholder] * len(entries))} "
+        "ON CONFLICT DO NOTHING RETURNING enrollment_number"
     )
 
-    payload = [
-        {
-            "admin_id": admin_id,
-            "enrollment_number": entry["enrollment_number"],
-            "first_name": entry["first_name"],
-            "middle_name": entry.get("middle_name"),
-            "last_name": entry.get("last_name"),
-            "std": entry["std"],
-            "division": entry.get("division"),
-            "auto_password": entry["auto_password"],
-            "assigned_member_id": entry.get("assigned_member_id"),
-        }
-        for entry in entries
-    ]
+    params: List[Any] = []
+    for entry in entries:
+        params.extend(
+            (
+                admin_id,
+                entry["enrollment_number"],
+                entry["first_name"],
+                entry.get("middle_name"),
+                entry.get("last_name"),
+                entry["std"],
+                entry.get("division"),
+                entry["auto_password"],
+                entry.get("assigned_member_id"),
+            )
+        )
 
     with get_pg_cursor(dict_rows=False) as cur:
-        cur.executemany(insert_sql, payload)
+        cur.execute(insert_sql, params)
+        inserted = [row[0] for row in cur.fetchall()]
+    invalidate_roster_context(*inserted)
+    return inserted
 
 
 def update_roster_entry(
@@ -118,7 +134,10 @@ def update_roster_entry(
 
     with get_pg_cursor() as cur:
         cur.execute(query, params)
-        return cur.fetchone()
+        row = cur.fetchone()
+    if row is not None:
+        invalidate_roster_context(enrollment_number)
+    return row
 
 
 def delete_roster_entry(admin_id: int, enrollment_number: str, *, member_id: Optional[int] = None) -> bool:
@@ -138,7 +157,10 @@ def delete_roster_entry(admin_id: int, enrollment_number: str, *, member_id: Opt
 
     with get_pg_cursor() as cur:
         cur.execute(query, params)
-        return cur.fetchone() is not None
+        deleted = cur.fetchone() is not None
+    if deleted:
+        invalidate_roster_context(enrollment_number)
+    return deleted
 
 
 def count_roster_students(admin_id: int, *, member_id: Optional[int] = None) -> int:
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional, Sequence
 from psycopg import OperationalError
 
 from ..postgres import get_pg_cursor
+from ..utils.roster_context_cache import invalidate_roster_context
 
 logger = logging.getLogger(__name__)
 
@@ -70,16 +71,80 @@ def _ensure_chat_message_columns() -> None:
     if "attachment_size" not in existing_columns:
         alterations.append("ALTER TABLE student_chat_messages ADD COLUMN attachment_size BIGINT")
 
-    if not alterations:
-        return
+    # One range scan per conversation regardless of which side sent each message.
+    alterations.append(
+        "CREATE INDEX IF NOT EXISTS ix_student_chat_messages_conversation "
+        "ON student_chat_messages (admin_id, LEAST(sender_enrollment, receiver_enrollment), "
+        "GREATEST(sender_enrollment, receiver_enrollment), id)"
+    )
 
     with get_pg_cursor(dict_rows=False) as cur:
         for statement in alterations:
             cur.execute(statement)
 
 
+def _ensure_chat_conversation_table() -> None:
+    """Create the per-pair conversation summary table, backfilling it on first creation."""
+
+    exists_query = """
+        SELECT 1 FROM information_schema.tables
+        WHERE table_schema = 'public' AND table_name = 'student_chat_conversations'
+    """
+    create_table_sql = """
+        CREATE TABLE IF NOT EXISTS student_chat_conversations (
+            admin_id INTEGER NOT NULL,
+            enrollment_low TEXT NOT NULL,
+            enrollment_high TEXT NOT NULL,
+            last_message_id BIGINT,
+            last_message TEXT,
+            last_attachment_name TEXT,
+            last_attachment_path TEXT,
+            last_attachment_mime_type TEXT,
+            last_sender TEXT,
+            last_at TIMESTAMPTZ,
+            unread_low INTEGER NOT NULL DEFAULT 0,
+            unread_high INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (admin_id, enrollment_low, enrollment_high)
+        )
+    """
+    create_index_sql = (
+        "CREATE INDEX IF NOT EXISTS ix_student_chat_conversations_high "
+        "ON student_chat_conversations (admin_id, enrollment_high, enrollment_low)"
+    )
+    # Existing history predates the summary, so it starts out with nothing unread.
+    backfill_sql = """
+        INSERT INTO student_chat_conversations (
+            admin_id, enrollment_low, enrollment_high, last_message_id, last_message,
+            last_attachment_name, last_attachment_path, last_attachment_mime_type, last_sender, last_at
+        )
+        SELECT DISTINCT ON (admin_id, LEAST(sender_enrollment, receiver_enrollment), GREATEST(sender_enrollment, receiver_enrollment))
+            admin_id,
+            LEAST(sender_enrollment, receiver_enrollment),
+            GREATEST(sender_enrollment, receiver_enrollment),
+            id,
+            message,
+            attachment_name,
+            attachment_path,
+            attachment_mime_type,
+            sender_enrollment,
+            created_at
+        FROM student_chat_messages
+        ORDER BY admin_id, LEAST(sender_enrollment, receiver_enrollment), GREATEST(sender_enrollment, receiver_enrollment), id DESC
+        ON CONFLICT DO NOTHING
+    """
+
+    with get_pg_cursor(dict_rows=False) as cur:
+        cur.execute(exists_query)
+        existed = cur.fetchone() is not None
+        cur.execute(create_table_sql)
+        cur.execute(create_index_sql)
+        if not existed:
+            cur.execute(backfill_sql)
+
+
 try:
     _ensure_chat_message_columns()
+    _ensure_chat_conversation_table()
 except OperationalError as exc:  # pragma: no cover - defensive startup guard
     logger.warning("Skipping chat column auto-migration due to DB error: %s", exc)
 
@@ -160,23 +225,19 @@ def bulk_upsert_student_accounts(credentials: List[Dict[str, Any]]) -> None:
     if not credentials:
         return
 
-    payload = [
-        {
-            "enrollment_number": cred["enrollment_number"],
-            "password_hash": cred["password_hash"],
-            "created_at": cred.get("created_at", datetime.utcnow()),
-        }
-        for cred in credentials
-    ]
+    now = datetime.utcnow()
+    params: List[Any] = []
+    for cred in credentials:
+        params.extend((cred["enrollment_number"], cred["password_hash"], cred.get("created_at", now)))
 
     query = (
         "INSERT INTO student_accounts (enrollment_number, password_hash, created_at) "
-        "VALUES (%(enrollment_number)s, %(password_hash)s, %(created_at)s) "
+        f"VALUES {', '.join(['(%s, %s, %s)'] * len(credentials))} "
         "ON CONFLICT (enrollment_number) DO UPDATE SET password_hash = EXCLUDED.password_hash"
     )
 
     with get_pg_cursor(dict_rows=False) as cur:
-        cur.executemany(query, payload)
+        cur.execute(query, params)
 
 
 def upsert_student_account(*, enrollment_number: str, password_hash: str) -> Dict[str, Any]:
@@ -252,7 +313,10 @@ def delete_student_profile_by_enrollment(enrollment_number: str) -> bool:
 
     with get_pg_cursor() as cur:
         cur.execute(query, {"enrollment_number": enrollment_number})
-        return cur.fetchone() is not None
+        deleted = cur.fetchone() is not None
+    if deleted:
+        invalidate_roster_context(enrollment_number)
+    return deleted
 
 
 def create_student_profile(**fields: Any) -> Dict[str, Any]:
@@ -288,6 +352,7 @@ def create_student_profile(**fields: Any) -> Dict[str, Any]:
 
     if profile is None:
         raise RuntimeError("Failed to create student profile")
+    invalidate_roster_context(profile.get("enrollment_number"))
     return profile
 
 
@@ -321,7 +386,10 @@ def update_student_profile(profile_id: int, **fields: Any) -> Optional[Dict[str,
 
     with get_pg_cursor() as cur:
         cur.execute(query, params)
-        return _row_to_profile(cur.fetchone())
+        profile = _row_to_profile(cur.fetchone())
+    if profile is not None:
+        invalidate_roster_context(profile.get("enrollment_number"))
+    return profile
 
 
 def get_student_profile_by_id(profile_id: int) -> Optional[Dict[str, Any]]:
@@ -461,39 +529,26 @@ def fetch_latest_peer_messages(
     current_enrollment: str,
     peer_enrollments: Sequence[str],
 ) -> Dict[str, Dict[str, Any]]:
+    """Latest message and unread count per peer, read from the conversation summaries."""
     if not peer_enrollments:
         return {}
 
     query = """
-        WITH ranked AS (
-            SELECT
-                CASE
-                    WHEN sender_enrollment = %(current)s THEN receiver_enrollment
-                    ELSE sender_enrollment
-                END AS peer_enrollment,
-                message,
-                attachment_name,
-                attachment_path,
-                attachment_mime_type,
-                sender_enrollment,
-                created_at,
-                ROW_NUMBER() OVER (
-                    PARTITION BY CASE
-                        WHEN sender_enrollment = %(current)s THEN receiver_enrollment
-                        ELSE sender_enrollment
-                    END
-                    ORDER BY created_at DESC
-                ) AS rn
-            FROM student_chat_messages
-            WHERE admin_id = %(admin_id)s
-              AND (
-                    (sender_enrollment = %(current)s AND receiver_enrollment = ANY(%(peers)s))
-                 OR (receiver_enrollment = %(current)s AND sender_enrollment = ANY(%(peers)s))
-              )
-        )
-        SELECT peer_enrollment, message, attachment_name, attachment_path, attachment_mime_type, sender_enrollment, created_at
-        FROM ranked
-        WHERE rn = 1
+        SELECT
+            CASE WHEN enrollment_low = %(current)s THEN enrollment_high ELSE enrollment_low END AS peer_enrollment,
+            last_message AS message,
+            last_attachment_name AS attachment_name,
+            last_attachment_path AS attachment_path,
+            last_attachment_mime_type AS attachment_mime_type,
+            last_sender AS sender_enrollment,
+            last_at AS created_at,
+            CASE WHEN enrollment_low = %(current)s THEN unread_low ELSE unread_high END AS unread_count
+        FROM student_chat_conversations
+        WHERE admin_id = %(admin_id)s
+          AND (
+                (enrollment_low = %(current)s AND enrollment_high = ANY(%(peers)s))
+             OR (enrollment_high = %(current)s AND enrollment_low = ANY(%(peers)s))
+          )
     """
 
     params = {
@@ -509,15 +564,27 @@ def fetch_latest_peer_messages(
     return {row["peer_enrollment"]: row for row in rows}
 
 
-def fetch_chat_messages(
-    *,
-    admin_id: int,
-    enrollment_a: str,
-    enrollment_b: str,
-    limit: int = 200,
-) -> List[Dict[str, Any]]:
+def mark_conversation_read(*, admin_id: int, reader_enrollment: str, peer_enrollment: str) -> None:
+    """Clear the reader's unread count; a no-op write is skipped when nothing is unread."""
     query = """
-        SELECT
+        UPDATE student_chat_conversations
+        SET unread_low = CASE WHEN enrollment_low = %(reader)s THEN 0 ELSE unread_low END,
+            unread_high = CASE WHEN enrollment_high = %(reader)s THEN 0 ELSE unread_high END
+        WHERE admin_id = %(admin_id)s
+          AND enrollment_low = LEAST(%(reader)s, %(peer)s)
+          AND enrollment_high = GREATEST(%(reader)s, %(peer)s)
+          AND (
+                (enrollment_low = %(reader)s AND unread_low > 0)
+             OR (enrollment_high = %(reader)s AND unread_high > 0)
+          )
+    """
+    params = {"admin_id": admin_id, "reader": reader_enrollment, "peer": peer_enrollment}
+
+    with get_pg_cursor(dict_rows=False) as cur:
+        cur.execute(query, params)
+
+
+_CHAT_MESSAGE_COLUMNS = """
             id,
             sender_enrollment,
             receiver_enrollment,
@@ -527,28 +594,120 @@ def fetch_chat_messages(
             attachment_mime_type,
             attachment_size,
             created_at
-        FROM student_chat_messages
-        WHERE admin_id = %(admin_id)s
-          AND (
-                (sender_enrollment = %(enrollment_a)s AND receiver_enrollment = %(enrollment_b)s)
-             OR (sender_enrollment = %(enrollment_b)s AND receiver_enrollment = %(enrollment_a)s)
-          )
-        ORDER BY created_at ASC
-        LIMIT %(limit)s
+"""
+
+
+def fetch_chat_messages(
+    *,
+    admin_id: int,
+    enrollment_a: str,
+    enrollment_b: str,
+    limit: int = 50,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
+    Return up to ``limit`` messages of one conversation in ascending id order.
 
-    params = {
+    Without a cursor the newest page is returned; ``before_id`` pages back
+    through older history and ``after_id`` fetches what arrived since.
+    """
+    conditions = [
+        "admin_id = %(admin_id)s",
+        "LEAST(sender_enrollment, receiver_enrollment) = LEAST(%(enrollment_a)s, %(enrollment_b)s)",
+        "GREATEST(sender_enrollment, receiver_enrollment) = GREATEST(%(enrollment_a)s, %(enrollment_b)s)",
+    ]
+    params: Dict[str, Any] = {
         "admin_id": admin_id,
         "enrollment_a": enrollment_a,
         "enrollment_b": enrollment_b,
         "limit": limit,
     }
+    if after_id is not None:
+        conditions.append("id > %(after_id)s")
+        params["after_id"] = after_id
+        order = "ASC"
+    else:
+        order = "DESC"
+    if before_id is not None:
+        conditions.append("id < %(before_id)s")
+        params["before_id"] = before_id
+
+    query = (
+        f"SELECT {_CHAT_MESSAGE_COLUMNS} FROM student_chat_messages "
+        f"WHERE {' AND '.join(conditions)} "
+        f"ORDER BY id {order} LIMIT %(limit)s"
+    )
+
+    with get_pg_cursor() as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+    if order == "DESC":
+        rows = list(reversed(rows))
+    return rows
+
+
+def fetch_chat_messages_since(
+    *,
+    admin_id: int,
+    enrollment: str,
+    after_id: int,
+    limit: int = 200,
+) -> List[Dict[str, Any]]:
+    """Messages sent to or by ``enrollment`` with an id above ``after_id``, oldest first."""
+    query = (
+        f"SELECT {_CHAT_MESSAGE_COLUMNS} FROM student_chat_messages "
+        "WHERE id > %(after_id)s AND admin_id = %(admin_id)s "
+        "AND (sender_enrollment = %(enrollment)s OR receiver_enrollment = %(enrollment)s) "
+        "ORDER BY id ASC LIMIT %(limit)s"
+    )
+    params = {"admin_id": admin_id, "enrollment": enrollment, "after_id": after_id, "limit": limit}
 
     with get_pg_cursor() as cur:
         cur.execute(query, params)
         return cur.fetchall()
 
 
+# Concurrent senders may commit out of id order; the preview only moves forward.
+_UPSERT_CONVERSATION_SQL = """
+    INSERT INTO student_chat_conversations (
+        admin_id, enrollment_low, enrollment_high, last_message_id, last_message,
+        last_attachment_name, last_attachment_path, last_attachment_mime_type,
+        last_sender, last_at, unread_low, unread_high
+    )
+    VALUES (
+        %(admin_id)s,
+        LEAST(%(sender)s, %(receiver)s),
+        GREATEST(%(sender)s, %(receiver)s),
+        %(message_id)s,
+        %(message)s,
+        %(attachment_name)s,
+        %(attachment_path)s,
+        %(attachment_mime_type)s,
+        %(sender)s,
+        %(created_at)s,
+        CASE WHEN %(receiver)s <= %(sender)s THEN 1 ELSE 0 END,
+        CASE WHEN %(receiver)s > %(sender)s THEN 1 ELSE 0 END
+    )
+    ON CONFLICT (admin_id, enrollment_low, enrollment_high) DO UPDATE SET
+        last_message = CASE WHEN EXCLUDED.last_message_id > student_chat_conversations.last_message_id
+            THEN EXCLUDED.last_message ELSE student_chat_conversations.last_message END,
+        last_attachment_name = CASE WHEN EXCLUDED.last_message_id > student_chat_conversations.last_message_id
+            THEN EXCLUDED.last_attachment_name ELSE student_chat_conversations.last_attachment_name END,
+        last_attachment_path = CASE WHEN EXCLUDED.last_message_id > student_chat_conversations.last_message_id
+            THEN EXCLUDED.last_attachment_path ELSE student_chat_conversations.last_attachment_path END,
+        last_attachment_mime_type = CASE WHEN EXCLUDED.last_message_id > student_chat_conversations.last_message_id
+            THEN EXCLUDED.last_attachment_mime_type ELSE student_chat_conversations.last_attachment_mime_type END,
+        last_sender = CASE WHEN EXCLUDED.last_message_id > student_chat_conversations.last_message_id
+            THEN EXCLUDED.last_sender ELSE student_chat_conversations.last_sender END,
+        last_at = CASE WHEN EXCLUDED.last_message_id > student_chat_conversations.last_message_id
+            THEN EXCLUDED.last_at ELSE student_chat_conversations.last_at END,
+        last_message_id = GREATEST(EXCLUDED.last_message_id, student_chat_conversations.last_message_id),
+        unread_low = student_chat_conversations.unread_low + EXCLUDED.unread_low,
+        unread_high = student_chat_conversations.unread_high + EXCLUDED.unread_high
+"""
+
+
 def insert_chat_message(
     *,
     admin_id: int,
@@ -597,4 +756,14 @@ def insert_chat_message(
 
     with get_pg_cursor() as cur:
         cur.execute(query, params)
-        return cur.fetchone()
+        record = cur.fetchone()
+        # Same transaction as the message, so the summary never runs ahead of or behind it.
+        cur.execute(
+            _UPSERT_CONVERSATION_SQL,
+            {
+                **params,
+                "message_id": record["id"],
+                "created_at": record["created_at"],
+            },
+        )
+        return record
@@ -3,7 +3,7 @@ from __future__ import annotations
 from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from ..postgres import get_pg_cursor
 
@@ -809,6 +809,92 @@ def record_watch_event(
             _update_video_totals(video_id, total_watch_time_seconds=delta_added)
 
 
+def apply_watch_batch(entries: Sequence[Tuple[int, str, int]]) -> int:
+    """
+    Apply buffered ``(video_id, enrollment_number, watch_seconds)`` heartbeats in one transaction.
+
+    Per-student progress is clamped to the video duration exactly like
+    :func:`record_watch_event`, and the per-video totals are rolled up in the
+    same statement. Video rows are locked in id order first so concurrent
+    flushes from several workers serialize instead of deadlocking. Returns the
+    number of engagement rows that advanced.
+    """
+    merged: Dict[Tuple[int, str], int] = {}
+    for video_id, enrollment_number, watch_seconds in entries:
+        if watch_seconds > 0:
+            key = (int(video_id), enrollment_number)
+            merged[key] = merged.get(key, 0) + int(watch_seconds)
+    if not merged:
+        return 0
+
+    rows = sorted(merged.items())
+    row_placeholder = "(%s::integer, %s::text, %s::integer)"
+    params: List[Any] = []
+    for (video_id, enrollment_number), watch_seconds in rows:
+        params.extend((video_id, enrollment_number, watch_seconds))
+
+    query = f"""
+        WITH incoming (video_id, enrollment_number, watch_seconds) AS (
+            VALUES {', '.join([row_placeholder] * len(rows))}
+        ),
+        targets AS (
+            SELECT
+                i.video_id,
+                i.enrollment_number,
+                COALESCE(e.watch_duration_seconds, 0) AS existing_watch,
+                CASE
+                    WHEN v.duration_seconds > 0
+                        THEN LEAST(COALESCE(e.watch_duration_seconds, 0) + i.watch_seconds, v.duration_seconds)
+                    ELSE COALESCE(e.watch_duration_seconds, 0) + i.watch_seconds
+                END AS target_watch
+            FROM incoming i
+            JOIN student_portal_videos v ON v.id = i.video_id
+            LEFT JOIN student_portal_video_engagement e
+              ON e.video_id = i.video_id AND e.enrollment_number = i.enrollment_number
+        ),
+        advanced AS (
+            SELECT * FROM targets WHERE target_watch > existing_watch
+        ),
+        upserted AS (
+            INSERT INTO student_portal_video_engagement (
+                video_id, enrollment_number, watch_duration_seconds, last_watched_at
+            )
+            SELECT video_id, enrollment_number, target_watch, NOW()
+            FROM advanced
+            ORDER BY video_id, enrollment_number
+            ON CONFLICT (video_id, enrollment_number)
+            DO UPDATE SET watch_duration_seconds = EXCLUDED.watch_duration_seconds,
+                          last_watched_at = EXCLUDED.last_watched_at
+            RETURNING video_id
+        ),
+        rollup AS (
+            SELECT
+                video_id,
+                SUM(target_watch - existing_watch) AS added_seconds,
+                COUNT(*) FILTER (WHERE existing_watch <= 0) AS new_viewers
+            FROM advanced
+            GROUP BY video_id
+        )
+        UPDATE student_portal_videos v
+        SET total_watch_count = v.total_watch_count + rollup.new_viewers,
+            total_watch_time_seconds = v.total_watch_time_seconds + rollup.added_seconds,
+            updated_at = NOW()
+        FROM rollup
+        WHERE v.id = rollup.video_id
+        RETURNING (SELECT COUNT(*) FROM upserted)
+    """
+    video_ids = sorted({video_id for (video_id, _), _ in rows})
+
+    with get_pg_cursor(dict_rows=False) as cur:
+        cur.execute(
+            "SELECT id FROM student_portal_videos WHERE id = ANY(%(ids)s) ORDER BY id FOR UPDATE",
+            {"ids": video_ids},
+        )
+        cur.execute(query, params)
+        result = cur.fetchone()
+    return int(result[0]) if result else 0
+
+
 def set_like_status(
     *,
     video_id: int,
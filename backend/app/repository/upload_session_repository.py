@@ -0,0 +1,51 @@
+"""Repository helpers recording which direct upload sessions were already completed."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from ..postgres import get_pg_cursor
+
+
+def _ensure_table_exists() -> None:
+    create_table_sql = """
+        CREATE TABLE IF NOT EXISTS upload_session_completions (
+            jti TEXT PRIMARY KEY,
+            kind VARCHAR(32) NOT NULL,
+            owner TEXT NOT NULL,
+            s3_key TEXT NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            completed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """
+    create_index_sql = (
+        "CREATE INDEX IF NOT EXISTS ix_upload_session_completions_expires "
+        "ON upload_session_completions (expires_at)"
+    )
+
+    with get_pg_cursor(dict_rows=False) as cur:
+        cur.execute(create_table_sql)
+        cur.execute(create_index_sql)
+
+
+_ensure_table_exists()
+
+
+def consume_session(*, jti: str, kind: str, owner: str, s3_key: str, expires_at: datetime) -> bool:
+    """
+    Mark an upload session as completed; returns False if it already was.
+
+    Rows for sessions whose token has expired can no longer be replayed, so
+    they are pruned on the way.
+    """
+    with get_pg_cursor(dict_rows=False) as cur:
+        cur.execute("DELETE FROM upload_session_completions WHERE expires_at < NOW()")
+        cur.execute(
+            """
+            INSERT INTO upload_session_completions (jti, kind, owner, s3_key, expires_at)
+            VALUES (%(jti)s, %(kind)s, %(owner)s, %(s3_key)s, %(expires_at)s)
+            ON CONFLICT (jti) DO NOTHING
+            RETURNING jti
+            """,
+            {"jti": jti, "kind": kind, "owner": owner, "s3_key": s3_key, "expires_at": expires_at},
+        )
+        return cur.fetchone() is not None
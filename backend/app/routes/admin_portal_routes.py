@@ -101,7 +101,7 @@ async def change_admin_password(
     payload: ChangePasswordRequest,
     current_user: dict = Depends(admin_required),
 ) -> dict:
-    auth_service.change_password(payload, current_user)
+    await auth_service.change_password(payload, current_user)
     return {"status": True, "message": "Password changed successfully"}
 
 
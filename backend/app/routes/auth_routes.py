@@ -24,7 +24,7 @@ async def login(payload: AuthLoginRequest) -> ResponseBase:
     login_request = AdminPortalLoginRequest(email=payload.email, password=payload.password)
 
     try:
-        portal_response = registration_service.login(login_request)
+        portal_response = await registration_service.login(login_request)
         portal_data = portal_response.model_dump(exclude_none=True)
         access_token = portal_data.get("access_token")
         if access_token:
@@ -36,7 +36,7 @@ async def login(payload: AuthLoginRequest) -> ResponseBase:
         if exc.status_code not in {status.HTTP_401_UNAUTHORIZED, status.HTTP_404_NOT_FOUND}:
             raise
 
-    message, legacy_data = auth_service.login(payload)
+    message, legacy_data = await auth_service.login(payload)
     legacy_payload = dict(legacy_data)
     token = legacy_payload.get("token")
     legacy_payload.setdefault("access_token", token)
@@ -75,7 +75,7 @@ async def change_password(
     payload: ChangePasswordRequest,
     current_user: dict = Depends(get_current_user),
 ) -> ResponseBase:
-    auth_service.change_password(payload, current_user)
+    await auth_service.change_password(payload, current_user)
     return ResponseBase(status=True, message="Password changed successfully", data={})
 
 
@@ -87,7 +87,7 @@ async def forgot_password(payload: ForgotPasswordRequest) -> ResponseBase:
 
 @router.post("/reset-password", response_model=ResponseBase)
 async def reset_password(payload: ResetPasswordRequest) -> ResponseBase:
-    auth_service.reset_password(payload)
+    await auth_service.reset_password(payload)
     return ResponseBase(status=True, message="Password reset successfully", data={})
 
 
@@ -7,11 +7,11 @@ import os
 from pydoc import resolve
 import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, Query, Request, Body
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session, aliased
 from sqlalchemy import desc, func, or_
 
@@ -31,6 +31,9 @@ from app.schemas.chapter_material_schema import (
     MultipleChapterSelectionRequest,
     CreateMergedLectureRequest,
     TopicSelection,
+    ChapterMaterialUploadSessionRequest,
+    LectureCoverPhotoUploadSessionRequest,
+    UploadSessionCompleteRequest,
     ResponseBase,
 )
 from app.repository import auth_repository, registration_repository,lecture_credit_repository
@@ -51,6 +54,7 @@ from app.repository.chapter_material_repository import (
     add_assistant_topics_to_file,
     topic_to_text,
     read_pdf_context_for_material,
+    load_material_page_text,
     LANGUAGE_OUTPUT_RULES,
     SUPPORTED_LANGUAGES,
     DURATION_OPTIONS,
@@ -73,12 +77,21 @@ from app.utils.s3_file_handler import (
     get_s3_service,
 )
 from app.services.lecture_service import LectureService
+from app.services.lecture_retrieval_service import drop_lecture_index
+from app.services.material_file_cache import acquire_material_file, material_local_path
+from app.services.material_dedup_service import (
+    deduplicate_upload,
+    finalize_material_upload,
+    release_material_content,
+)
+from app.services.upload_session_service import complete_upload_session, create_upload_session
 from app.services.topic_extract_queue import (
     topic_extraction_queue,
     TopicExtractionQueueFullError,
     TopicExtractionQueueTimeoutError,
 )
 from app.utils.dependencies import admin_required, get_current_user
+from app.utils.single_flight import build_single_flight
 from groq import Groq
 
 import os
@@ -1347,6 +1360,7 @@ async def upload_chapter_material(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload PDF to S3: {str(e)}"
         )
+    file_info = await deduplicate_upload(file_info)
 
     chapter_material = create_chapter_material(
         admin_id=admin_id,
@@ -1357,7 +1371,68 @@ async def upload_chapter_material(
         chapter_number=chapter_number,
         file_info=file_info,
     )
+    await finalize_material_upload(chapter_material, file_info)
+
+    return {
+        "status": True,
+        "message": "Chapter material uploaded successfully",
+        "data": {"material": chapter_material if isinstance(chapter_material, dict) else (chapter_material.to_dict() if hasattr(chapter_material, "to_dict") else chapter_material.__dict__)},
+    }
+
+
+@router.post("/upload-sessions")
+async def create_chapter_material_upload_session(
+    payload: ChapterMaterialUploadSessionRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """Issue presigned URLs so the client uploads the PDF straight to storage."""
+    admin_id = _resolve_admin_id(current_user)
+    session = await create_upload_session(
+        kind="chapter_material",
+        owner=f"admin:{admin_id}",
+        subfolder=f"admin_{admin_id}",
+        file_name=payload.file_name,
+        content_type=payload.content_type,
+        file_size=payload.file_size,
+        checksum_sha256=payload.checksum_sha256,
+        part_size=payload.part_size,
+        part_checksums_sha256=payload.part_checksums_sha256,
+        metadata={
+            "std": payload.std,
+            "subject": payload.subject,
+            "sem": payload.sem,
+            "board": payload.board,
+            "chapter_number": payload.chapter_number,
+        },
+    )
+    return {"status": True, "message": "Upload session created", "data": session}
+
 
+@router.post("/upload-sessions/complete")
+async def complete_chapter_material_upload_session(
+    payload: UploadSessionCompleteRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """Verify a direct upload and register it as a chapter material."""
+    admin_id = _resolve_admin_id(current_user)
+    file_info = await complete_upload_session(
+        session_token=payload.session_token,
+        kind="chapter_material",
+        owner=f"admin:{admin_id}",
+        parts=[part.dict() for part in payload.parts] if payload.parts else None,
+    )
+    details = file_info.pop("metadata")
+    file_info = await deduplicate_upload(file_info)
+    chapter_material = create_chapter_material(
+        admin_id=admin_id,
+        std=details["std"],
+        subject=details["subject"],
+        sem=details.get("sem", ""),
+        board=details.get("board", ""),
+        chapter_number=details["chapter_number"],
+        file_info=file_info,
+    )
+    await finalize_material_upload(chapter_material, file_info)
     return {
         "status": True,
         "message": "Chapter material uploaded successfully",
@@ -1446,14 +1521,7 @@ async def list_recent_chapter_materials_route(
 
 
 
-@router.post("/lectures/{lecture_uid}/cover-photo", response_model=ResponseBase)
-async def upload_lecture_cover_photo(
-    lecture_uid: str,
-    cover_photo: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    admin_id = _resolve_admin_id(current_user)
+def _get_owned_lecture(db: Session, lecture_uid: str, admin_id: int) -> LectureGen:
     lecture: Optional[LectureGen] = (
         db.query(LectureGen).filter(LectureGen.lecture_uid == lecture_uid).first()
     )
@@ -1467,14 +1535,11 @@ async def upload_lecture_cover_photo(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied",
         )
-    settings = get_settings()
-    s3_service = get_s3_service(settings)
-    upload_result = await upload_image_to_s3(
-        cover_photo,
-        s3_service=s3_service,
-        subfolder=f"lectures/{admin_id}/{lecture_uid}/cover-photos",
-    )
-    lecture.cover_photo_url = upload_result.get("s3_url")
+    return lecture
+
+
+def _save_lecture_cover_photo(db: Session, lecture: LectureGen, cover_photo_url: Optional[str]) -> ResponseBase:
+    lecture.cover_photo_url = cover_photo_url
     lecture.updated_at = datetime.utcnow()
     db.add(lecture)
     db.commit()
@@ -1483,11 +1548,72 @@ async def upload_lecture_cover_photo(
         status=True,
         message="Lecture cover photo uploaded successfully",
         data={
-            "lecture_uid": lecture_uid,
+            "lecture_uid": lecture.lecture_uid,
             "cover_photo_url": lecture.cover_photo_url,
             "material_id": lecture.material_id,
         },
     )
+
+
+@router.post("/lectures/{lecture_uid}/cover-photo", response_model=ResponseBase)
+async def upload_lecture_cover_photo(
+    lecture_uid: str,
+    cover_photo: UploadFile = File(...),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    admin_id = _resolve_admin_id(current_user)
+    lecture = _get_owned_lecture(db, lecture_uid, admin_id)
+    settings = get_settings()
+    s3_service = get_s3_service(settings)
+    upload_result = await upload_image_to_s3(
+        cover_photo,
+        s3_service=s3_service,
+        subfolder=f"lectures/{admin_id}/{lecture_uid}/cover-photos",
+    )
+    return _save_lecture_cover_photo(db, lecture, upload_result.get("s3_url"))
+
+
+@router.post("/lectures/{lecture_uid}/cover-photo/upload-sessions", response_model=ResponseBase)
+async def create_lecture_cover_photo_upload_session(
+    lecture_uid: str,
+    payload: LectureCoverPhotoUploadSessionRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Issue a presigned URL so the client uploads the cover photo straight to storage."""
+    admin_id = _resolve_admin_id(current_user)
+    _get_owned_lecture(db, lecture_uid, admin_id)
+    session = await create_upload_session(
+        kind="lecture_cover_photo",
+        # Binding the session to the lecture keeps it from being completed on another one.
+        owner=f"admin:{admin_id}:lecture:{lecture_uid}",
+        subfolder=f"lectures/{admin_id}/{lecture_uid}/cover-photos",
+        file_name=payload.file_name,
+        content_type=payload.content_type,
+        file_size=payload.file_size,
+        checksum_sha256=payload.checksum_sha256,
+    )
+    return ResponseBase(status=True, message="Upload session created", data=session)
+
+
+@router.post("/lectures/{lecture_uid}/cover-photo/upload-sessions/complete", response_model=ResponseBase)
+async def complete_lecture_cover_photo_upload_session(
+    lecture_uid: str,
+    payload: UploadSessionCompleteRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Verify a direct cover photo upload and set it on the lecture."""
+    admin_id = _resolve_admin_id(current_user)
+    lecture = _get_owned_lecture(db, lecture_uid, admin_id)
+    file_info = await complete_upload_session(
+        session_token=payload.session_token,
+        kind="lecture_cover_photo",
+        owner=f"admin:{admin_id}:lecture:{lecture_uid}",
+        parts=[part.dict() for part in payload.parts] if payload.parts else None,
+    )
+    return _save_lecture_cover_photo(db, lecture, file_info["s3_url"])
 @router.delete("/{lecture_id}")
 async def delete_chapter_material_route(
     lecture_id: str,
@@ -1518,11 +1644,13 @@ async def delete_chapter_material_route(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Material not found")
 
     delete_chapter_material_db(material_id)
+    await release_material_content(chapter_material)
 
     if lecture_record:
         try:
             db.delete(lecture_record)
             db.commit()
+            drop_lecture_index(lecture_record.lecture_uid)
         except Exception:
             db.rollback()
 
@@ -1548,7 +1676,7 @@ async def extract_topics_from_materials(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot process more than 5 materials at once")
 
     try:
-        from app.utils.topic_extractor import extract_topics_from_pdf
+        from app.utils.topic_extractor import extract_topics_from_pdf, format_pdf_pages
         logger.info(f"Extracting topics for {len(material_ids)} materials by user {current_user.get('email')}")
         topics_by_material: List[Dict[str, Any]] = []
         for material_id in material_ids:
@@ -1586,49 +1714,30 @@ async def extract_topics_from_materials(
                 # Get file path (S3 URL or local path)
                 material_file_path = material.get("file_path") if isinstance(material, dict) else material.file_path
                 
-                # Handle S3 files
-                temp_file_path = None
+                # Resolve S3 URLs to a cached local copy (local paths are used as-is)
+                material_file = await acquire_material_file(material_file_path)
                 try:
-                    if material_file_path.startswith("https://") and ".s3." in material_file_path:
-                        # This is an S3 URL, download it temporarily
-                        from app.utils.s3_file_handler import get_s3_service
-                        settings = get_settings()
-                        s3_service = get_s3_service(settings)
-                        
-                        # Extract S3 key from URL (e.g., "https://bucket.s3.region.amazonaws.com/key" -> "key")
-                        s3_key = material_file_path.split(f"{settings.aws_s3_bucket_name}.s3.{settings.aws_region}.amazonaws.com/", 1)[-1]
-                        
-                        # Download file from S3
-                        file_content = s3_service.get_file(s3_key)
-                        if not file_content:
-                            logger.warning(f"File not found in S3 for material {material_id}: {material_file_path}")
+                    if material_file.path is None:
+                        logger.warning(f"File not found for material {material_id}: {material_file_path}")
+                        if material_file_path and material_file_path.startswith(("http://", "https://")):
                             entry["error"] = f"PDF file not found in storage: {material_file_path.split('/')[-1]}"
-                            entry["error_type"] = "FILE_NOT_FOUND"
-                            topics_by_material.append(entry)
-                            continue
-                        
-                        # Save to temporary file
-                        import tempfile
-                        temp_fd, temp_file_path = tempfile.mkstemp(suffix=".pdf")
-                        os.write(temp_fd, file_content)
-                        os.close(temp_fd)
-                        material_file_path = temp_file_path
-                    else:
-                        # Local file path
-                        if not os.path.exists(material_file_path):
-                            logger.warning(f"File not found for material {material_id}: {material_file_path}")
-                            entry["error"] = f"PDF file not found on server: {os.path.basename(material_file_path)}"
-                            entry["error_type"] = "FILE_NOT_FOUND"
-                            topics_by_material.append(entry)
-                            continue
+                        else:
+                            entry["error"] = f"PDF file not found on server: {os.path.basename(material_file_path or '')}"
+                        entry["error_type"] = "FILE_NOT_FOUND"
+                        topics_by_material.append(entry)
+                        continue
+                    material_file_path = str(material_file.path)
 
                     # Extract topics
                     # Extract topics with queue management to prevent server overload
                     try:
+                        preprocessed = await asyncio.to_thread(load_material_page_text, material)
                         async with topic_extraction_queue.acquire():
                             extraction = await asyncio.to_thread(
                                 extract_topics_from_pdf,
                                 Path(material_file_path),
+                                preloaded_text=format_pdf_pages(preprocessed["pages"]) if preprocessed else None,
+                                preloaded_language=preprocessed.get("language_code") if preprocessed else None,
                             )
                     except TopicExtractionQueueFullError:
                         logger.warning("Topic extraction queue is full for material %s", material_id)
@@ -1684,12 +1793,7 @@ async def extract_topics_from_materials(
                     
                     logger.info(f"Successfully extracted {len(topics)} topics for material {material_id}")
                 finally:
-                    # Clean up temporary file if it was created
-                    if temp_file_path and os.path.exists(temp_file_path):
-                        try:
-                            os.remove(temp_file_path)
-                        except Exception as cleanup_error:
-                            logger.warning(f"Failed to clean up temp file {temp_file_path}: {cleanup_error}")
+                    material_file.release()
 
             except HTTPException:
                 # Re-raise HTTP exceptions (permission errors, not found, etc.)
@@ -1926,7 +2030,16 @@ async def assistant_suggest_topics(
 
     pdf_context_text = ""
     try:
-        pdf_context_text = read_pdf_context_for_material(material.get("file_path") if isinstance(material, dict) else material.file_path) or excerpt or topics_text
+        preprocessed = load_material_page_text(material) if isinstance(material, dict) else None
+        if preprocessed:
+            from app.utils.topic_extractor import format_pdf_pages
+
+            pdf_context_text = format_pdf_pages(preprocessed["pages"])[:12_000]
+        else:
+            async with material_local_path(material.get("file_path") if isinstance(material, dict) else material.file_path) as local_pdf:
+                if local_pdf is not None:
+                    pdf_context_text = await asyncio.to_thread(read_pdf_context_for_material, str(local_pdf))
+        pdf_context_text = pdf_context_text or excerpt or topics_text
     except Exception:
         pdf_context_text = excerpt or topics_text
 
@@ -2281,14 +2394,47 @@ async def post_lecture_generation_config(
         "message": "Lecture configuration fetched successfully",
         "data": config_response,
     }
-async def _ensure_audio_file(lecture_id: str, filename: str) -> Path:
-    """Return an existing audio file path or generate it on demand."""
+
+
+_audio_single_flight = build_single_flight("lecture_audio")
+
+
+def _lecture_audio_path(lecture_id: str, filename: str) -> Path:
     storage_base = Path(__file__).parent.parent.parent / "storage" / "chapter_lectures"
-    audio_path = storage_base / lecture_id / "audio" / filename
+    return storage_base / lecture_id / "audio" / filename
+
+
+async def _ensure_audio_file(lecture_id: str, filename: str) -> Path:
+    """Return an existing audio file path or generate it on demand.
+
+    Concurrent requests for the same missing slide share a single synthesis; with
+    the Redis single-flight backend this also holds across workers.
+    """
+    audio_path = _lecture_audio_path(lecture_id, filename)
 
     if audio_path.exists():
         return audio_path
 
+    async def _existing() -> Optional[Path]:
+        return audio_path if audio_path.exists() else None
+
+    return await _audio_single_flight.run(
+        f"{lecture_id}:{filename}",
+        lambda: _generate_audio_file(lecture_id, filename),
+        lookup=_existing,
+    )
+
+
+async def _generate_audio_file(
+    lecture_id: str,
+    filename: str,
+    *,
+    on_part: Optional[Callable[[bytes], None]] = None,
+) -> Path:
+    """Synthesize a missing slide MP3 from the stored lecture narration."""
+    audio_path = _lecture_audio_path(lecture_id, filename)
+    storage_base = audio_path.parent.parent.parent
+
     try:
         from app.services.tts_service import GoogleTTSService
         from app.postgres import get_pg_cursor
@@ -2341,8 +2487,9 @@ async def _ensure_audio_file(lecture_id: str, filename: str) -> Path:
 
         settings = get_settings()
         tts_service = GoogleTTSService(
-            storage_root=str(storage_base.parent),
+            storage_root=str(storage_base),
             credentials_path=getattr(settings, "gcp_tts_credentials_path", None),
+            chunk_concurrency=settings.tts_chunk_concurrency,
         )
         audio_path_result = await tts_service.synthesize_text(
             lecture_id=lecture_id,
@@ -2350,6 +2497,7 @@ async def _ensure_audio_file(lecture_id: str, filename: str) -> Path:
             language=language,
             filename=filename,
             subfolder="audio",
+            on_part=on_part,
         )
 
         if not audio_path_result or not audio_path_result.exists():
@@ -2374,24 +2522,112 @@ async def _ensure_audio_file(lecture_id: str, filename: str) -> Path:
         )
 
 
+# Keep strong references so background synthesis outlives a disconnected stream.
+_audio_stream_jobs: Set[asyncio.Task] = set()
+
+_AUDIO_CACHE_CONTROL = "public, no-cache"
+
+
+def _audio_etag(audio_path: Path) -> str:
+    stat_result = audio_path.stat()
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def _audio_file_response(
+    request: Request,
+    audio_path: Path,
+    *,
+    download_name: Optional[str] = None,
+) -> Response:
+    """Serve a cached MP3 with ETag revalidation and byte-range support."""
+    etag = _audio_etag(audio_path)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": _AUDIO_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if download_name:
+        headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # FileResponse answers Range/If-Range requests with 206 partial content.
+    return FileResponse(audio_path, media_type="audio/mpeg", headers=headers)
+
+
+async def _stream_audio_file(request: Request, lecture_id: str, filename: str) -> Response:
+    """Stream a cold slide to the client chunk by chunk while the file is synthesized."""
+    key = f"{lecture_id}:{filename}"
+    if _audio_single_flight.is_running(key):
+        # Someone else is already synthesizing this slide; wait for the file.
+        audio_path = await _ensure_audio_file(lecture_id, filename)
+        return _audio_file_response(request, audio_path)
+
+    audio_path = _lecture_audio_path(lecture_id, filename)
+    queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+
+    async def _existing() -> Optional[Path]:
+        return audio_path if audio_path.exists() else None
+
+    job = asyncio.create_task(
+        _audio_single_flight.run(
+            key,
+            lambda: _generate_audio_file(lecture_id, filename, on_part=queue.put_nowait),
+            lookup=_existing,
+        )
+    )
+    _audio_stream_jobs.add(job)
+    job.add_done_callback(_audio_stream_jobs.discard)
+    job.add_done_callback(lambda done: done.cancelled() or done.exception())
+    job.add_done_callback(lambda _: queue.put_nowait(None))
+
+    first_part = await queue.get()
+    if first_part is None:
+        # Nothing was streamed: either synthesis failed (re-raise its HTTP error)
+        # or another worker produced the file while we held the lease.
+        return _audio_file_response(request, await job)
+
+    async def _body() -> AsyncIterator[bytes]:
+        yield first_part
+        while True:
+            part = await queue.get()
+            if part is None:
+                break
+            yield part
+
+    return StreamingResponse(
+        _body(),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
 @router.get("/chapter_lecture/audio/{lecture_id}/{filename}")
 async def get_lecture_audio(
     lecture_id: str,
     filename: str,
+    request: Request,
+    stream: bool = Query(True, description="Stream cold slides while they are synthesized"),
 ):
+    audio_path = _lecture_audio_path(lecture_id, filename)
+    if audio_path.exists():
+        return _audio_file_response(request, audio_path)
+    if stream:
+        return await _stream_audio_file(request, lecture_id, filename)
     audio_path = await _ensure_audio_file(lecture_id, filename)
-    return FileResponse(audio_path, media_type="audio/mpeg")
+    return _audio_file_response(request, audio_path)
 
 
 @router.get("/chapter_lecture/audio/{lecture_id}/{filename}/download")
 async def download_lecture_audio(
     lecture_id: str,
     filename: str,
+    request: Request,
 ):
     audio_path = await _ensure_audio_file(lecture_id, filename)
-    response = FileResponse(audio_path, media_type="audio/mpeg")
-    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    return _audio_file_response(request, audio_path, download_name=filename)
 
 @router.get("/chapter_lectures/{std}/{subject}/{lecture_id}")
 async def get_lecture_json(
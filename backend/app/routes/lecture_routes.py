@@ -33,7 +33,8 @@ from app.schemas.lecture_schema import (
 from app.repository.lecture_repository import LectureRepository
 from app.repository import student_portal_video_repository
 from app.services.lecture_generation_service import GroqService
-from app.services.lecture_service import LectureService
+from app.services.lecture_retrieval_service import drop_lecture_index
+from app.services.lecture_service import LectureService, TTS_SLIDE_FIELDS
 from app.services.lecture_share_service import LectureShareService
 from app.schemas.admin_schema import WorkType
 from app.utils.dependencies import admin_or_lecture_member, get_current_user, member_required
@@ -44,6 +45,8 @@ from app.config import get_settings
 from app.utils.s3_file_handler import get_s3_service
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ============================================================================
 # ROUTER SETUP
 # ============================================================================
@@ -454,7 +457,7 @@ async def share_lecture_recording(
                     or mimetypes.guess_type(abs_video_path)[0]
                     or "video/mp4"
                 )
-                upload_result = s3_service.upload_file_from_path(
+                upload_result = await s3_service.upload_file_from_path_async(
                     file_path=abs_video_path,
                     folder=f"lectures/{admin_id}/{lecture_id}",
                     content_type=video_content_type,
@@ -472,7 +475,7 @@ async def share_lecture_recording(
             if os.path.exists(abs_thumb_path):
                 try:
                     thumb_content_type = mimetypes.guess_type(abs_thumb_path)[0] or "image/jpeg"
-                    thumb_result = s3_service.upload_file_from_path(
+                    thumb_result = await s3_service.upload_file_from_path_async(
                         file_path=abs_thumb_path,
                         folder=f"lectures/{admin_id}/{lecture_id}/thumbnails",
                         content_type=thumb_content_type,
@@ -758,6 +761,7 @@ async def delete_lecture(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Lecture {lecture_id} not found"
             )
+        drop_lecture_index(lecture_id)
 
         return {
             "status": True,
@@ -802,6 +806,8 @@ async def bulk_delete_lectures(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No lectures found for provided filters",
             )
+        for lecture in deleted:
+            drop_lecture_index(lecture["lecture_id"])
         return {
             "status": True,
             "message": "Lectures deleted successfully",
@@ -1008,6 +1014,7 @@ async def update_slide(
     slide_number: int,
     updates: Dict[str, Any],
     repository: LectureRepository = Depends(get_repository),
+    db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
     """
     Update a slide's content.
@@ -1017,11 +1024,23 @@ async def update_slide(
     - **updates**: Dictionary of fields to update
     """
     try:
+        previous = await repository.get_lecture(lecture_id)
         record = await repository.update_slide(
             lecture_id=lecture_id,
             slide_number=slide_number,
             slide_updates=updates,
         )
+
+        # Re-synthesize this slide's audio only if its spoken text changed.
+        if TTS_SLIDE_FIELDS.intersection(updates):
+            try:
+                lecture_service = LectureService(db=db, groq_api_key=GROQ_API_KEY)
+                record = await lecture_service.refresh_slide_audio(
+                    record,
+                    previous_slides=previous.get("slides") or [],
+                )
+            except Exception as exc:
+                logger.warning(f"Slide audio refresh failed for {lecture_id}/{slide_number}: {exc}")
         
         # Return updated slide
         for slide in record.get("slides", []):
@@ -1256,25 +1275,6 @@ async def regenerate_lecture(
         new_language = language or original.get("language", "English")
         new_duration = duration or original.get("requested_duration", 30)
     
-         # CRITICAL: Delete ALL existing audio files BEFORE regeneration
-        settings = get_settings()
-        default_storage = str(Path(__file__).parent.parent.parent / "storage" / "chapter_lectures")
-        storage_root = getattr(settings, "chapter_lecture_storage_root", None) or default_storage
-        audio_dir = Path(storage_root) / lecture_id / "audio"
-        if audio_dir.exists():
-            try:
-                shutil.rmtree(audio_dir)
-                logger.info(f"✅ Deleted existing audio directory for lecture {lecture_id}")
-                print(f"\n🗑️  Cleared old audio files from: {audio_dir}")
-            except Exception as exc:
-                logger.warning(f"Failed to delete audio directory: {exc}")
-                # Try to delete individual files
-                try:
-                    for audio_file in audio_dir.glob("*.mp3"):
-                        audio_file.unlink(missing_ok=True)
-                    logger.info(f"Deleted individual audio files for lecture {lecture_id}")
-                except Exception as inner_exc:
-                    logger.error(f"Failed to delete individual audio files: {inner_exc}")
         # Generate new content
         lecture_data = await groq_service.generate_lecture_content(
             text=source_text,
@@ -1303,18 +1303,18 @@ async def regenerate_lecture(
         }
         
         record = await repository.update_lecture(lecture_id, updates)
-         # NOW regenerate audio with force=True (audio dir is already deleted)
 
         lecture_service = LectureService(db=db, groq_api_key=GROQ_API_KEY)
 
-        print(f"\n🎤 Regenerating audio for {len(slides)} slides...")
-        # Remove audio_version from all slides before regeneration
-        for slide in slides:
-            slide.pop("audio_version", None)
-            slide.pop("audio_url", None)
-            slide.pop("audio_download_url", None)
-        record = await lecture_service.refresh_slide_audio(record, force=True)
-        print(f"✅ Audio regeneration complete!")
+        # Only slides whose spoken text changed are re-synthesized; the rest keep
+        # their existing audio and orphaned files are cleaned up in the background.
+        print(f"\n🎤 Refreshing audio for {len(slides)} slides...")
+        record = await lecture_service.refresh_slide_audio(
+            record,
+            previous_slides=original.get("slides") or [],
+            previous_language=original.get("language"),
+        )
+        print(f"✅ Audio refresh complete!")
         
         # Generate JSON URL again after regeneration
         metadata = original.get("metadata", {})
@@ -10,6 +10,7 @@ from jose import JWTError, jwt
 
 from ..config import settings
 from ..schemas import WorkType
+from ..schemas.chapter_material_schema import UploadSessionCompleteRequest
 from ..schemas.response import ResponseBase
 from ..schemas.student_portal_schema import (
     SendChatMessageRequest,
@@ -22,6 +23,7 @@ from ..schemas.student_portal_schema import (
     StudentVideoLikeRequest,
     StudentVideoExternalRequest,
     StudentVideoUploadRequest,
+    StudentVideoUploadSessionRequest,
     StudentVideoSubscribeRequest,
     StudentVideoShareRequest,
     StudentVideoWatchRequest,
@@ -73,13 +75,13 @@ async def health_check() -> dict[str, str]:
 
 @router.post("/auth/signup", status_code=status.HTTP_201_CREATED)
 async def student_signup(payload: StudentSignupRequest):
-    student_portal_service.signup_student(payload)
+    await student_portal_service.signup_student(payload)
     return {"status": True, "message": "Student account created successfully"}
 
 
 @router.post("/auth/login", response_model=StudentLoginResponse)
 async def student_login(payload: StudentLoginRequest) -> StudentLoginResponse:
-    result = student_portal_service.authenticate_student(payload)
+    result = await student_portal_service.authenticate_student(payload)
     token = _create_student_token(result["enrollment_number"])
     return StudentLoginResponse(
         status=True,
@@ -100,7 +102,7 @@ async def student_change_password(
     payload: StudentChangePasswordRequest,
     current_enrollment: str = Depends(_get_current_student),
 ) -> ResponseBase:
-    student_portal_service.change_student_password(
+    await student_portal_service.change_student_password(
         enrollment_number=current_enrollment,
         current_password=payload.current_password,
         new_password=payload.new_password,
@@ -352,6 +354,44 @@ async def upload_static_video(
     return ResponseBase(status=True, message="Video uploaded successfully", data={"video": video})
 
 
+@router.post("/videos/upload-sessions", response_model=ResponseBase)
+async def create_video_upload_session(
+    payload: StudentVideoUploadSessionRequest,
+    current_enrollment: str = Depends(_get_current_student),
+) -> ResponseBase:
+    context = student_portal_service.get_roster_context(current_enrollment)
+    session = await student_portal_service.create_video_upload_session(
+        file_name=payload.file_name,
+        content_type=payload.content_type,
+        file_size=payload.file_size,
+        checksum_sha256=payload.checksum_sha256,
+        part_size=payload.part_size,
+        part_checksums_sha256=payload.part_checksums_sha256,
+        title=payload.title,
+        subject=payload.subject,
+        description=payload.description,
+        std=payload.std,
+        current_context=context,
+        enrollment_number=current_enrollment,
+    )
+    return ResponseBase(status=True, message="Upload session created", data=session)
+
+
+@router.post("/videos/upload-sessions/complete", response_model=ResponseBase)
+async def complete_video_upload_session(
+    payload: UploadSessionCompleteRequest,
+    current_enrollment: str = Depends(_get_current_student),
+) -> ResponseBase:
+    context = student_portal_service.get_roster_context(current_enrollment)
+    video = await student_portal_service.complete_video_upload_session(
+        session_token=payload.session_token,
+        parts=[part.dict() for part in payload.parts] if payload.parts else None,
+        current_context=context,
+        enrollment_number=current_enrollment,
+    )
+    return ResponseBase(status=True, message="Video uploaded successfully", data={"video": video})
+
+
 @router.post("/videos/register", response_model=ResponseBase)
 async def register_external_video(
     payload: StudentVideoExternalRequest,
@@ -377,7 +417,7 @@ async def record_video_watch(
     current_enrollment: str = Depends(_get_current_student),
 ) -> ResponseBase:
     context = student_portal_service.get_roster_context(current_enrollment)
-    student_portal_service.record_video_watch(
+    await student_portal_service.record_video_watch(
         current_context=context,
         video_id=video_id,
         enrollment_number=current_enrollment,
@@ -462,13 +502,19 @@ async def list_chat_peers(current_enrollment: str = Depends(_get_current_student
     return ResponseBase(
         status=True,
         message="Chat peers fetched successfully",
-        data={"peers": peers_payload},
+        data={
+            "peers": peers_payload,
+            "unread_total": sum(peer.get("unread_count") or 0 for peer in peers_payload),
+        },
     )
 
 
 @router.get("/chat/messages/{peer_enrollment}", response_model=ResponseBase)
 async def list_chat_messages(
     peer_enrollment: str,
+    before_id: Optional[int] = Query(None, ge=1),
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(student_portal_service.CHAT_PAGE_DEFAULT_SIZE, ge=1, le=student_portal_service.CHAT_PAGE_MAX_SIZE),
     current_enrollment: str = Depends(_get_current_student),
 ):
     current_context = student_portal_service.get_roster_context(current_enrollment)
@@ -476,16 +522,34 @@ async def list_chat_messages(
         current=current_context, peer_enrollment=peer_enrollment
     )
 
-    messages = student_portal_service.list_chat_messages(
+    history = student_portal_service.get_chat_history(
         current_context=current_context,
         peer_context=peer_context,
+        limit=limit,
+        before_id=before_id,
+        after_id=after_id,
     )
 
     return ResponseBase(
         status=True,
         message="Chat history fetched successfully",
-        data={"messages": messages},
+        data=history,
+    )
+
+
+@router.get("/chat/sync", response_model=ResponseBase)
+async def sync_chat_messages(
+    after_id: int = Query(..., ge=0),
+    limit: int = Query(student_portal_service.CHAT_PAGE_MAX_SIZE, ge=1, le=student_portal_service.CHAT_PAGE_MAX_SIZE),
+    current_enrollment: str = Depends(_get_current_student),
+):
+    current_context = student_portal_service.get_roster_context(current_enrollment)
+    payload = student_portal_service.sync_chat_messages(
+        current_context=current_context,
+        after_id=after_id,
+        limit=limit,
     )
+    return ResponseBase(status=True, message="Chat messages synced successfully", data=payload)
 
 
 @router.post("/chat/messages", response_model=ResponseBase)
@@ -21,6 +21,7 @@ from ..schemas.response import ResponseBase
 from ..utils.session_store import valid_tokens
 from ..utils.file_handler import ALLOWED_PDF_TYPES
 from ..utils.s3_file_handler import upload_pdf_to_s3, get_s3_service
+from ..services.material_dedup_service import deduplicate_upload, finalize_material_upload
 
 
 router = APIRouter(prefix="/superadministration", tags=["Superadministration Portal"])
@@ -152,6 +153,8 @@ async def superadmin_upload_chapter_material(
             detail=f"Failed to upload PDF: {exc}",
         ) from exc
 
+    file_info = await deduplicate_upload(file_info)
+
     material = create_chapter_material(
         admin_id=0,
         std=std,
@@ -162,6 +165,7 @@ async def superadmin_upload_chapter_material(
         chapter_title=chapter_title,
         file_info={**file_info, "is_global": True},
     )
+    await finalize_material_upload(material, file_info)
 
     return ResponseBase(
         status=True,
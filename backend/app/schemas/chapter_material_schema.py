@@ -294,4 +294,35 @@ class MultipleChapterSelectionRequest(BaseModel):
     def validate_chapter_ids(cls, value: List[int]) -> List[int]:
         if not value:
             raise ValueError("At least one chapter must be selected")
-        return value
\ No newline at end of file
+        return value
+
+class ChapterMaterialUploadSessionRequest(BaseModel):
+    std: str = Field(..., min_length=1)
+    subject: str = Field(..., min_length=1)
+    sem: str = Field(default="")
+    board: str = Field(default="")
+    chapter_number: str = Field(..., min_length=1)
+    file_name: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(default="application/pdf")
+    file_size: int = Field(..., gt=0)
+    checksum_sha256: Optional[str] = Field(default=None, description="Base64-encoded SHA-256 of the file")
+    part_size: Optional[int] = Field(default=None, gt=0, description="Size of each part except the last, for parted uploads")
+    part_checksums_sha256: Optional[List[str]] = Field(default=None, description="Base64-encoded SHA-256 of each part, in order")
+
+
+class LectureCoverPhotoUploadSessionRequest(BaseModel):
+    file_name: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(..., max_length=100)
+    file_size: int = Field(..., gt=0)
+    checksum_sha256: str = Field(..., min_length=1, max_length=64, description="Base64-encoded SHA-256 of the file")
+
+
+class UploadedPart(BaseModel):
+    part_number: int = Field(..., ge=1, le=10_000)
+    etag: str = Field(..., min_length=1)
+    checksum_sha256: Optional[str] = Field(default=None, max_length=64)
+
+
+class UploadSessionCompleteRequest(BaseModel):
+    session_token: str = Field(..., min_length=1)
+    parts: Optional[List[UploadedPart]] = Field(default=None)
@@ -74,6 +74,15 @@ class StudentVideoUploadRequest(BaseModel):
     std: Optional[str] = Field(None, max_length=50)
 
 
+class StudentVideoUploadSessionRequest(StudentVideoUploadRequest):
+    file_name: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(..., max_length=100)
+    file_size: int = Field(..., gt=0)
+    checksum_sha256: Optional[str] = Field(None, max_length=64)
+    part_size: Optional[int] = Field(None, gt=0)
+    part_checksums_sha256: Optional[List[str]] = None
+
+
 class StudentVideoExternalRequest(BaseModel):
     title: str = Field(..., max_length=255)
     subject: Optional[str] = Field(None, max_length=255)
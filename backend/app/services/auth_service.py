@@ -25,7 +25,7 @@ from ..schemas import (
 )
 from ..utils.dependencies import create_access_token
 from ..utils.role_generator import generate_role_id
-from ..utils.passwords import truncate_password
+from ..utils.passwords import hash_password_async, truncate_password, verify_password_async
 from ..utils import bcrypt_compat  # noqa: F401  # ensure bcrypt shim loads
 from ..utils.password_reset_store import store_reset_token, consume_reset_token
 from .email_service import send_email, EmailNotConfiguredError
@@ -34,7 +34,7 @@ logger = logging.getLogger(__name__)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def ensure_dev_admin_account() -> None:
+async def ensure_dev_admin_account() -> None:
     """Seed a default dev admin account for local environments."""
 
     email = settings.dev_admin_email
@@ -54,7 +54,7 @@ def ensure_dev_admin_account() -> None:
         admin_management_repository.create_admin(
             name=settings.dev_admin_name,
             email=normalized_email,
-            password=get_password_hash(password),
+            password=await get_password_hash_async(password),
             package=settings.dev_admin_package,
             start_date=now,
             expiry_date=expiry_date,
@@ -95,6 +95,19 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(safe_password)
 
 
+async def verify_password_off_loop(plain_password: str, hashed_password: object) -> bool:
+    """Async :func:`verify_password` that runs bcrypt on the shared hashing pool."""
+    try:
+        normalized_hash = _ensure_unicode_hash(hashed_password)
+        return await verify_password_async(plain_password, normalized_hash)
+    except Exception:
+        return False
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hash_password_async(password)
+
+
 def _normalize_datetime(dt: datetime) -> datetime:
     """Return a naive UTC datetime for consistent comparisons."""
 
@@ -159,13 +172,13 @@ def _build_portal_admin_login_response(admin: Dict[str, object]) -> Tuple[str, D
     return "Login successful", payload
 
 
-def login(payload: LoginRequest) -> Tuple[str, Dict[str, object]]:
+async def login(payload: LoginRequest) -> Tuple[str, Dict[str, object]]:
     email = payload.email.lower().strip()
     password = payload.password
 
     admin = auth_repository.fetch_admin_by_email(email)
     if admin:
-        if not verify_password(password, admin["password"]):
+        if not await verify_password_off_loop(password, admin["password"]):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
         if not admin.get("active", True):
@@ -186,7 +199,7 @@ def login(payload: LoginRequest) -> Tuple[str, Dict[str, object]]:
 
     portal_admin = registration_repository.get_admin_by_email(email)
     if portal_admin:
-        if not verify_password(password, portal_admin["password"]):
+        if not await verify_password_off_loop(password, portal_admin["password"]):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
         return _build_portal_admin_login_response(portal_admin)
@@ -195,7 +208,7 @@ def login(payload: LoginRequest) -> Tuple[str, Dict[str, object]]:
     if not portal_member or not portal_member.get("password"):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
-    if not verify_password(password, portal_member["password"]):
+    if not await verify_password_off_loop(password, portal_member["password"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
     if not portal_member.get("active", True):
@@ -260,12 +273,12 @@ def login(payload: LoginRequest) -> Tuple[str, Dict[str, object]]:
     return "Login successful", payload
 
 
-def change_password(request: ChangePasswordRequest, current_user: Dict[str, object]) -> None:
+async def change_password(request: ChangePasswordRequest, current_user: Dict[str, object]) -> None:
     user_obj = current_user["user_obj"]
-    if not verify_password(request.old_password, user_obj["password"]):
+    if not await verify_password_off_loop(request.old_password, user_obj["password"]):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Current password is incorrect")
 
-    hashed = get_password_hash(request.new_password)
+    hashed = await get_password_hash_async(request.new_password)
     if current_user["role"] == "admin":
         admin_id = user_obj.get("admin_id") or user_obj.get("admin_aid") or user_obj.get("id")
         auth_repository.update_admin_password(admin_id, hashed)
@@ -321,7 +334,7 @@ def forgot_password(request: ForgotPasswordRequest) -> Tuple[str, Dict[str, obje
     return response_message, {}
 
 
-def reset_password(request: ResetPasswordRequest) -> None:
+async def reset_password(request: ResetPasswordRequest) -> None:
     email = request.email.lower().strip()
     reset_token = request.reset_token
     new_password = request.new_password
@@ -339,7 +352,7 @@ def reset_password(request: ResetPasswordRequest) -> None:
     if not any((legacy_admin, registration_admin, member)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    hashed = get_password_hash(new_password)
+    hashed = await get_password_hash_async(new_password)
     now = datetime.utcnow()
 
     if legacy_admin:
@@ -0,0 +1,137 @@
+"""Shared cache of lecture chat answers so repeated questions skip the LLM and TTS."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter
+
+from app.config import get_settings
+from app.services.lecture_retrieval_service import lecture_version, question_signature
+from app.utils.redis_client import create_redis_client, redis_available
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_LOOKUPS = Counter(
+    "lecture_answer_cache_lookups_total",
+    "Lecture chat answer cache lookups",
+    ["result"],
+)
+
+
+def answer_cache_key(lecture_id: str, record: Dict[str, Any], question: str, answer_type: Optional[str]) -> str:
+    """Key on lecture version, normalized question and answer type."""
+    settings = get_settings()
+    if settings.lecture_answer_cache_match_similar:
+        normalized = question_signature(question)
+    else:
+        normalized = " ".join((question or "").lower().split()).rstrip("?.! ")
+    digest = hashlib.sha256(
+        "\x1f".join((lecture_version(record), answer_type or "text", normalized)).encode("utf-8")
+    ).hexdigest()
+    return f"{lecture_id}:{digest[:40]}"
+
+
+class AnswerCache(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def put(self, key: str, answer: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class MemoryAnswerCache(AnswerCache):
+    """Per-process TTL + LRU cache."""
+
+    def __init__(self, *, ttl_seconds: int, max_entries: int) -> None:
+        # Stored encoded, like the Redis backend, so callers never share a mutable answer.
+        self._entries: TTLCache[str, str] = TTLCache(ttl_seconds=max(1, ttl_seconds), max_entries=max_entries)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        encoded = self._entries.get(key)
+        return json.loads(encoded) if encoded is not None else None
+
+    async def put(self, key: str, answer: Dict[str, Any]) -> None:
+        self._entries.set(key, json.dumps(answer, default=str))
+
+
+class RedisAnswerCache(AnswerCache):
+    """
+    Cache shared by every worker through Redis.
+
+    Entries expire after the TTL; overall size is bounded by the Redis
+    ``maxmemory`` eviction policy rather than an entry count.
+    """
+
+    def __init__(self, redis_client, *, ttl_seconds: int, prefix: str = "lecture-answer") -> None:
+        self.redis = redis_client
+        self.ttl_seconds = max(1, ttl_seconds)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.redis.get(f"{self.prefix}:{key}")
+        except Exception as exc:
+            logger.warning("Answer cache read failed: %s", exc)
+            return None
+        if not raw:
+            return None
+        return json.loads(raw)
+
+    async def put(self, key: str, answer: Dict[str, Any]) -> None:
+        try:
+            await self.redis.set(
+                f"{self.prefix}:{key}",
+                json.dumps(answer, default=str),
+                ex=self.ttl_seconds,
+            )
+        except Exception as exc:
+            logger.warning("Answer cache write failed: %s", exc)
+
+
+def build_answer_cache() -> Optional[AnswerCache]:
+    settings = get_settings()
+    if not settings.lecture_answer_cache_enabled:
+        return None
+    if (settings.lecture_answer_cache_backend or "memory").lower() == "redis":
+        if not redis_available():
+            logger.warning(
+                "Answer cache configured for Redis backend, but redis package is not installed. "
+                "Caching answers per process."
+            )
+        else:
+            try:
+                return RedisAnswerCache(
+                    create_redis_client(),
+                    ttl_seconds=settings.lecture_answer_cache_ttl_seconds,
+                )
+            except Exception as exc:
+                logger.exception("Failed to initialize Redis answer cache: %s", exc)
+    return MemoryAnswerCache(
+        ttl_seconds=settings.lecture_answer_cache_ttl_seconds,
+        max_entries=settings.lecture_answer_cache_max_entries,
+    )
+
+
+@lru_cache
+def get_answer_cache() -> Optional[AnswerCache]:
+    """Process-wide answer cache, or ``None`` when disabled."""
+    return build_answer_cache()
+
+
+__all__ = [
+    "ANSWER_CACHE_LOOKUPS",
+    "AnswerCache",
+    "MemoryAnswerCache",
+    "RedisAnswerCache",
+    "answer_cache_key",
+    "build_answer_cache",
+    "get_answer_cache",
+]
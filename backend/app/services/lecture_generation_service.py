@@ -6,9 +6,57 @@ Handles all lecture content generation, math detection, and prompting
 import asyncio
 import json
 import re
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from groq import Groq
 
+from app.utils.ttl_cache import TTLCache
+
+
+# ============================================================================
+# LANGUAGE REWRITE CACHE
+# ============================================================================
+
+# Shared by every GroqService instance so rewrites survive the per-request
+# service objects created by the routes and LectureService.
+_REWRITE_CACHE_MAX_ENTRIES = 2048
+_REWRITE_BATCH_MAX_ITEMS = 12
+_REWRITE_BATCH_MAX_CHARS = 6000
+_REWRITE_MAX_CONCURRENCY = 4
+
+_rewrite_cache: "TTLCache[Tuple[str, str], str]" = TTLCache(
+    ttl_seconds=None,
+    max_entries=_REWRITE_CACHE_MAX_ENTRIES,
+)
+
+
+def _rewrite_cache_get(text: str, language: str) -> Optional[str]:
+    return _rewrite_cache.get((text, language))
+
+
+def _rewrite_cache_put(text: str, language: str, rewritten: str) -> None:
+    _rewrite_cache.set((text, language), rewritten)
+
+
+def _batch_rewrite_items(texts: List[str]) -> List[List[str]]:
+    """Group texts into batches bounded by item count and total characters."""
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_chars = 0
+    for text in texts:
+        if current and (
+            len(current) >= _REWRITE_BATCH_MAX_ITEMS
+            or current_chars + len(text) > _REWRITE_BATCH_MAX_CHARS
+        ):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append(text)
+        current_chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
 
 # ============================================================================
 # MATH UTILITIES
@@ -394,12 +442,16 @@ Return ONLY valid JSON, NO markdown fences.
 # GROQ SERVICE - MAIN GENERATION ENGINE
 # ============================================================================
 
+# Canned replies returned instead of a model answer; callers must not cache them.
+ANSWER_UNAVAILABLE_MESSAGE = "Please review the lecture materials."
+ANSWER_ERROR_MESSAGE = "I'm having trouble processing your question."
+ANSWER_FALLBACK_MESSAGES = frozenset({ANSWER_UNAVAILABLE_MESSAGE, ANSWER_ERROR_MESSAGE})
+
 class GroqService:
     """Service wrapper around the Groq chat completion API."""
     
     def __init__(self, api_key: str) -> None:
         self._client: Optional[Groq] = Groq(api_key=api_key) if api_key else None
-        self._rewrite_cache: Dict[Tuple[str, str], str] = {}
     
     @property
     def configured(self) -> bool:
@@ -885,13 +937,19 @@ class GroqService:
         question_language_hint: str | None = None,
         answer_type: str | None = None,
         is_edit_command: bool = False,
+        context_limit: Optional[int] = 1000,
     ) -> str | Dict[str, str] | Dict[str, Any]:
-        """Answer questions or handle edit commands."""
+        """Answer questions or handle edit commands.
+
+        ``context_limit`` truncates raw lecture context; pass ``None`` when the
+        caller already scoped the context to the question.
+        """
         if not self.configured:
-            return "Please review the lecture materials."
+            return ANSWER_UNAVAILABLE_MESSAGE
         
         system_prompt = f"You are a teaching assistant. Answer in {language}. Be brief and clear."
-        user_prompt = f"Context: {context[:1000]}\n\nQuestion: {question}\n\nAnswer:"
+        scoped = context if context_limit is None else context[:context_limit]
+        user_prompt = f"Context: {scoped}\n\nQuestion: {question}\n\nAnswer:"
         
         try:
             completion = await asyncio.to_thread(
@@ -907,8 +965,75 @@ class GroqService:
             
             return completion.choices[0].message.content
         except Exception:
-            return "I'm having trouble processing your question."
-    
+            return ANSWER_ERROR_MESSAGE
+
+    async def stream_answer(
+        self,
+        *,
+        question: str,
+        context: str,
+        language: str = "English",
+        context_limit: Optional[int] = 1000,
+    ) -> AsyncIterator[str]:
+        """Yield answer text fragments as the model produces them.
+
+        Uses the same prompt as :meth:`answer_question`; the blocking Groq
+        stream is drained on a worker thread and handed back through a queue.
+        """
+        if not self.configured:
+            yield ANSWER_UNAVAILABLE_MESSAGE
+            return
+
+        system_prompt = f"You are a teaching assistant. Answer in {language}. Be brief and clear."
+        scoped = context if context_limit is None else context[:context_limit]
+        user_prompt = f"Context: {scoped}\n\nQuestion: {question}\n\nAnswer:"
+
+        loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def _drain() -> None:
+            try:
+                stream = self._client.chat.completions.create(
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    model="llama-3.3-70b-versatile",
+                    temperature=0.3,
+                    max_tokens=5000,
+                    stream=True,
+                )
+                for chunk in stream:
+                    if cancelled.is_set():
+                        break
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        loop.call_soon_threadsafe(queue.put_nowait, ("delta", delta))
+                loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+            except Exception as exc:
+                loop.call_soon_threadsafe(queue.put_nowait, ("error", exc))
+
+        worker = loop.run_in_executor(None, _drain)
+        produced = False
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "delta":
+                    produced = True
+                    yield value
+                elif kind == "error":
+                    if produced:
+                        # Part of the answer is already out; surface the cut instead of a fallback.
+                        raise RuntimeError("Answer stream was interrupted") from value
+                    yield ANSWER_ERROR_MESSAGE
+                    break
+                else:
+                    break
+        finally:
+            cancelled.set()
+            await asyncio.shield(worker)
+
     async def _handle_edit_command(self, question: str, context: str) -> Dict[str, Any]:
         """Handle edit commands for slide content."""
         system_prompt = (
@@ -993,7 +1118,7 @@ class GroqService:
             
             return content
         except Exception:
-            return "I'm having trouble processing your question."
+            return ANSWER_ERROR_MESSAGE
     
     async def _create_chat_completion(
         self,
@@ -1316,24 +1441,25 @@ class GroqService:
         if not slides or not language:
             return
         
+        # Collect every non-compliant field first so they can be rewritten in
+        # a handful of batched calls instead of one round trip per field.
+        targets: List[Tuple[Any, Any, str]] = []
         for slide in slides:
             for field in ("title", "narration", "question"):
                 value = slide.get(field)
                 if isinstance(value, str) and value.strip():
                     if not self._is_language_compliant(value, language):
-                        slide[field] = await self._rewrite_text_language(value, language)
+                        targets.append((slide, field, value))
             
             bullets = slide.get("bullets")
             if isinstance(bullets, list) and bullets:
-                rewritten_bullets: List[str] = []
-                for bullet in bullets:
-                    if not isinstance(bullet, str) or not bullet.strip():
-                        continue
-                    if self._is_language_compliant(bullet, language):
-                        rewritten_bullets.append(bullet)
-                    else:
-                        rewritten_bullets.append(await self._rewrite_text_language(bullet, language))
-                slide["bullets"] = rewritten_bullets
+                kept_bullets = [
+                    bullet for bullet in bullets if isinstance(bullet, str) and bullet.strip()
+                ]
+                slide["bullets"] = kept_bullets
+                for index, bullet in enumerate(kept_bullets):
+                    if not self._is_language_compliant(bullet, language):
+                        targets.append((kept_bullets, index, bullet))
             
             subnarrations = slide.get("subnarrations") or []
             if isinstance(subnarrations, list):
@@ -1342,7 +1468,120 @@ class GroqService:
                         continue
                     summary = sub.get("summary")
                     if isinstance(summary, str) and summary.strip() and not self._is_language_compliant(summary, language):
-                        sub["summary"] = await self._rewrite_text_language(summary, language)
+                        targets.append((sub, "summary", summary))
+        
+        if not targets:
+            return
+        
+        rewrites = await self._rewrite_texts_language(
+            [value for _, _, value in targets],
+            language,
+        )
+        for container, key, value in targets:
+            container[key] = rewrites.get(value.strip(), value)
+
+    async def _rewrite_texts_language(self, texts: List[str], language: str) -> Dict[str, str]:
+        """Rewrite many texts at once, returning a mapping keyed by stripped source text."""
+        results: Dict[str, str] = {}
+        pending: List[str] = []
+        for text in texts:
+            normalized = text.strip()
+            if not normalized or normalized in results or normalized in pending:
+                continue
+            cached = _rewrite_cache_get(normalized, language)
+            if cached is not None:
+                results[normalized] = cached
+            else:
+                pending.append(normalized)
+        
+        if not pending or not self._client:
+            return results
+        
+        semaphore = asyncio.Semaphore(_REWRITE_MAX_CONCURRENCY)
+        
+        async def _run(batch: List[str]) -> Dict[str, str]:
+            async with semaphore:
+                return await self._rewrite_batch_language(batch, language)
+        
+        batch_results = await asyncio.gather(
+            *(_run(batch) for batch in _batch_rewrite_items(pending))
+        )
+        for batch_result in batch_results:
+            results.update(batch_result)
+        
+        # Anything the batched call dropped or mangled falls back to single rewrites,
+        # still issued concurrently.
+        missing = [text for text in pending if text not in results]
+        if missing:
+            async def _run_single(text: str) -> Tuple[str, str]:
+                async with semaphore:
+                    return text, await self._rewrite_text_language(text, language)
+            
+            for text, rewritten in await asyncio.gather(*(_run_single(text) for text in missing)):
+                results[text] = rewritten
+        
+        return results
+
+    async def _rewrite_batch_language(self, texts: List[str], language: str) -> Dict[str, str]:
+        """Rewrite a batch of texts with one structured LLM call."""
+        if not texts or not self._client:
+            return {}
+        
+        system_prompt = (
+            f"You are a precise translator who writes perfectly in {language}. "
+            "Output ONLY valid JSON."
+        )
+        payload = json.dumps(
+            {"items": [{"id": index, "text": text} for index, text in enumerate(texts)]},
+            ensure_ascii=False,
+        )
+        user_prompt = (
+            f"Convert the `text` of every item below into {language}. "
+            f"Preserve meaning, formatting, and approximate length. "
+            f'Return JSON of the form {{"items": [{{"id": <same id>, "text": "<converted text>"}}]}} '
+            f"with one entry per input item and no explanations.\n\n"
+            f"ITEMS:\n{payload}"
+        )
+        total_chars = sum(len(text) for text in texts)
+        
+        try:
+            completion = await asyncio.to_thread(
+                self._client.chat.completions.create,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                model="llama-3.1-8b-instant",
+                temperature=0.0,
+                max_tokens=min(8192, max(600, total_chars * 2)),
+                response_format={"type": "json_object"},
+            )
+            response = completion.choices[0].message.content.strip()
+            response = re.sub(r"^```(?:json)?\s*|\s*```$", "", response, flags=re.DOTALL).strip()
+            data = json.loads(response)
+        except Exception as exc:
+            print(f"⚠️ Batched language rewrite failed: {exc}")
+            return {}
+        
+        items = data.get("items") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return {}
+        
+        rewritten: Dict[str, str] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                index = int(item.get("id"))
+            except (TypeError, ValueError):
+                continue
+            text = item.get("text")
+            if not 0 <= index < len(texts) or not isinstance(text, str) or not text.strip():
+                continue
+            source = texts[index]
+            rewritten[source] = text.strip()
+            _rewrite_cache_put(source, language, text.strip())
+        return rewritten
 
     def _is_language_compliant(self, text: str, language: str) -> bool:
         """Heuristic check to detect unwanted script mixing."""
@@ -1376,9 +1615,9 @@ class GroqService:
         if not normalized or not self._client:
             return text
         
-        cache_key = (normalized, language)
-        if cache_key in self._rewrite_cache:
-            return self._rewrite_cache[cache_key]
+        cached = _rewrite_cache_get(normalized, language)
+        if cached is not None:
+            return cached
         
         system_prompt = f"You are a precise translator who writes perfectly in {language}."
         user_prompt = (
@@ -1401,7 +1640,7 @@ class GroqService:
             )
             rewritten = completion.choices[0].message.content.strip()
             if rewritten:
-                self._rewrite_cache[cache_key] = rewritten
+                _rewrite_cache_put(normalized, language, rewritten)
                 return rewritten
         except Exception as exc:
             print(f"⚠️ Language rewrite failed: {exc}")
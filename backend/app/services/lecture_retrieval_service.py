@@ -0,0 +1,295 @@
+"""Local BM25 retrieval over lecture slides so Q&A prompts carry only relevant passages."""
+from __future__ import annotations
+
+import logging
+import math
+import re
+from collections import Counter as TermCounter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from app.config import get_settings
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+LECTURE_QA_CONTEXT_TOKENS = Histogram(
+    "lecture_qa_context_tokens",
+    "Estimated prompt context tokens sent per lecture question",
+    buckets=(50, 100, 200, 400, 800, 1600, 3200, 6400),
+)
+LECTURE_QA_TOKENS_SAVED = Counter(
+    "lecture_qa_context_tokens_saved_total",
+    "Estimated context tokens avoided compared with the fixed lecture prefix sent before retrieval",
+)
+
+# Latin word characters plus the Indic blocks (Devanagari .. Sinhala) minus the dandas,
+# so vowel signs stay attached to their letters in Hindi/Gujarati text.
+_TOKEN_PATTERN = re.compile(r"[\w\u0900-\u0963\u0966-\u0DFF]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in is it of on or that the this "
+    "to was what when where which who why will with you your".split()
+)
+# Stop words for retrieval, but they decide what kind of answer a question wants.
+_INTERROGATIVES = frozenset("how what when where which who whom whose why".split())
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_PASSAGE_MAX_WORDS = 80
+_CHARS_PER_TOKEN = 4
+# Questions used to carry the first 1,000 characters of the lecture; savings are measured against that.
+_BASELINE_CONTEXT_CHARS = 1000
+# The slide outline may use this share of the context budget; the rest is for passages.
+_OUTLINE_SHARE = 0.25
+_OUTLINE_TITLE_CHARS = 32
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-token estimate; good enough to compare context sizes."""
+    return (len(text or "") + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def _tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_PATTERN.findall((text or "").lower()) if token not in _STOPWORDS]
+
+
+def question_signature(question: str) -> str:
+    """
+    Order-insensitive form of a question built from its indexed terms and
+    interrogatives.
+
+    "What is photosynthesis?" and "photosynthesis, what is it" share a
+    signature, while "Why photosynthesis?" does not; questions made only of
+    stop words fall back to their whitespace/case-normalized text.
+    """
+    tokens = _TOKEN_PATTERN.findall((question or "").lower())
+    content = {token for token in tokens if token not in _STOPWORDS}
+    if content:
+        return " ".join(sorted(content | _INTERROGATIVES.intersection(tokens)))
+    return " ".join((question or "").lower().split())
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    clipped = text[: max_chars - 1]
+    if " " in clipped:
+        clipped = clipped.rsplit(" ", 1)[0]
+    return clipped.rstrip(" ,;:-") + "…"
+
+
+def _split_words(text: str, max_words: int) -> List[str]:
+    words = text.split()
+    return [" ".join(words[start:start + max_words]) for start in range(0, len(words), max_words)]
+
+
+@dataclass(frozen=True)
+class Passage:
+    slide_number: int
+    title: str
+    text: str
+
+
+def _slide_passages(slides: Sequence[Dict[str, Any]]) -> List[Passage]:
+    passages: List[Passage] = []
+    for position, slide in enumerate(slides, start=1):
+        if not isinstance(slide, dict):
+            continue
+        try:
+            number = int(slide.get("number") or position)
+        except (TypeError, ValueError):
+            number = position
+        title = str(slide.get("title") or "").strip()
+
+        bullets = [str(bullet).strip() for bullet in slide.get("bullets") or [] if str(bullet).strip()]
+        if bullets:
+            passages.append(Passage(number, title, "; ".join(bullets)))
+
+        narration = str(slide.get("narration") or "").strip()
+        for paragraph in _PARAGRAPH_BREAK.split(narration):
+            for chunk in _split_words(paragraph, _PASSAGE_MAX_WORDS):
+                passages.append(Passage(number, title, chunk))
+
+        for sub in slide.get("subnarrations") or []:
+            if isinstance(sub, dict):
+                summary = str(sub.get("summary") or sub.get("narration") or "").strip()
+                if summary:
+                    passages.append(Passage(number, str(sub.get("title") or title).strip(), summary))
+    return passages
+
+
+class LectureIndex:
+    """Okapi BM25 index over the passages of one lecture version."""
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, slides: Sequence[Dict[str, Any]]) -> None:
+        self.passages = _slide_passages(slides)
+        self.titles: List[Tuple[int, str]] = []
+        seen = set()
+        for passage in self.passages:
+            if passage.slide_number not in seen and passage.title:
+                seen.add(passage.slide_number)
+                self.titles.append((passage.slide_number, passage.title))
+
+        self._term_freqs: List[TermCounter] = []
+        self._lengths: List[int] = []
+        document_freq: TermCounter = TermCounter()
+        for passage in self.passages:
+            terms = TermCounter(_tokenize(f"{passage.title} {passage.text}"))
+            self._term_freqs.append(terms)
+            self._lengths.append(sum(terms.values()))
+            document_freq.update(terms.keys())
+
+        count = len(self.passages)
+        self._avg_length = (sum(self._lengths) / count) if count else 0.0
+        self._idf = {
+            term: math.log(1 + (count - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_freq.items()
+        }
+
+    def search(self, query: str, *, top_k: int) -> List[Passage]:
+        terms = set(_tokenize(query))
+        if not terms or not self.passages:
+            return []
+        scored: List[Tuple[float, int]] = []
+        for position, freqs in enumerate(self._term_freqs):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[position] / (self._avg_length or 1.0))
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, position))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self.passages[position] for _, position in scored[:top_k]]
+
+    def outline(self, max_chars: int) -> str:
+        """
+        Slide titles as ``Slides: 1. Cells; 2. Osmosis``, within ``max_chars``.
+
+        When the full list does not fit, titles are shortened and the slides that
+        still do not fit are summarised as ``+N more``; returns "" if nothing fits.
+        """
+        prefix = "Slides: "
+        full = prefix + "; ".join(f"{number}. {title}" for number, title in self.titles)
+        if len(full) <= max_chars:
+            return full if self.titles else ""
+        reserve = len(f"; +{len(self.titles)} more")
+        entries: List[str] = []
+        used = len(prefix)
+        for position, (number, title) in enumerate(self.titles):
+            entry = f"{number}. {_shorten(title, _OUTLINE_TITLE_CHARS)}"
+            separator = 2 if entries else 0
+            is_last = position == len(self.titles) - 1
+            if used + separator + len(entry) > (max_chars if is_last else max_chars - reserve):
+                break
+            entries.append(entry)
+            used += separator + len(entry)
+        if not entries:
+            return ""
+        hidden = len(self.titles) - len(entries)
+        return prefix + "; ".join(entries) + (f"; +{hidden} more" if hidden else "")
+
+    def build_context(self, query: str, *, top_k: int, max_chars: int) -> str:
+        """
+        The best passages in lecture order, preceded by an outline of slide titles.
+
+        The top-ranked passage is always kept whole, even if it alone exceeds
+        ``max_chars``. The outline gets at most a quarter of the budget, and
+        further passages are added by rank while they fit.
+        """
+        hits = self.search(query, top_k=top_k)
+        if not hits:
+            # Nothing matched (greetings, off-topic); fall back to the lecture opening.
+            hits = self.passages[:top_k]
+        if not hits:
+            return self.outline(max_chars)
+
+        def _section(passage: Passage) -> str:
+            return f"[Slide {passage.slide_number}: {passage.title}] {passage.text}"
+
+        chosen = [hits[0]]
+        used = len(_section(hits[0]))
+        outline = self.outline(min(int(max_chars * _OUTLINE_SHARE), max_chars - used - 2))
+        if outline:
+            used += len(outline) + 2
+        for passage in hits[1:]:
+            size = len(_section(passage)) + 2
+            if used + size <= max_chars:
+                chosen.append(passage)
+                used += size
+        chosen.sort(key=lambda passage: passage.slide_number)
+        sections = [outline] if outline else []
+        sections.extend(_section(passage) for passage in chosen)
+        return "\n\n".join(sections)
+
+
+def lecture_version(record: Dict[str, Any]) -> str:
+    """Identifier that changes whenever the lecture content is rewritten."""
+    return str(record.get("updated_at") or record.get("created_at") or len(record.get("context") or ""))
+
+
+@lru_cache
+def _index_cache() -> "TTLCache[str, Tuple[str, LectureIndex]]":
+    # Entries carry the lecture version they were built from, so they never need to expire.
+    return TTLCache(ttl_seconds=None, max_entries=get_settings().lecture_qa_index_cache_size)
+
+
+def get_lecture_index(lecture_id: str, record: Dict[str, Any]) -> LectureIndex:
+    """Return the cached index for this lecture version, building it on first use."""
+    version = lecture_version(record)
+    key = str(lecture_id)
+    cached = _index_cache().get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    index = LectureIndex(record.get("slides") or [])
+    _index_cache().set(key, (version, index))
+    return index
+
+
+def build_question_context(lecture_id: str, record: Dict[str, Any], question: str) -> Tuple[str, Dict[str, int]]:
+    """Return the prompt context for ``question`` and a report of the tokens it saved."""
+    settings = get_settings()
+    full_context = record.get("context") or ""
+    baseline_tokens = estimate_tokens(full_context[:_BASELINE_CONTEXT_CHARS])
+    if not settings.lecture_qa_retrieval_enabled or not record.get("slides"):
+        context = full_context[: settings.lecture_qa_context_max_chars]
+    else:
+        context = get_lecture_index(lecture_id, record).build_context(
+            question,
+            top_k=settings.lecture_qa_top_k,
+            max_chars=settings.lecture_qa_context_max_chars,
+        )
+    context_tokens = estimate_tokens(context)
+    saved = max(0, baseline_tokens - context_tokens)
+    LECTURE_QA_CONTEXT_TOKENS.observe(context_tokens)
+    LECTURE_QA_TOKENS_SAVED.inc(saved)
+    return context, {
+        "baseline_context_tokens": baseline_tokens,
+        "context_tokens": context_tokens,
+        "tokens_saved": saved,
+    }
+
+
+def drop_lecture_index(lecture_id: Optional[str] = None) -> None:
+    """Forget the index of a deleted lecture, or every index when no id is given."""
+    if lecture_id is None:
+        _index_cache().clear()
+    else:
+        _index_cache().pop(str(lecture_id))
+
+
+__all__ = [
+    "LectureIndex",
+    "Passage",
+    "build_question_context",
+    "drop_lecture_index",
+    "estimate_tokens",
+    "get_lecture_index",
+    "lecture_version",
+    "question_signature",
+]
@@ -1,19 +1,23 @@
 """High-level service that orchestrates lecture generation and storage."""
 from __future__ import annotations
 
+import asyncio
 import logging
-import shutil
+import re
+import threading
+import time
 from copy import deepcopy
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence
-from uuid import uuid4
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 import httpx
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
 from app.repository.lecture_repository import LectureRepository
-from app.services.lecture_generation_service import GroqService
+from app.services.lecture_answer_cache import ANSWER_CACHE_LOOKUPS, answer_cache_key, get_answer_cache
+from app.services.lecture_generation_service import ANSWER_FALLBACK_MESSAGES, GroqService
+from app.services.lecture_retrieval_service import build_question_context, drop_lecture_index, get_lecture_index
 from app.services.tts_service import GoogleTTSService
 from app.utils.s3_file_handler import get_s3_service
 
@@ -25,6 +29,23 @@ logger = logging.getLogger(__name__)
 STATIC_IMAGE_SLIDE_NUMBERS = (1, 2, 3, 7, 8)
 STATIC_VIDEO_SLIDE_NUMBERS = (4, 5, 6)
 
+PAUSE_PROMPT_TEMPLATES = {
+    "hindi": "कृपया आगे बढ़ने के लिए तैयार हों। क्या आप अगले भाग के लिए तैयार हैं?",
+    "gujarati": "મહેરબાની કરીને આગળનો ભાગ શરૂ કરવા તૈયાર રહો. શું તમે તૈયાર છો?",
+    "english": "Please get ready to continue. Let me know when you want to resume.",
+}
+PAUSE_PROMPT_LANGUAGES = ("English", "Hindi", "Gujarati")
+CHAT_AUDIO_S3_FOLDER = "audio/chat/shared"
+TTS_SLIDE_FIELDS = frozenset({"title", "bullets", "narration", "question"})
+_ORPHAN_TEMP_AUDIO_MAX_AGE_SECONDS = 600
+# Sentence ends (Latin and Devanagari danda) after which streamed text is voiced.
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?\u0964])\s+")
+# Very short fragments ("Yes.") are merged into the next sentence to avoid tiny clips.
+_MIN_SPOKEN_SENTENCE_CHARS = 24
+
+# Strong references for fire-and-forget maintenance tasks.
+_background_tasks: set = set()
+
 
 class LectureService:
     """Provide a cohesive API for lecture CRUD and AI interactions."""
@@ -32,7 +53,7 @@ class LectureService:
     def __init__(
         self,
         *,
-        db: Session,
+        db: Optional[Session] = None,
         groq_api_key: Optional[str] = None,
 
     ) -> None:
@@ -52,7 +73,9 @@ class LectureService:
         self._tts_service = GoogleTTSService(
             storage_root=storage_root,
             credentials_path=getattr(settings, "gcp_tts_credentials_path", None),
+            chunk_concurrency=settings.tts_chunk_concurrency,
         )
+        self._slide_audio_concurrency = max(1, settings.tts_slide_concurrency)
        
         self._s3_service = get_s3_service(settings)
         self._public_base_url = (
@@ -120,7 +143,11 @@ class LectureService:
             reuse_existing=reuse_existing,
         )
 
-        return await self._attach_slide_audio(record)
+        record = await self._attach_slide_audio(record)
+        if record.get("lecture_id"):
+            # Build the Q&A index now so the first student question does not pay for it.
+            get_lecture_index(str(record["lecture_id"]), record)
+        return record
 
     async def answer_question(
         self,
@@ -134,16 +161,141 @@ class LectureService:
     ) -> Any:
 
         record = lecture_record or await self._repository.get_lecture(lecture_id)
-        context = context_override or record.get("context", "")
         language = record.get("language", "English")
 
-        return await self._generator.answer_question(
+        if context_override or is_edit_command:
+            return await self._generator.answer_question(
+                question=question,
+                context=context_override or record.get("context", ""),
+                language=language,
+                answer_type=answer_type,
+                is_edit_command=is_edit_command,
+            )
+
+        cache = get_answer_cache()
+        cache_key = answer_cache_key(lecture_id, record, question, answer_type)
+        if cache is not None:
+            cached = await cache.get(cache_key)
+            ANSWER_CACHE_LOOKUPS.labels(result="hit" if cached else "miss").inc()
+            if cached:
+                return {**cached, "cached": True}
+
+        context, retrieval = build_question_context(lecture_id, record, question)
+        answer = await self._generator.answer_question(
             question=question,
             context=context,
             language=language,
             answer_type=answer_type,
-            is_edit_command=is_edit_command,
+            context_limit=None,
         )
+        payload = dict(answer) if isinstance(answer, dict) else {"answer": answer}
+        payload["retrieval"] = retrieval
+        if cache is not None and _is_cacheable_answer(payload):
+            await cache.put(cache_key, payload)
+        return payload
+
+    async def stream_chat_answer(
+        self,
+        *,
+        lecture_id: str,
+        question: str,
+        on_delta: Callable[[str], Awaitable[None]],
+        on_audio: Callable[[int, str, str], Awaitable[None]],
+        lecture_record: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Stream an answer while voicing it sentence by sentence.
+
+        ``on_delta`` receives each text fragment as the model produces it. Every
+        completed sentence is sent to TTS right away (bounded by the slide audio
+        concurrency) and ``on_audio(index, sentence, url)`` fires in sentence
+        order as clips become available.
+        """
+        record = lecture_record or await self._repository.get_lecture(lecture_id)
+        language = record.get("language") or "English"
+
+        cache = get_answer_cache()
+        # Separate from plain text answers: these entries also carry the sentence audio.
+        cache_key = answer_cache_key(lecture_id, record, question, "spoken")
+        if cache is not None:
+            cached = await cache.get(cache_key)
+            ANSWER_CACHE_LOOKUPS.labels(result="hit" if cached else "miss").inc()
+            if cached:
+                await on_delta(cached.get("answer") or "")
+                for segment in cached.get("audio_segments") or []:
+                    await on_audio(segment["index"], segment["text"], segment["audio_url"])
+                return {**cached, "cached": True}
+
+        context, retrieval = build_question_context(lecture_id, record, question)
+
+        semaphore = asyncio.Semaphore(self._slide_audio_concurrency)
+        pending: "asyncio.Queue[Optional[Tuple[int, str, asyncio.Task]]]" = asyncio.Queue()
+        segments: List[Dict[str, Any]] = []
+        sentence_count = 0
+
+        async def _synthesize(sentence: str) -> Optional[str]:
+            async with semaphore:
+                return await self.synthesize_chat_answer_audio(
+                    lecture_id=lecture_id,
+                    text=sentence,
+                    language=language,
+                )
+
+        def _voice(sentence: str) -> None:
+            nonlocal sentence_count
+            task = asyncio.create_task(_synthesize(sentence))
+            pending.put_nowait((sentence_count, sentence, task))
+            sentence_count += 1
+
+        async def _publish_audio() -> None:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                index, sentence, task = item
+                audio_url = await task
+                if not audio_url:
+                    continue
+                segments.append({"index": index, "text": sentence, "audio_url": audio_url})
+                await on_audio(index, sentence, audio_url)
+
+        publisher = asyncio.create_task(_publish_audio())
+        parts: List[str] = []
+        buffer = ""
+        try:
+            async for delta in self._generator.stream_answer(
+                question=question,
+                context=context,
+                language=language,
+                context_limit=None,
+            ):
+                parts.append(delta)
+                await on_delta(delta)
+                buffer += delta
+                sentences, buffer = _split_complete_sentences(buffer)
+                for sentence in sentences:
+                    _voice(sentence)
+            if buffer.strip():
+                _voice(buffer.strip())
+            pending.put_nowait(None)
+            await publisher
+        finally:
+            if not publisher.done():
+                publisher.cancel()
+                while not pending.empty():
+                    item = pending.get_nowait()
+                    if item is not None:
+                        item[2].cancel()
+
+        result = {
+            "answer": "".join(parts).strip(),
+            "language": language,
+            "audio_segments": segments,
+            "retrieval": retrieval,
+        }
+        # Only fully voiced answers are cached so a TTS hiccup is not replayed for the whole TTL.
+        if cache is not None and len(segments) == sentence_count and _is_cacheable_answer(result):
+            await cache.put(cache_key, result)
+        return result
 
     async def get_lecture(self, lecture_id: str) -> Dict[str, Any]:
         record = await self._repository.get_lecture(lecture_id)
@@ -169,7 +321,10 @@ class LectureService:
         )
 
     async def delete_lecture(self, lecture_id: str) -> bool:
-        return await self._repository.delete_lecture(lecture_id)
+        deleted = await self._repository.delete_lecture(lecture_id)
+        if deleted:
+            drop_lecture_index(lecture_id)
+        return deleted
 
     async def get_class_subject_filters(self) -> Dict[str, Any]:
         return await self._repository.get_class_subject_filters()
@@ -186,19 +341,12 @@ class LectureService:
         if not lecture_id or not slides:
             return self._sanitize_audio_metadata(record)
 
-        if force_regeneration:
-            audio_dir = self._audio_storage_root / lecture_id / "audio"
-            try:
-                if audio_dir.exists():
-                    shutil.rmtree(audio_dir)
-                    logger.info("Cleared existing audio directory for lecture %s", lecture_id)
-            except OSError as exc:
-                logger.warning("Failed to clean audio directory for %s: %s", lecture_id, exc)
-
         language = record.get("language", "English")
         voice_model = (record.get("metadata") or {}).get("model")
         updated = False
         metadata_changed = False
+        pending: List[Tuple[int, Dict[str, Any], str, str, str]] = []
+        expected_files: set = set()
 
         for index, slide in enumerate(slides, start=1):
             tts_text = self._compose_slide_tts_text(slide, language=language)
@@ -211,11 +359,31 @@ class LectureService:
                 continue
             filename = f"slide-{slide.get('number') or index}.mp3"
             existing_file = self._audio_storage_root / lecture_id / "audio" / filename
+            expected_files.add(filename)
+
+            # Audio is keyed by a fingerprint of the spoken text and voice, so only
+            # slides whose text actually changed are synthesized again.
+            fingerprint = self._tts_service.cache_key_for(tts_text, language, voice_model)
+            recorded_fingerprint = slide.get("audio_fingerprint")
+            stale = recorded_fingerprint is not None and recorded_fingerprint != fingerprint
+
+            # Remove audio_version - we don't need versioning
+            slide.pop("audio_version", None)
+            if force_regeneration or stale or not existing_file.is_file():
+                pending.append((index, slide, tts_text, filename, fingerprint))
+                continue
+
+            logger.info("Slide audio ready (existing): %s", filename)
+            if self._assign_slide_audio_urls(slide, lecture_id, filename):
+                metadata_changed = True
 
-            must_regenerate_audio = force_regeneration or not existing_file.is_file()
+        # Synthesize missing slides concurrently so generation waits on the
+        # slowest slide rather than the sum of all of them.
+        semaphore = asyncio.Semaphore(self._slide_audio_concurrency)
 
-            if must_regenerate_audio:
-                audio_path = await self._tts_service.synthesize_text(
+        async def _synthesize(tts_text: str, filename: str) -> Optional[Path]:
+            async with semaphore:
+                return await self._tts_service.synthesize_text(
                     lecture_id=lecture_id,
                     text=tts_text,
                     language=language,
@@ -224,47 +392,31 @@ class LectureService:
                     model=voice_model,
                 )
 
-                if not audio_path:
-                    logger.error("Failed to generate audio for slide %d", slide.get('number', index))
-                    continue
-
-                # Remove audio_version - we don't need versioning
-                slide.pop("audio_version", None)
-                logger.info("Slide audio generated: %s", filename)
-                updated = True
-            else:
-                # Remove audio_version for existing files too
-                slide.pop("audio_version", None)
-                logger.info("Slide audio ready (existing): %s", filename)
-
-            # Build URLs WITHOUT version parameter
-            audio_url = self._build_audio_url(lecture_id, filename)
-            audio_download_url = self._build_audio_download_url(lecture_id, filename)
-
-            if slide.get("audio_url") != audio_url or slide.get("audio_download_url") != audio_download_url:
-                metadata_changed = True
-
-            slide["audio_url"] = audio_url
-            slide["audio_download_url"] = audio_download_url
-            if existing_file.is_file():
+        results = await asyncio.gather(
+            *(_synthesize(tts_text, filename) for _, _, tts_text, filename, _ in pending),
+            return_exceptions=True,
+        )
 
-                logger.info("Slide audio ready (existing): %s", slide["audio_url"])
+        failures: List[Dict[str, Any]] = []
+        for (index, slide, _, filename, fingerprint), result in zip(pending, results):
+            slide_number = slide.get("number") or index
+            if isinstance(result, BaseException) or not result:
+                error = str(result) if isinstance(result, BaseException) else "Audio synthesis failed"
+                logger.error("Failed to generate audio for slide %s: %s", slide_number, error)
+                failures.append({"slide_number": slide_number, "filename": filename, "error": error})
                 continue
+            logger.info("Slide audio generated: %s", filename)
+            slide["audio_fingerprint"] = fingerprint
+            self._assign_slide_audio_urls(slide, lecture_id, filename)
+            updated = True
 
-            audio_path = await self._tts_service.synthesize_text(
-                lecture_id=lecture_id,
-                text=tts_text,
-                language=language,
-                filename=filename,
-                subfolder="audio",
-                model=voice_model,
-            )
+        if failures:
+            record["audio_failures"] = failures
+        else:
+            record.pop("audio_failures", None)
 
-            if not audio_path:
-                logger.error("Failed to generate audio for slide %d", slide.get('number', index))
-                continue
-            logger.info("Slide audio generated: %s", slide["audio_url"])
-            updated = True
+        if updated:
+            self._schedule_orphaned_audio_cleanup(lecture_id, expected_files)
 
         if not (updated or metadata_changed):
             return self._sanitize_audio_metadata(record)
@@ -289,6 +441,62 @@ class LectureService:
         
         return self._sanitize_audio_metadata(record)
 
+    async def refresh_slide_audio(
+        self,
+        record: Dict[str, Any],
+        *,
+        previous_slides: Optional[Sequence[Dict[str, Any]]] = None,
+        previous_language: Optional[str] = None,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """Re-synthesize audio only for slides whose spoken text or voice changed.
+
+        ``previous_slides`` describes the audio currently on disk (e.g. the slides
+        before a regeneration or edit); their fingerprints are carried over by slide
+        number so unchanged slides keep their existing MP3.
+        """
+        if previous_slides:
+            voice_model = (record.get("metadata") or {}).get("model")
+            old_language = previous_language or record.get("language", "English")
+            previous_by_number: Dict[Any, Dict[str, Any]] = {}
+            for index, old_slide in enumerate(previous_slides, start=1):
+                if isinstance(old_slide, dict):
+                    previous_by_number[old_slide.get("number") or index] = old_slide
+            for index, slide in enumerate(record.get("slides") or [], start=1):
+                old_slide = previous_by_number.get(slide.get("number") or index)
+                if old_slide is None:
+                    continue
+                old_fingerprint = old_slide.get("audio_fingerprint")
+                if not old_fingerprint:
+                    old_text = self._compose_slide_tts_text(old_slide, language=old_language)
+                    if not old_text.strip():
+                        continue
+                    old_fingerprint = self._tts_service.cache_key_for(old_text, old_language, voice_model)
+                slide["audio_fingerprint"] = old_fingerprint
+        return await self._attach_slide_audio(record, force_regeneration=force)
+
+    def _schedule_orphaned_audio_cleanup(self, lecture_id: str, keep: set) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # pragma: no cover - called outside the event loop
+            return
+        audio_dir = self._audio_storage_root / lecture_id / "audio"
+        task = loop.run_in_executor(None, _collect_orphaned_audio, audio_dir, frozenset(keep))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    def _assign_slide_audio_urls(self, slide: Dict[str, Any], lecture_id: str, filename: str) -> bool:
+        """Set playback/download URLs on a slide, returning True when they changed."""
+        audio_url = self._build_audio_url(lecture_id, filename)
+        audio_download_url = self._build_audio_download_url(lecture_id, filename)
+        changed = (
+            slide.get("audio_url") != audio_url
+            or slide.get("audio_download_url") != audio_download_url
+        )
+        slide["audio_url"] = audio_url
+        slide["audio_download_url"] = audio_download_url
+        return changed
+
     def _build_audio_url(
         self,
         lecture_id: str,
@@ -409,16 +617,27 @@ class LectureService:
         text: str,
         language: Optional[str] = None,
     ) -> Optional[str]:
-        """Generate a short audio clip for an assistant response, upload to S3, and return URL."""
+        """Generate a short audio clip for an assistant response, upload to S3, and return URL.
+
+        Clips are content addressed, so repeated answers and pause prompts reuse the
+        already uploaded object instead of being synthesized and uploaded again.
+        """
         normalized_text = (text or "").strip()
         if not normalized_text:
             return None
-        filename = f"chat-{uuid4().hex}.mp3"
+        language = language or "English"
+        audio_cache = self._tts_service.audio_cache
+        cache_key = self._tts_service.cache_key_for(normalized_text, language)
+        if audio_cache is not None:
+            cached_url = audio_cache.get_remote_url(cache_key)
+            if cached_url:
+                return cached_url
+        filename = f"chat-{cache_key[:32]}.mp3"
         try:
             audio_path = await self._tts_service.synthesize_text(
                 lecture_id=str(lecture_id),
                 text=normalized_text,
-                language=language or "English",
+                language=language,
                 filename=filename,
                 subfolder="chat",
             )
@@ -433,12 +652,11 @@ class LectureService:
         except OSError as exc:
             logger.error("Failed reading synthesized chat audio for %s: %s", lecture_id, exc)
             return None
-        s3_folder = f"audio/chat/{lecture_id}"
         try:
-            upload_result = self._s3_service.upload_file(
+            upload_result = await self._s3_service.upload_file_async(
                 file_content=audio_bytes,
                 file_name=filename,
-                folder=s3_folder,
+                folder=CHAT_AUDIO_S3_FOLDER,
                 content_type="audio/mpeg",
                 public=True,
             )
@@ -450,7 +668,21 @@ class LectureService:
                 audio_path.unlink(missing_ok=True)
             except OSError:
                 pass
-        return upload_result.get("s3_url")
+        audio_url = upload_result.get("s3_url")
+        if audio_url and audio_cache is not None:
+            audio_cache.remember_remote_url(cache_key, audio_url)
+        return audio_url
+
+    async def prewarm_pause_prompts(self) -> None:
+        """Synthesize and upload the pause prompt for every supported language."""
+        for language in PAUSE_PROMPT_LANGUAGES:
+            audio_url = await self.synthesize_chat_answer_audio(
+                lecture_id="pause-prompts",
+                text=self.build_pause_prompt_message(language),
+                language=language,
+            )
+            if not audio_url:
+                logger.warning("Could not pre-warm pause prompt audio for %s", language)
 
     async def save_chat_interaction(
         self,
@@ -461,25 +693,21 @@ class LectureService:
         audio_url: Optional[str],
         language: Optional[str],
         extra_data: Optional[Dict[str, Any]] = None,
+        cache_hit: bool = False,
     ) -> Dict[str, Any]:
-        """Persist chatbot exchange for a lecture."""
+        """Persist chatbot exchange for a lecture; ``cache_hit`` marks answers served from cache."""
         return await self._repository.create_chatbot_entry(
             lecture_id=lecture_id,
             question=question,
             response_text=response_text,
             audio_url=audio_url,
             language=language,
-            extra_data=extra_data,
+            extra_data={**(extra_data or {}), "cache_hit": cache_hit},
         )
     def build_pause_prompt_message(self, language: str = "English") -> str:
         """Return a localized pause/resume prompt shown when the lecture is paused."""
         normalized = (language or "English").strip().lower()
-        templates = {
-            "hindi": "कृपया आगे बढ़ने के लिए तैयार हों। क्या आप अगले भाग के लिए तैयार हैं?",
-            "gujarati": "મહેરબાની કરીને આગળનો ભાગ શરૂ કરવા તૈયાર રહો. શું તમે તૈયાર છો?",
-            "english": "Please get ready to continue. Let me know when you want to resume.",
-        }
-        return templates.get(normalized, templates["english"])
+        return PAUSE_PROMPT_TEMPLATES.get(normalized, PAUSE_PROMPT_TEMPLATES["english"])
 
     def _compose_slide_tts_text(self, slide: Dict[str, Any], *, language: str = "English") -> str:
         """Build a narration string that includes title, bullets, narration, and questions."""
@@ -535,4 +763,63 @@ class LectureService:
             return items[0]
         if len(items) == 2:
             return f"{items[0]} and {items[1]}"
-        return f"{', '.join(items[:-1])}, and {items[-1]}"
\ No newline at end of file
+        return f"{', '.join(items[:-1])}, and {items[-1]}"
+
+
+def _is_cacheable_answer(payload: Dict[str, Any]) -> bool:
+    answer = str(payload.get("answer") or payload.get("display_text") or "").strip()
+    return bool(answer) and answer not in ANSWER_FALLBACK_MESSAGES
+
+
+def _split_complete_sentences(buffer: str) -> Tuple[List[str], str]:
+    """Split finished sentences off ``buffer``; returns them and the unfinished tail."""
+    pieces = _SENTENCE_BOUNDARY.split(buffer)
+    tail = pieces.pop()
+    sentences: List[str] = []
+    carry = ""
+    for piece in pieces:
+        carry = f"{carry} {piece}".strip() if carry else piece.strip()
+        if len(carry) >= _MIN_SPOKEN_SENTENCE_CHARS:
+            sentences.append(carry)
+            carry = ""
+    if carry:
+        tail = f"{carry} {tail}" if tail else f"{carry} "
+    return sentences, tail
+
+
+_shared_service: Optional[LectureService] = None
+_shared_service_lock = threading.Lock()
+
+
+def get_shared_lecture_service() -> LectureService:
+    """Process-wide :class:`LectureService` for long-lived callers such as socket handlers.
+
+    Building a service creates Groq, TTS and S3 clients; lecture data goes
+    through pooled Postgres cursors, so one instance can serve every event.
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = LectureService()
+    return _shared_service
+
+
+def _collect_orphaned_audio(audio_dir: Path, keep: frozenset) -> None:
+    """Delete slide MP3s no longer referenced by the lecture and stale temp files."""
+    if not audio_dir.is_dir():
+        return
+    now = time.time()
+    removed = 0
+    for path in audio_dir.iterdir():
+        try:
+            if path.suffix == ".mp3" and path.name not in keep:
+                path.unlink(missing_ok=True)
+                removed += 1
+            elif path.suffix == ".tmp" and now - path.stat().st_mtime > _ORPHAN_TEMP_AUDIO_MAX_AGE_SECONDS:
+                path.unlink(missing_ok=True)
+                removed += 1
+        except OSError as exc:
+            logger.debug("Failed to remove orphaned audio %s: %s", path, exc)
+    if removed:
+        logger.info("Removed %d orphaned audio files from %s", removed, audio_dir)
@@ -0,0 +1,252 @@
+"""Content-hash deduplication of chapter material uploads."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter
+
+from app.config import get_settings
+from app.repository import material_blob_repository
+from app.repository.chapter_material_repository import (
+    PREPROCESS_FIELDS,
+    attach_material_blob,
+    find_materials_by_content_hash,
+    load_material_page_text,
+    save_extracted_topics_files,
+    save_material_page_text,
+    update_material_preprocessing,
+)
+from app.services.material_preprocess_service import schedule_material_preprocessing
+from app.utils.file_handler import UPLOAD_DIR
+from app.utils.s3_file_handler import get_s3_service
+
+logger = logging.getLogger(__name__)
+
+MATERIAL_DEDUP_UPLOADS = Counter(
+    "material_dedup_uploads_total",
+    "Chapter material uploads by deduplication outcome",
+    ["result"],
+)
+MATERIAL_DEDUP_BYTES_SAVED = Counter(
+    "material_dedup_bytes_saved_total",
+    "Storage bytes not duplicated thanks to content-hash deduplication",
+)
+MATERIAL_DEDUP_ARTIFACTS_REUSED = Counter(
+    "material_dedup_artifacts_reused_total",
+    "Processing artifacts copied from an identical material instead of being recomputed",
+    ["artifact"],
+)
+
+
+async def _acquire_blob(content_hash: str, file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        return await asyncio.to_thread(
+            material_blob_repository.acquire_blob,
+            content_hash=content_hash,
+            s3_key=file_info["s3_key"],
+            file_url=file_info["s3_url"],
+            file_size=int(file_info.get("file_size") or 0),
+        )
+    except Exception as exc:
+        logger.warning("Material dedupe lookup failed for %s: %s", content_hash, exc)
+        return None
+
+
+def _is_duplicate(blob: Dict[str, Any], file_info: Dict[str, Any]) -> bool:
+    return not blob.get("created") and blob["s3_key"] != file_info["s3_key"]
+
+
+async def _discard_duplicate(file_info: Dict[str, Any], blob: Dict[str, Any]) -> None:
+    try:
+        storage = get_s3_service(get_settings())
+        await storage.delete_file_async(file_info["s3_key"])
+    except Exception as exc:  # pragma: no cover - the duplicate object only wastes space
+        logger.warning("Failed to delete duplicate upload %s: %s", file_info["s3_key"], exc)
+    MATERIAL_DEDUP_UPLOADS.labels(result="duplicate").inc()
+    MATERIAL_DEDUP_BYTES_SAVED.inc(int(file_info.get("file_size") or 0))
+    logger.info("Upload %s duplicates stored blob %s", file_info["s3_key"], blob["s3_key"])
+
+
+async def deduplicate_upload(file_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Share storage with an identical, already stored material file.
+
+    Takes a reference on the content-addressed blob for ``file_info["content_hash"]``
+    and records it as ``file_info["blob_hash"]``; only rows carrying that field
+    release the reference again on delete. If the content was stored before, the
+    freshly uploaded object is deleted and ``file_info`` is rewritten to point at
+    the existing one. Uploads without a hash are deduplicated by
+    :func:`deduplicate_stored_material` once preprocessing has hashed them.
+    """
+    content_hash = file_info.get("content_hash")
+    if not content_hash:
+        return file_info
+    blob = await _acquire_blob(content_hash, file_info)
+    if blob is None:
+        return file_info
+
+    file_info = {**file_info, "blob_hash": content_hash}
+    if not _is_duplicate(blob, file_info):
+        MATERIAL_DEDUP_UPLOADS.labels(result="unique").inc()
+        return file_info
+
+    await _discard_duplicate(file_info, blob)
+    return {
+        **file_info,
+        "s3_key": blob["s3_key"],
+        "s3_url": blob["file_url"],
+        "deduplicated": True,
+    }
+
+
+async def deduplicate_stored_material(material: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deduplicate a stored material after preprocessing computed its content hash.
+
+    Covers uploads that arrived without a checksum, such as multipart upload
+    sessions. The row is repointed at the shared blob before its own object is
+    deleted. Rows that already hold a reference, and files outside object
+    storage, are returned unchanged.
+    """
+    content_hash = material.get("content_hash")
+    file_path = material.get("file_path")
+    if not content_hash or material.get("blob_hash") or not file_path:
+        return material
+    try:
+        s3_key = get_s3_service(get_settings()).key_for_url(file_path)
+    except Exception as exc:
+        logger.warning("Storage unavailable while deduplicating material %s: %s", material.get("id"), exc)
+        return material
+    if not s3_key:
+        return material
+
+    file_info = {"s3_key": s3_key, "s3_url": file_path, "file_size": material.get("file_size")}
+    blob = await _acquire_blob(content_hash, file_info)
+    if blob is None:
+        return material
+    try:
+        attached = await asyncio.to_thread(
+            attach_material_blob,
+            material["id"],
+            blob_hash=content_hash,
+            file_path=blob["file_url"],
+        )
+    except Exception as exc:
+        logger.warning("Failed to attach blob %s to material %s: %s", content_hash, material.get("id"), exc)
+        attached = {}
+    if not attached:
+        # The row was deleted or took a reference meanwhile; give ours back.
+        await release_material_content({"blob_hash": content_hash})
+        return material
+
+    if _is_duplicate(blob, file_info):
+        await _discard_duplicate(file_info, blob)
+    else:
+        MATERIAL_DEDUP_UPLOADS.labels(result="unique").inc()
+    return attached
+
+
+def _topics_json_path(admin_id: Any, material_id: Any) -> Path:
+    return Path(UPLOAD_DIR) / f"chapter_materials/admin_{admin_id}" / f"extracted_topics_{material_id}.json"
+
+
+def _copy_artifacts(source: Dict[str, Any], target: Dict[str, Any]) -> bool:
+    """Copy preprocessing results and extracted topics from ``source`` to ``target``."""
+    page_text = load_material_page_text(source)
+    if page_text is None:
+        return False
+    target_id = target["id"]
+    target_admin = target["admin_id"]
+
+    fields = {key: source.get(key) for key in PREPROCESS_FIELDS}
+    fields["page_text_path"] = save_material_page_text(
+        target_admin,
+        target_id,
+        page_text["pages"],
+        page_text.get("language_code"),
+    )
+    # Thumbnails are served per material, so the file is copied rather than shared.
+    source_thumb = Path(UPLOAD_DIR) / f"chapter_materials/admin_{source['admin_id']}" / f"thumbnail_{source['id']}.jpg"
+    if source.get("thumbnail_url") and source_thumb.exists():
+        target_thumb = Path(UPLOAD_DIR) / f"chapter_materials/admin_{target_admin}" / f"thumbnail_{target_id}.jpg"
+        shutil.copyfile(source_thumb, target_thumb)
+        relative = os.path.relpath(target_thumb, UPLOAD_DIR).replace("\\", "/")
+        fields["thumbnail_url"] = f"/uploads/{relative}"
+    update_material_preprocessing(target_id, fields)
+    MATERIAL_DEDUP_ARTIFACTS_REUSED.labels(artifact="preprocessing").inc()
+
+    source_topics = _topics_json_path(source["admin_id"], source["id"])
+    if source_topics.exists():
+        try:
+            with open(source_topics, "r", encoding="utf-8") as fh:
+                extraction = json.load(fh)
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Could not reuse topics of material %s: %s", source["id"], exc)
+        else:
+            save_extracted_topics_files(target_admin, target_id, extraction)
+            MATERIAL_DEDUP_ARTIFACTS_REUSED.labels(artifact="topics").inc()
+    return True
+
+
+def _reuse_artifacts(material: Dict[str, Any], content_hash: str) -> bool:
+    candidates = find_materials_by_content_hash(content_hash, exclude_id=material["id"])
+    # Prefer a source whose topics were already extracted (the expensive LLM step).
+    candidates.sort(key=lambda row: not _topics_json_path(row["admin_id"], row["id"]).exists())
+    for source in candidates:
+        try:
+            if _copy_artifacts(source, material):
+                return True
+        except Exception as exc:
+            logger.warning("Reusing artifacts of material %s failed: %s", source.get("id"), exc)
+    return False
+
+
+async def finalize_material_upload(material: Optional[Dict[str, Any]], file_info: Dict[str, Any]) -> None:
+    """
+    Record the content hash on a new material and warm it up.
+
+    Duplicates of already processed content copy the existing artifacts; everything
+    else goes through the background preprocessing pipeline.
+    """
+    if not isinstance(material, dict) or not material.get("id"):
+        schedule_material_preprocessing(material)
+        return
+    content_hash = file_info.get("content_hash")
+    if content_hash:
+        await asyncio.to_thread(update_material_preprocessing, material["id"], {"content_hash": content_hash})
+        if await asyncio.to_thread(_reuse_artifacts, material, content_hash):
+            return
+    schedule_material_preprocessing(material)
+
+
+async def release_material_content(material: Optional[Dict[str, Any]]) -> None:
+    """
+    Drop a deleted material's blob reference and remove the object once unreferenced.
+
+    Only ``blob_hash`` counts: ``content_hash`` is also written by preprocessing
+    for rows that never took a reference and must not decrement the count.
+    """
+    blob_hash = (material or {}).get("blob_hash")
+    if not blob_hash:
+        return
+    try:
+        blob = await asyncio.to_thread(material_blob_repository.release_blob, blob_hash)
+        if blob is not None:
+            storage = get_s3_service(get_settings())
+            await storage.delete_file_async(blob["s3_key"])
+    except Exception as exc:
+        logger.warning("Failed to release material blob %s: %s", blob_hash, exc)
+
+
+__all__ = [
+    "deduplicate_stored_material",
+    "deduplicate_upload",
+    "finalize_material_upload",
+    "release_material_content",
+]
@@ -0,0 +1,346 @@
+"""Size-bounded local disk cache of chapter material files stored in S3."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.config import get_settings
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+MATERIAL_CACHE_REQUESTS = Counter(
+    "material_file_cache_requests_total",
+    "Material file cache lookups",
+    ["result"],
+)
+MATERIAL_CACHE_BYTES = Gauge(
+    "material_file_cache_bytes",
+    "Bytes currently held by the material file cache",
+)
+
+
+@dataclass
+class _Entry:
+    etag: str
+    size: int
+    checked_at: float
+    pins: int = 0
+    # Set once the entry left the index while leases still pinned it; its bytes
+    # stay counted until the last lease is released.
+    dropped: bool = False
+
+
+class MaterialFileLease:
+    """A pinned local copy of a material; the file is not evicted until released."""
+
+    def __init__(
+        self,
+        cache: Optional["MaterialFileCache"],
+        key: Optional[str],
+        path: Optional[Path],
+        entry: Optional[_Entry] = None,
+    ) -> None:
+        self._cache = cache
+        self._key = key
+        self._entry = entry
+        self.path = path
+
+    def release(self) -> None:
+        if self._cache is not None and self._key is not None and self._entry is not None:
+            self._cache._unpin(self._key, self._entry)
+        self._cache = None
+
+
+class MaterialFileCache:
+    """
+    LRU cache of S3 material files keyed by storage key and ETag.
+
+    Entries are revalidated with a HEAD request once they are older than
+    ``revalidate_seconds`` and re-downloaded only when the ETag changed.
+    Concurrent requests for the same key share a single download.
+    """
+
+    def __init__(self, root: Path, *, max_bytes: int, revalidate_seconds: int) -> None:
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max(0, max_bytes)
+        self._revalidate_seconds = max(0, revalidate_seconds)
+        self._lock = threading.Lock()
+        # key -> entry, ordered from least to most recently used
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._total_bytes = 0
+        self._downloads = SingleFlight()
+        self._load_index()
+
+    def _blob_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        suffix = Path(key).suffix.lower()[:10]
+        return self._root / digest[:2] / f"{digest}{suffix}"
+
+    @staticmethod
+    def _etag_path(blob: Path) -> Path:
+        return blob.with_name(blob.name + ".etag")
+
+    def _load_index(self) -> None:
+        # Keys are hashed on disk, so the index is rebuilt lazily: blobs found here
+        # are only tracked for size accounting until a lookup claims them.
+        blobs = []
+        for path in self._root.glob("*/*"):
+            if path.suffix in (".etag", ".tmp"):
+                if path.suffix == ".tmp":
+                    path.unlink(missing_ok=True)
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            blobs.append((stat.st_mtime, path, stat.st_size))
+        blobs.sort()
+        with self._lock:
+            for _, path, size in blobs:
+                self._entries[f"orphan:{path.name}"] = _Entry(etag="", size=size, checked_at=float("-inf"))
+                self._total_bytes += size
+            self._evict_locked()
+            MATERIAL_CACHE_BYTES.set(self._total_bytes)
+
+    def _adopt_from_disk(self, key: str) -> Optional[_Entry]:
+        """Claim a blob left by a previous process, trusting its stored ETag."""
+        blob = self._blob_path(key)
+        orphan = self._entries.pop(f"orphan:{blob.name}", None)
+        if orphan is None:
+            return None
+        try:
+            etag = self._etag_path(blob).read_text(encoding="utf-8").strip()
+        except OSError:
+            etag = ""
+        if not etag or not blob.is_file():
+            self._total_bytes -= orphan.size
+            return None
+        entry = _Entry(etag=etag, size=orphan.size, checked_at=float("-inf"))
+        self._entries[key] = entry
+        return entry
+
+    async def acquire(self, key: str, storage) -> Optional[MaterialFileLease]:
+        """
+        Return a pinned lease on a local copy of ``key``, downloading it if needed.
+
+        Returns ``None`` when the object does not exist in storage.
+        """
+        for _ in range(3):
+            path = await self._downloads.run(key, lambda: self._ensure(key, storage))
+            if path is None:
+                return None
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and path.is_file():
+                    entry.pins += 1
+                    self._entries.move_to_end(key)
+                    return MaterialFileLease(self, key, path, entry)
+            # Evicted between the download and the pin; fetch again.
+        logger.warning("Material %s kept being evicted before it could be pinned", key)
+        return None
+
+    async def _ensure(self, key: str, storage) -> Optional[Path]:
+        blob = self._blob_path(key)
+        with self._lock:
+            entry = self._entries.get(key) or self._adopt_from_disk(key)
+            fresh = (
+                entry is not None
+                and blob.is_file()
+                and time.monotonic() - entry.checked_at < self._revalidate_seconds
+            )
+        if fresh:
+            MATERIAL_CACHE_REQUESTS.labels(result="hit").inc()
+            return blob
+
+        try:
+            metadata = await storage.get_file_metadata_async(key)
+        except Exception as exc:
+            # Throttling or a network fault says nothing about the object; keep serving our copy.
+            if entry is not None and blob.is_file():
+                logger.warning("Revalidating material %s failed, serving cached copy: %s", key, exc)
+                MATERIAL_CACHE_REQUESTS.labels(result="stale").inc()
+                return blob
+            raise
+        if not metadata:
+            self._drop(key)
+            MATERIAL_CACHE_REQUESTS.labels(result="missing").inc()
+            return None
+        etag = str(metadata.get("etag") or "")
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and etag and entry.etag == etag and blob.is_file():
+                entry.checked_at = time.monotonic()
+                MATERIAL_CACHE_REQUESTS.labels(result="revalidated").inc()
+                return blob
+
+        MATERIAL_CACHE_REQUESTS.labels(result="miss").inc()
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=blob.parent, suffix=".tmp")
+        os.close(fd)
+        temp_path = Path(temp_name)
+        try:
+            found = await storage.download_to_path_async(key, temp_path)
+            if not found:
+                self._drop(key)
+                return None
+            size = temp_path.stat().st_size
+            await asyncio.to_thread(self._etag_path(blob).write_text, etag, "utf-8")
+            # Replacing is safe for readers that already opened the old file.
+            temp_path.replace(blob)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                if previous.pins:
+                    # Readers of the replaced file keep it open; count it until they let go.
+                    previous.dropped = True
+                else:
+                    self._total_bytes -= previous.size
+            self._entries[key] = _Entry(etag=etag, size=size, checked_at=time.monotonic())
+            self._total_bytes += size
+            # Eviction of this entry waits until it has been pinned and released.
+            self._entries.move_to_end(key)
+            self._evict_locked(keep=key)
+            MATERIAL_CACHE_BYTES.set(self._total_bytes)
+        return blob
+
+    def _unpin(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            if entry.pins > 0:
+                entry.pins -= 1
+            if entry.dropped and entry.pins == 0:
+                entry.dropped = False
+                self._total_bytes -= entry.size
+                # A newer download of the key owns the path now; leave its file alone.
+                if key not in self._entries:
+                    self._remove_files(key)
+            self._evict_locked()
+            MATERIAL_CACHE_BYTES.set(self._total_bytes)
+
+    def _drop(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            if entry.pins:
+                # Leave a tombstone: the last lease to be released deletes the file.
+                entry.dropped = True
+                return
+            self._total_bytes -= entry.size
+            self._remove_files(key)
+            MATERIAL_CACHE_BYTES.set(self._total_bytes)
+
+    def _remove_files(self, key: str) -> None:
+        if key.startswith("orphan:"):
+            name = key.split(":", 1)[1]
+            blob = self._root / name[:2] / name
+        else:
+            blob = self._blob_path(key)
+        try:
+            blob.unlink(missing_ok=True)
+            self._etag_path(blob).unlink(missing_ok=True)
+        except OSError as exc:  # pragma: no cover - best effort cleanup
+            logger.debug("Failed to evict cached material %s: %s", key, exc)
+
+    def _evict_locked(self, keep: Optional[str] = None) -> None:
+        if not self._max_bytes or self._total_bytes <= self._max_bytes:
+            return
+        for key in list(self._entries.keys()):
+            if self._total_bytes <= self._max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.pins or key == keep:
+                continue
+            del self._entries[key]
+            self._total_bytes -= entry.size
+            self._remove_files(key)
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+
+_cache_instance: Optional[MaterialFileCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_material_file_cache() -> MaterialFileCache:
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                settings = get_settings()
+                default_root = Path(__file__).parent.parent.parent / "storage" / "material_cache"
+                root = Path(settings.material_cache_root) if settings.material_cache_root else default_root
+                _cache_instance = MaterialFileCache(
+                    root,
+                    max_bytes=settings.material_cache_max_bytes,
+                    revalidate_seconds=settings.material_cache_revalidate_seconds,
+                )
+    return _cache_instance
+
+
+async def acquire_material_file(file_path: Optional[str]) -> MaterialFileLease:
+    """
+    Resolve a material's stored ``file_path`` (local path or storage URL) to a local file.
+
+    The returned lease's ``path`` is ``None`` when the file cannot be found; callers
+    must ``release()`` the lease once they are done reading the file.
+    """
+    if not file_path:
+        return MaterialFileLease(None, None, None)
+    if os.path.exists(file_path):
+        return MaterialFileLease(None, None, Path(file_path))
+
+    from app.utils.s3_file_handler import get_s3_service
+
+    try:
+        storage = get_s3_service(get_settings())
+    except Exception as exc:
+        logger.warning("Storage unavailable while resolving %s: %s", file_path, exc)
+        return MaterialFileLease(None, None, None)
+    key = storage.key_for_url(file_path)
+    if not key:
+        return MaterialFileLease(None, None, None)
+    lease = await get_material_file_cache().acquire(key, storage)
+    return lease or MaterialFileLease(None, None, None)
+
+
+@asynccontextmanager
+async def material_local_path(file_path: Optional[str]) -> AsyncIterator[Optional[Path]]:
+    """Context manager form of :func:`acquire_material_file`."""
+    lease = await acquire_material_file(file_path)
+    try:
+        yield lease.path
+    finally:
+        lease.release()
+
+
+__all__ = [
+    "MaterialFileCache",
+    "MaterialFileLease",
+    "acquire_material_file",
+    "get_material_file_cache",
+    "material_local_path",
+]
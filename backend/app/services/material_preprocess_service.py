@@ -0,0 +1,164 @@
+"""Background preprocessing of uploaded chapter material PDFs."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import get_settings
+from app.repository.chapter_material_repository import (
+    get_chapter_material,
+    save_material_page_text,
+    update_material_preprocessing,
+)
+from app.services.material_file_cache import material_local_path
+from app.utils.file_handler import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+# Pages with fewer extractable characters than this are treated as scanned images.
+MIN_TEXT_LAYER_CHARS = 20
+THUMBNAIL_WIDTH = 320
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+_background_tasks: set = set()
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(max(1, get_settings().material_preprocess_concurrency))
+    return _semaphore
+
+
+def compute_file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _render_thumbnail(pdf_path: Path, thumbnail_path: Path) -> bool:
+    from app.utils.topic_extractor import convert_from_path
+
+    if convert_from_path is None:
+        return False
+    try:
+        images = convert_from_path(str(pdf_path), first_page=1, last_page=1, size=(THUMBNAIL_WIDTH, None))
+    except Exception as exc:
+        logger.warning("Thumbnail rendering failed for %s: %s", pdf_path.name, exc)
+        return False
+    if not images:
+        return False
+    thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+    images[0].convert("RGB").save(thumbnail_path, "JPEG", quality=80)
+    return True
+
+
+def analyze_pdf(pdf_path: Path, *, thumbnail_path: Path) -> Dict[str, Any]:
+    """Compute hash, page count, text-layer flags, language, page text and thumbnail."""
+    from app.utils.topic_extractor import PdfReader, detect_dominant_language
+
+    content_hash = compute_file_sha256(pdf_path)
+    reader = PdfReader(str(pdf_path))
+    pages: List[str] = []
+    text_layer_pages: List[bool] = []
+    for page in reader.pages:
+        try:
+            page_text = (page.extract_text() or "").strip()
+        except Exception:
+            page_text = ""
+        pages.append(page_text)
+        text_layer_pages.append(len(page_text) >= MIN_TEXT_LAYER_CHARS)
+
+    language_code = None
+    if any(text_layer_pages):
+        language_code = detect_dominant_language("\n".join(text for text in pages if text))
+
+    return {
+        "content_hash": content_hash,
+        "page_count": len(pages),
+        "text_layer_pages": text_layer_pages,
+        "language_code": language_code,
+        "pages": pages,
+        "has_thumbnail": _render_thumbnail(pdf_path, thumbnail_path),
+    }
+
+
+def _thumbnail_location(admin_id: int, material_id: int) -> Path:
+    return Path(UPLOAD_DIR) / f"chapter_materials/admin_{admin_id}" / f"thumbnail_{material_id}.jpg"
+
+
+async def preprocess_material(material_id: int) -> Optional[Dict[str, Any]]:
+    """Run the post-upload pipeline for one material and store the results on its row."""
+    material = await asyncio.to_thread(get_chapter_material, material_id)
+    if not material:
+        return None
+    admin_id = material.get("admin_id")
+    await asyncio.to_thread(update_material_preprocessing, material_id, {"preprocess_status": "running"})
+    try:
+        async with _get_semaphore():
+            async with material_local_path(material.get("file_path")) as local_pdf:
+                if local_pdf is None:
+                    raise FileNotFoundError(f"PDF not found for material {material_id}")
+                thumbnail_path = _thumbnail_location(admin_id, material_id)
+                analysis = await asyncio.to_thread(analyze_pdf, local_pdf, thumbnail_path=thumbnail_path)
+
+        page_text_path = await asyncio.to_thread(
+            save_material_page_text,
+            admin_id,
+            material_id,
+            analysis["pages"],
+            analysis["language_code"],
+        )
+        thumbnail_url = None
+        if analysis["has_thumbnail"]:
+            relative = os.path.relpath(_thumbnail_location(admin_id, material_id), UPLOAD_DIR).replace("\\", "/")
+            thumbnail_url = f"/uploads/{relative}"
+        updated = await asyncio.to_thread(
+            update_material_preprocessing,
+            material_id,
+            {
+                "content_hash": analysis["content_hash"],
+                "page_count": analysis["page_count"],
+                "text_layer_pages": analysis["text_layer_pages"],
+                "language_code": analysis["language_code"],
+                "thumbnail_url": thumbnail_url,
+                "page_text_path": page_text_path,
+                "preprocess_status": "ready",
+                "preprocessed_at": datetime.now(timezone.utc),
+            },
+        )
+    except Exception as exc:
+        logger.warning("Preprocessing failed for material %s: %s", material_id, exc)
+        await asyncio.to_thread(update_material_preprocessing, material_id, {"preprocess_status": "failed"})
+        return None
+
+    # Uploads that arrived without a checksum are deduplicated now that the hash is known.
+    from app.services.material_dedup_service import deduplicate_stored_material
+
+    return await deduplicate_stored_material(updated)
+
+
+def schedule_material_preprocessing(material: Optional[Dict[str, Any]]) -> None:
+    """Start preprocessing for a freshly created material without blocking the request."""
+    material_id = material.get("id") if isinstance(material, dict) else getattr(material, "id", None)
+    if not material_id:
+        return
+    task = asyncio.create_task(preprocess_material(int(material_id)))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+__all__ = [
+    "analyze_pdf",
+    "compute_file_sha256",
+    "preprocess_material",
+    "schedule_material_preprocessing",
+]
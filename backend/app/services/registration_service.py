@@ -17,7 +17,7 @@ from ..schemas.admin_portal_schema import (
     LoginResponse,
     LogoutResponse,
 )
-from ..utils.passwords import hash_password as bcrypt_hash, verify_password as bcrypt_verify
+from ..utils.passwords import hash_password as bcrypt_hash, verify_password as bcrypt_verify, verify_password_async
 from ..utils.session_store import valid_tokens
 
 
@@ -90,13 +90,13 @@ def create_admin(admin: AdminCreate) -> AdminRegisterResponse:
     )
 
 
-def login(credentials: LoginRequest) -> LoginResponse:
+async def login(credentials: LoginRequest) -> LoginResponse:
     email = credentials.email
     password = credentials.password
 
     admin = registration_repository.get_admin_by_email(email)
     if admin:
-        if not verify_password(password, admin["password"]):
+        if not await verify_password_async(password, admin["password"]):
             raise HTTPException(status_code=401, detail="Invalid Login Credentials")
 
         session_id = f"admin_{admin['admin_aid']}_{int(datetime.now(timezone.utc).timestamp())}"
@@ -142,7 +142,7 @@ def login(credentials: LoginRequest) -> LoginResponse:
 
     member = registration_repository.get_portal_member_by_email(email)
     if member:
-        if not verify_password(password, member["password"]):
+        if not await verify_password_async(password, member["password"]):
             raise HTTPException(status_code=401, detail="Invalid Login Credentials")
 
         session_id = f"member_{member['member_id']}_{int(datetime.now(timezone.utc).timestamp())}"
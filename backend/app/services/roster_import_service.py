@@ -0,0 +1,495 @@
+"""Streaming student roster imports, run inline or as background jobs."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import codecs
+import csv
+import io
+import logging
+import os
+import re
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from openpyxl import Workbook, load_workbook
+
+from ..config import get_settings
+from ..repository import roster_import_job_repository as job_repo
+from ..repository import student_management_repository as roster_repo
+from ..repository import student_portal_repository as portal_repo
+from ..utils.file_handler import iter_upload_chunks
+from ..utils.student_portal_security import hash_passwords_async
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_HEADERS = [
+    "Enrollment Number",
+    "First Name",
+    "Middle Name",
+    "Last Name",
+    "Std",
+    "Div",
+]
+
+ENROLLMENT_MIN_LENGTH = 11
+ENROLLMENT_MAX_LENGTH = 14
+AUTO_PASSWORD_FALLBACK = "stud"
+
+EXCEL_MIME_TYPES = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-excel",
+}
+CSV_MIME_TYPES = {"text/csv", "application/csv", "application/vnd.ms-excel"}
+
+# Rows per INSERT statement; keeps bind parameters far below PostgreSQL's 65535 limit.
+ROSTER_INSERT_BATCH_SIZE = 1000
+_ZIP_MAGIC = b"PK\x03\x04"
+_ENCODING_PROBE_BLOCK = 64 * 1024
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_background_tasks: set = set()
+
+
+def normalize_roster_value(value: Any) -> str:
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def generate_auto_password(first_name: str, enrollment_number: str) -> str:
+    normalized_name = re.sub(r"[^A-Za-z]", "", first_name).lower()
+    prefix = normalized_name[:4] if normalized_name else AUTO_PASSWORD_FALLBACK
+    enrollment_digits = re.sub(r"[^0-9]", "", enrollment_number)
+    suffix_source = enrollment_digits or enrollment_number
+    return f"{prefix}{suffix_source[-4:]}"
+
+
+def _duplicate_row_payload(
+    *,
+    row_number: int | None,
+    enrollment_number: str,
+    first_name: str,
+    middle_name: Optional[str],
+    last_name: Optional[str],
+    std: str,
+    division: Optional[str],
+    auto_password: Optional[str],
+    reason: str,
+) -> dict:
+    return {
+        # "row_number": row_number,
+        "enrollment_number": enrollment_number,
+        "first_name": first_name,
+        "middle_name": middle_name,
+        "last_name": last_name,
+        "std": std,
+        "division": division,
+        "auto_password": auto_password,
+        "reason": reason,
+    }
+
+
+def build_duplicate_report(rows: List[dict]) -> dict:
+    buffer = io.BytesIO()
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Duplicate Students")
+    headers = ["Row Number", *TEMPLATE_HEADERS, "Auto Password", "Reason"]
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(
+            [
+                row.get("row_number"),
+                row.get("enrollment_number"),
+                row.get("first_name"),
+                row.get("middle_name"),
+                row.get("last_name"),
+                row.get("std"),
+                row.get("division"),
+                row.get("auto_password"),
+                row.get("reason"),
+            ]
+        )
+    workbook.save(buffer)
+    encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    return {"filename": "student_roster_duplicates.xlsx", "content": encoded}
+
+
+async def save_roster_upload(file: UploadFile) -> Path:
+    """Spool an uploaded roster to a temporary file without buffering it in memory."""
+    max_size = get_settings().roster_import_max_bytes
+    suffix = Path(file.filename or "").suffix.lower()[:10]
+    fd, temp_name = tempfile.mkstemp(prefix="roster_", suffix=suffix)
+    path = Path(temp_name)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            async for chunk in iter_upload_chunks(file, max_size=max_size, content_type=""):
+                size += len(chunk)
+                await asyncio.to_thread(handle.write, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    if size == 0:
+        path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="File is empty")
+    return path
+
+
+def detect_roster_format(path: Path, *, filename: str, content_type: str) -> str:
+    """Return ``"csv"`` or ``"xlsx"`` for a spooled roster upload."""
+    filename = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    is_csv_like = content_type in CSV_MIME_TYPES or filename.endswith(".csv")
+    is_excel_like = content_type in EXCEL_MIME_TYPES or filename.endswith(".xlsx")
+    with open(path, "rb") as handle:
+        is_zip = handle.read(len(_ZIP_MAGIC)) == _ZIP_MAGIC
+    # Spreadsheets saved with a .csv name are still zip containers.
+    if is_zip and (is_csv_like or is_excel_like):
+        return "xlsx"
+    if is_csv_like:
+        return "csv"
+    if is_excel_like:
+        return "xlsx"
+    raise HTTPException(status_code=400, detail="Only CSV or XLSX files are supported")
+
+
+async def prepare_roster_upload(file: UploadFile) -> Tuple[Path, str]:
+    """Spool an upload and detect its format; returns ``(path, file_format)``."""
+    path = await save_roster_upload(file)
+    try:
+        file_format = detect_roster_format(path, filename=file.filename or "", content_type=file.content_type or "")
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, file_format
+
+
+def _detect_csv_encoding(path: Path) -> str:
+    for encoding in ("utf-8-sig", "utf-16"):
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, "rb") as handle:
+                for block in iter(lambda: handle.read(_ENCODING_PROBE_BLOCK), b""):
+                    if "\x00" in decoder.decode(block):
+                        raise UnicodeDecodeError(encoding, b"", 0, 1, "NUL character")
+                decoder.decode(b"", final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "iso-8859-1"
+
+
+def _validate_headers(headers: List[str]) -> List[str]:
+    normalized_headers = [normalize_roster_value(header) for header in headers]
+    if normalized_headers != TEMPLATE_HEADERS:
+        raise HTTPException(status_code=400, detail="Headers must be: " + ", ".join(TEMPLATE_HEADERS))
+    return normalized_headers
+
+
+def iter_roster_rows(path: Path, file_format: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(row_number, row)`` pairs one at a time from a CSV or XLSX roster."""
+    if file_format == "csv":
+        with open(path, "r", encoding=_detect_csv_encoding(path), newline="") as handle:
+            reader = csv.DictReader(handle)
+            if not reader.fieldnames:
+                raise HTTPException(status_code=400, detail="Missing CSV headers")
+            _validate_headers(reader.fieldnames)
+            for index, row in enumerate(reader, start=2):
+                yield index, row
+        return
+
+    try:
+        workbook = load_workbook(filename=str(path), read_only=True, data_only=True)
+    except Exception as exc:  # pragma: no cover - openpyxl errors vary
+        raise HTTPException(status_code=400, detail=f"Unable to read Excel file: {exc}") from exc
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header_cells = next(rows, None) or ()
+        header_row = _validate_headers([str(cell) if cell is not None else "" for cell in header_cells])
+        for index, row in enumerate(rows, start=2):
+            if all(cell in (None, "") for cell in row):
+                continue
+            yield index, {header: (row[idx] if idx < len(row) else None) for idx, header in enumerate(header_row)}
+    finally:
+        workbook.close()
+
+
+def parse_roster_file(path: Path, file_format: str) -> Tuple[List[dict], List[dict], int]:
+    """
+    Validate every row of a roster file.
+
+    Returns the new entries, the rows skipped as in-file duplicates and the number
+    of rows read. Any invalid row aborts the whole import before anything is written.
+    """
+    entries: List[dict] = []
+    duplicate_rows: List[dict] = []
+    seen_enrollments: set[str] = set()
+    total_rows = 0
+    for index, row in iter_roster_rows(path, file_format):
+        total_rows += 1
+        enrollment_number = normalize_roster_value(row.get("Enrollment Number"))
+        first_name = normalize_roster_value(row.get("First Name"))
+        middle_name = normalize_roster_value(row.get("Middle Name")) or None
+        last_name = normalize_roster_value(row.get("Last Name")) or None
+        std = normalize_roster_value(row.get("Std"))
+        division = normalize_roster_value(row.get("Div")) or None
+        if not enrollment_number:
+            raise HTTPException(status_code=400, detail=f"Row {index}: Enrollment Number is required")
+        if not (ENROLLMENT_MIN_LENGTH <= len(enrollment_number) <= ENROLLMENT_MAX_LENGTH):
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"Row {index}: Enrollment Number must be between "
+                    f"{ENROLLMENT_MIN_LENGTH} and {ENROLLMENT_MAX_LENGTH} characters"
+                ),
+            )
+        if enrollment_number in seen_enrollments:
+            duplicate_rows.append(
+                _duplicate_row_payload(
+                    row_number=index,
+                    enrollment_number=enrollment_number,
+                    first_name=first_name,
+                    middle_name=middle_name,
+                    last_name=last_name,
+                    std=std,
+                    division=division,
+                    auto_password=generate_auto_password(first_name, enrollment_number),
+                    reason="Duplicate enrollment number in file",
+                )
+            )
+            continue
+        if not first_name or not std:
+            raise HTTPException(status_code=400, detail=f"Row {index}: First Name and Std are required")
+        seen_enrollments.add(enrollment_number)
+        entries.append(
+            {
+                "row_number": index,
+                "enrollment_number": enrollment_number,
+                "first_name": first_name,
+                "middle_name": middle_name,
+                "last_name": last_name,
+                "std": std,
+                "division": division,
+                "auto_password": generate_auto_password(first_name, enrollment_number),
+            }
+        )
+    if total_rows == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="No rows found in Excel" if file_format == "xlsx" else "No rows found in file",
+        )
+    return entries, duplicate_rows, total_rows
+
+
+def _split_known_enrollments(admin_id: int, batch: List[dict]) -> Tuple[List[dict], List[dict]]:
+    enrollments = [entry["enrollment_number"] for entry in batch]
+    existing_set = set(roster_repo.fetch_existing_enrollments(admin_id, enrollments))
+    other_admin_map = {
+        row["enrollment_number"]: row["admin_id"]
+        for row in roster_repo.fetch_other_admin_enrollments(admin_id, enrollments)
+    }
+    fresh: List[dict] = []
+    duplicates: List[dict] = []
+    for entry in batch:
+        enrollment = entry["enrollment_number"]
+        if enrollment in existing_set:
+            reason = "Enrollment already exists"
+        elif enrollment in other_admin_map:
+            reason = "Enrollment already exists for another school"
+        else:
+            fresh.append(entry)
+            continue
+        duplicates.append(
+            _duplicate_row_payload(
+                row_number=entry.get("row_number"),
+                enrollment_number=enrollment,
+                first_name=entry["first_name"],
+                middle_name=entry.get("middle_name"),
+                last_name=entry.get("last_name"),
+                std=entry["std"],
+                division=entry.get("division"),
+                auto_password=entry.get("auto_password"),
+                reason=reason,
+            )
+        )
+    return fresh, duplicates
+
+
+async def ingest_roster_entries(
+    *,
+    admin_id: int,
+    member_id: Optional[int],
+    entries: List[dict],
+    duplicate_rows: List[dict],
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """Insert validated entries in batches and return the upload response payload."""
+    added: List[dict] = []
+    batch_size = ROSTER_INSERT_BATCH_SIZE
+    # Rows already skipped while parsing count as processed from the start.
+    skipped_in_file = len(duplicate_rows)
+    for start in range(0, len(entries), batch_size):
+        batch, duplicates = await asyncio.to_thread(
+            _split_known_enrollments, admin_id, entries[start:start + batch_size]
+        )
+        duplicate_rows.extend(duplicates)
+        for entry in batch:
+            entry.pop("row_number", None)
+            entry["assigned_member_id"] = member_id
+        if batch:
+            # Hash while the roster rows are being written; both are independent.
+            hashing = asyncio.ensure_future(hash_passwords_async([entry["auto_password"] for entry in batch]))
+            try:
+                inserted = set(await asyncio.to_thread(roster_repo.insert_roster_entries, admin_id, batch))
+                password_hashes = await hashing
+            finally:
+                if not hashing.done():
+                    hashing.cancel()
+            credentials = [
+                {"enrollment_number": entry["enrollment_number"], "password_hash": password_hash}
+                for entry, password_hash in zip(batch, password_hashes)
+                if entry["enrollment_number"] in inserted
+            ]
+            await asyncio.to_thread(portal_repo.bulk_upsert_student_accounts, credentials)
+            added.extend(entry for entry in batch if entry["enrollment_number"] in inserted)
+        if progress is not None:
+            await progress(
+                {
+                    "processed_rows": skipped_in_file + min(start + batch_size, len(entries)),
+                    "records_added": len(added),
+                    "duplicate_count": len(duplicate_rows),
+                }
+            )
+
+    duplicate_report = (
+        await asyncio.to_thread(build_duplicate_report, duplicate_rows) if duplicate_rows else None
+    )
+    if added and duplicate_rows:
+        message = "Uploaded with partial success. Some entries were duplicates."
+    elif added:
+        message = "Student roster uploaded successfully"
+    elif duplicate_rows:
+        message = "No new students added because all records were duplicates."
+    else:
+        message = "No data processed."
+    data: Dict[str, Any] = {
+        "records_added": len(added),
+        "students": added,
+        "duplicate_count": len(duplicate_rows),
+        "duplicates": duplicate_rows,
+    }
+    if duplicate_report:
+        data["duplicate_report"] = duplicate_report
+    return {"status": bool(added), "message": message, "data": data}
+
+
+async def import_roster_file(
+    path: Path,
+    *,
+    file_format: str,
+    admin_id: int,
+    member_id: Optional[int],
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """Parse, validate and ingest a spooled roster file; the file is removed afterwards."""
+    try:
+        entries, duplicate_rows, total_rows = await asyncio.to_thread(parse_roster_file, path, file_format)
+    finally:
+        path.unlink(missing_ok=True)
+    if not entries:
+        raise HTTPException(status_code=400, detail="No rows found in file")
+    if progress is not None:
+        await progress({"status": "importing", "total_rows": total_rows, "duplicate_count": len(duplicate_rows)})
+    return await ingest_roster_entries(
+        admin_id=admin_id,
+        member_id=member_id,
+        entries=entries,
+        duplicate_rows=duplicate_rows,
+        progress=progress,
+    )
+
+
+async def _run_import_job(job_id: str, path: Path, file_format: str, admin_id: int, member_id: Optional[int]) -> None:
+    async def _progress(fields: Dict[str, Any]) -> None:
+        await asyncio.to_thread(job_repo.update_job, job_id, **fields)
+
+    try:
+        await _progress({"status": "parsing"})
+        result = await import_roster_file(
+            path,
+            file_format=file_format,
+            admin_id=admin_id,
+            member_id=member_id,
+            progress=_progress,
+        )
+    except HTTPException as exc:
+        await _progress({"status": "failed", "error": str(exc.detail), "finished_at": datetime.now(timezone.utc)})
+        return
+    except Exception as exc:
+        logger.exception("Roster import job %s failed", job_id)
+        await _progress({"status": "failed", "error": str(exc), "finished_at": datetime.now(timezone.utc)})
+        return
+    data = result["data"]
+    await _progress(
+        {
+            "status": "completed",
+            "records_added": data["records_added"],
+            "duplicate_count": data["duplicate_count"],
+            "result": result,
+            "finished_at": datetime.now(timezone.utc),
+        }
+    )
+
+
+async def start_roster_import_job(
+    file: UploadFile,
+    *,
+    admin_id: int,
+    member_id: Optional[int],
+) -> Dict[str, Any]:
+    """Spool the upload and import it in the background; returns the queued job row."""
+    path, file_format = await prepare_roster_upload(file)
+    try:
+        job = await asyncio.to_thread(
+            job_repo.create_job,
+            job_id=str(uuid.uuid4()),
+            admin_id=admin_id,
+            member_id=member_id,
+            file_name=file.filename,
+        )
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    task = asyncio.create_task(_run_import_job(job["job_id"], path, file_format, admin_id, member_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return job
+
+
+def get_roster_import_job(job_id: str, *, admin_id: int) -> Optional[Dict[str, Any]]:
+    return job_repo.get_job(job_id, admin_id=admin_id)
+
+
+__all__ = [
+    "ENROLLMENT_MAX_LENGTH",
+    "ENROLLMENT_MIN_LENGTH",
+    "TEMPLATE_HEADERS",
+    "build_duplicate_report",
+    "detect_roster_format",
+    "generate_auto_password",
+    "get_roster_import_job",
+    "import_roster_file",
+    "ingest_roster_entries",
+    "iter_roster_rows",
+    "normalize_roster_value",
+    "parse_roster_file",
+    "prepare_roster_upload",
+    "save_roster_upload",
+    "start_roster_import_job",
+]
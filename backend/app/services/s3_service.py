@@ -1,17 +1,121 @@
 """S3 service for uploading and managing files in AWS S3."""
+import asyncio
+import functools
 import logging
 import os
-from typing import Optional, BinaryIO
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, BinaryIO, TypeVar
 from pathlib import Path
 
 import boto3
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-class S3Service:
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_executor_workers = 8
+
+
+def configure_storage_executor(max_workers: int) -> None:
+    """Set the size of the shared storage executor before its first use."""
+    global _executor_workers
+    _executor_workers = max(1, int(max_workers))
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_executor_workers,
+                    thread_name_prefix="storage-io",
+                )
+    return _executor
+
+
+async def run_storage_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking storage call on the bounded storage executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+# S3 rejects multipart parts smaller than 5 MB (except the last one).
+MIN_MULTIPART_PART_SIZE = 5 * 1024 * 1024
+# Error codes S3 returns for a missing object (HEAD requests carry no body, hence "404").
+_NOT_FOUND_CODES = ("404", "NoSuchKey", "NotFound")
+
+
+async def _rechunk(chunks: AsyncIterator[bytes], size: int) -> AsyncIterator[bytes]:
+    """Regroup an async byte stream into blocks of exactly ``size`` bytes (last may be short)."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _object_extra_args(file_name: str, content_type: str) -> Dict[str, Any]:
+    extra_args: Dict[str, Any] = {
+        "ContentType": content_type,
+    }
+    # For PDFs, set ContentDisposition to inline so they open in browser instead of downloading
+    if content_type == "application/pdf" or file_name.endswith(".pdf"):
+        extra_args["ContentDisposition"] = "inline"
+    # Add CORS headers for cross-origin access
+    extra_args["Metadata"] = {
+        "Access-Control-Allow-Origin": "*",
+    }
+    return extra_args
+
+
+class AsyncStorageMixin:
+    """Awaitable counterparts of the blocking storage methods."""
+
+    async def upload_file_async(self, **kwargs: Any) -> dict:
+        return await run_storage_io(self.upload_file, **kwargs)
+
+    async def upload_file_from_path_async(self, **kwargs: Any) -> dict:
+        return await run_storage_io(self.upload_file_from_path, **kwargs)
+
+    async def delete_file_async(self, s3_key: str) -> bool:
+        return await run_storage_io(self.delete_file, s3_key)
+
+    async def get_file_async(self, s3_key: str) -> Optional[bytes]:
+        return await run_storage_io(self.get_file, s3_key)
+
+    async def file_exists_async(self, s3_key: str) -> bool:
+        return await run_storage_io(self.file_exists, s3_key)
+
+    async def get_file_metadata_async(self, s3_key: str) -> Optional[dict]:
+        return await run_storage_io(self.get_file_metadata, s3_key)
+
+    async def list_files_async(self, folder: str = "") -> list:
+        return await run_storage_io(self.list_files, folder)
+
+    async def download_to_path_async(self, s3_key: str, dest_path: Path) -> bool:
+        return await run_storage_io(self.download_to_path, s3_key, dest_path)
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        """Return the storage key for a public URL produced by this service."""
+        prefix = self._generate_s3_url("")
+        if url and url.startswith(prefix) and len(url) > len(prefix):
+            return url[len(prefix):]
+        return None
+
+
+class S3Service(AsyncStorageMixin):
     """Service for handling S3 uploads and file management."""
 
     def __init__(
@@ -20,10 +124,17 @@ class S3Service:
         secret_key: str,
         region: str,
         bucket_name: str,
+        *,
+        max_pool_connections: int = 10,
+        max_attempts: int = 3,
+        multipart_part_size: int = 8 * 1024 * 1024,
+        multipart_concurrency: int = 4,
     ):
         """Initialize S3 service with AWS credentials."""
         self.bucket_name = bucket_name
         self.region = region
+        self.multipart_part_size = max(MIN_MULTIPART_PART_SIZE, multipart_part_size)
+        self.multipart_concurrency = max(1, multipart_concurrency)
         
         # Validate credentials
         if not access_key or not secret_key:
@@ -36,6 +147,10 @@ class S3Service:
                 aws_access_key_id=access_key,
                 aws_secret_access_key=secret_key,
                 region_name=region,
+                config=BotoConfig(
+                    max_pool_connections=max(1, max_pool_connections),
+                    retries={"max_attempts": max(1, max_attempts), "mode": "standard"},
+                ),
             )
             logger.info(f"S3 client initialized for bucket: {bucket_name} in region: {region}")
         except Exception as e:
@@ -68,18 +183,7 @@ class S3Service:
             s3_key = f"{folder}/{file_name}" if folder else file_name
             
             # Prepare upload parameters
-            extra_args = {
-                "ContentType": content_type,
-            }
-            
-            # For PDFs, set ContentDisposition to inline so they open in browser instead of downloading
-            if content_type == "application/pdf" or file_name.endswith(".pdf"):
-                extra_args["ContentDisposition"] = "inline"
-            
-            # Add CORS headers for cross-origin access
-            extra_args["Metadata"] = {
-                "Access-Control-Allow-Origin": "*",
-            }
+            extra_args = _object_extra_args(file_name, content_type)
             
             # Note: ACLs are disabled on this bucket, using bucket policy for public access instead
             # if public:
@@ -168,6 +272,252 @@ class S3Service:
                 detail=f"Failed to upload file: {str(e)}"
             )
 
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        *,
+        file_name: str,
+        folder: str = "",
+        content_type: str = "application/octet-stream",
+    ) -> dict:
+        """
+        Upload an async byte stream without buffering the whole object.
+
+        Streams that fit in a single part are sent with one ``put_object``. Larger
+        ones use S3 multipart upload with at most ``multipart_concurrency`` parts
+        in flight, which bounds memory to a few parts per upload.
+        """
+        s3_key = f"{folder}/{file_name}" if folder else file_name
+        parts_iter = _rechunk(chunks, self.multipart_part_size).__aiter__()
+        try:
+            first_part = await parts_iter.__anext__()
+        except StopAsyncIteration:
+            first_part = b""
+        try:
+            second_part = await parts_iter.__anext__()
+        except StopAsyncIteration:
+            second_part = None
+
+        if second_part is None:
+            return await self.upload_file_async(
+                file_content=first_part,
+                file_name=file_name,
+                folder=folder,
+                content_type=content_type,
+            )
+
+        extra_args = _object_extra_args(file_name, content_type)
+        response = await run_storage_io(
+            self.s3_client.create_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            **extra_args,
+        )
+        upload_id = response["UploadId"]
+        slots = asyncio.Semaphore(self.multipart_concurrency)
+        tasks: List[asyncio.Task] = []
+        total_size = 0
+
+        async def _send(part_number: int, body: bytes) -> Dict[str, Any]:
+            try:
+                result = await run_storage_io(
+                    self.s3_client.upload_part,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+                return {"PartNumber": part_number, "ETag": result["ETag"]}
+            finally:
+                slots.release()
+
+        async def _schedule(part_number: int, body: bytes) -> None:
+            await slots.acquire()
+            for task in tasks:
+                if task.done() and task.exception() is not None:
+                    slots.release()
+                    raise task.exception()
+            tasks.append(asyncio.create_task(_send(part_number, body)))
+
+        try:
+            part_number = 1
+            for body in (first_part, second_part):
+                total_size += len(body)
+                await _schedule(part_number, body)
+                part_number += 1
+            async for body in parts_iter:
+                total_size += len(body)
+                await _schedule(part_number, body)
+                part_number += 1
+            parts = await asyncio.gather(*tasks)
+            await run_storage_io(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda item: item["PartNumber"])},
+            )
+        except BaseException as exc:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await run_storage_io(
+                    self.s3_client.abort_multipart_upload,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    UploadId=upload_id,
+                )
+            except Exception as abort_exc:  # pragma: no cover - best effort cleanup
+                logger.warning(f"Failed to abort multipart upload {s3_key}: {abort_exc}")
+            if isinstance(exc, (HTTPException, asyncio.CancelledError)):
+                raise
+            logger.error(f"S3 multipart upload error: {exc}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to upload file to S3: {str(exc)}"
+            )
+
+        logger.info(f"File uploaded successfully via multipart: {s3_key} ({part_number - 1} parts)")
+        return {
+            "s3_key": s3_key,
+            "s3_url": self._generate_s3_url(s3_key),
+            "bucket": self.bucket_name,
+            "file_name": file_name,
+            "folder": folder,
+            "file_size": total_size,
+        }
+
+    def generate_presigned_put(
+        self,
+        s3_key: str,
+        *,
+        content_type: str,
+        expires_in: int,
+        checksum_sha256: Optional[str] = None,
+    ) -> dict:
+        """
+        Presign a single PUT of ``s3_key``.
+        
+        Returns the URL and the headers the client must send with it. When
+        ``checksum_sha256`` (base64) is given, S3 rejects a body that does not match.
+        """
+        params: Dict[str, Any] = {
+            "Bucket": self.bucket_name,
+            "Key": s3_key,
+            **_object_extra_args(s3_key, content_type),
+        }
+        params.pop("Metadata", None)
+        headers = {"Content-Type": content_type}
+        if "ContentDisposition" in params:
+            headers["Content-Disposition"] = params["ContentDisposition"]
+        if checksum_sha256:
+            params["ChecksumSHA256"] = checksum_sha256
+            headers["x-amz-checksum-sha256"] = checksum_sha256
+        url = self.s3_client.generate_presigned_url(
+            "put_object",
+            Params=params,
+            ExpiresIn=expires_in,
+        )
+        return {"url": url, "headers": headers}
+
+    def create_presigned_multipart(
+        self,
+        s3_key: str,
+        *,
+        content_type: str,
+        part_checksums_sha256: List[str],
+        expires_in: int,
+    ) -> dict:
+        """
+        Start a multipart upload and presign an UploadPart URL for every part.
+
+        Each part URL is signed with that part's SHA-256 checksum (base64), so S3
+        rejects a part whose body does not match; the returned headers must be
+        sent with it.
+        """
+        response = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            ChecksumAlgorithm="SHA256",
+            **_object_extra_args(s3_key, content_type),
+        )
+        upload_id = response["UploadId"]
+        part_urls = [
+            {
+                "part_number": part_number,
+                "url": self.s3_client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": self.bucket_name,
+                        "Key": s3_key,
+                        "UploadId": upload_id,
+                        "PartNumber": part_number,
+                        "ChecksumSHA256": checksum,
+                    },
+                    ExpiresIn=expires_in,
+                ),
+                "headers": {"x-amz-checksum-sha256": checksum},
+            }
+            for part_number, checksum in enumerate(part_checksums_sha256, start=1)
+        ]
+        return {"upload_id": upload_id, "parts": part_urls}
+
+    def complete_multipart(self, s3_key: str, upload_id: str, parts: List[Dict[str, Any]]) -> None:
+        completed_parts = []
+        for part in sorted(parts, key=lambda item: int(item["part_number"])):
+            completed = {"PartNumber": int(part["part_number"]), "ETag": str(part["etag"])}
+            if part.get("checksum_sha256"):
+                completed["ChecksumSHA256"] = str(part["checksum_sha256"])
+            completed_parts.append(completed)
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": completed_parts},
+        )
+
+    def abort_multipart(self, s3_key: str, upload_id: str) -> None:
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+            )
+        except ClientError as e:
+            logger.warning(f"Failed to abort multipart upload {s3_key}: {e}")
+
+    def get_object_checksum(self, s3_key: str) -> Optional[str]:
+        """
+        Return the stored SHA-256 checksum (base64) of an object, if S3 has one.
+
+        Objects assembled from parts carry a composite checksum, ``<base64>-<parts>``.
+        """
+        try:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                ChecksumMode="ENABLED",
+            )
+        except ClientError as e:
+            logger.error(f"Error reading checksum for {s3_key}: {e}")
+            return None
+        return response.get("ChecksumSHA256")
+
+    def read_range(self, s3_key: str, start: int, end: int) -> Optional[bytes]:
+        """Read bytes ``start``..``end`` (inclusive) of an object."""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Range=f"bytes={start}-{end}",
+            )
+            return response["Body"].read()
+        except ClientError as e:
+            logger.error(f"Error reading range of {s3_key}: {e}")
+            return None
+
     def delete_file(self, s3_key: str) -> bool:
         """
         Delete a file from S3.
@@ -206,6 +556,27 @@ class S3Service:
             logger.error(f"Error downloading file from S3: {e}")
             return None
 
+    def download_to_path(self, s3_key: str, dest_path: Path) -> bool:
+        """
+        Stream an S3 object to a local file without holding it in memory.
+        
+        Args:
+            s3_key: S3 key of the file
+            dest_path: Local destination path
+            
+        Returns:
+            True if downloaded, False if the object does not exist
+        """
+        try:
+            self.s3_client.download_file(self.bucket_name, s3_key, str(dest_path))
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in _NOT_FOUND_CODES:
+                logger.warning(f"File not found in S3: {s3_key}")
+                return False
+            logger.error(f"Error downloading file from S3: {e}")
+            raise
+
     def get_file_url(self, s3_key: str) -> str:
         """
         Generate a public URL for an S3 file.
@@ -250,6 +621,10 @@ class S3Service:
             
         Returns:
             Dictionary with file metadata or None if not found
+
+        Raises:
+            ClientError: for anything other than a missing object (throttling,
+                permissions, ...), so callers do not mistake it for a deletion
         """
         try:
             response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
@@ -260,8 +635,10 @@ class S3Service:
                 "etag": response.get("ETag"),
             }
         except ClientError as e:
+            if e.response["Error"]["Code"] in _NOT_FOUND_CODES:
+                return None
             logger.error(f"Error getting file metadata: {e}")
-            return None
+            raise
 
     def list_files(self, folder: str = "") -> list:
         """
@@ -290,3 +667,180 @@ class S3Service:
         except ClientError as e:
             logger.error(f"Error listing files: {e}")
             return []
+
+
+class LocalStorageService(AsyncStorageMixin):
+    """
+    Filesystem stand-in for :class:`S3Service` used in development and tests.
+
+    Objects are written under ``root`` using the same keys S3 would use and are
+    served from ``base_url`` (the ``/storage`` static mount by default).
+    """
+
+    def __init__(self, root: Path, base_url: str = "/storage/object_store") -> None:
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/")
+        self.bucket_name = "local"
+        self.region = "local"
+
+    def _path_for(self, s3_key: str) -> Path:
+        path = (self.root / s3_key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Invalid storage key: {s3_key}")
+        return path
+
+    def upload_file(
+        self,
+        file_content: bytes,
+        file_name: str,
+        folder: str = "",
+        content_type: str = "application/octet-stream",
+        public: bool = False,
+    ) -> dict:
+        s3_key = f"{folder}/{file_name}" if folder else file_name
+        try:
+            target = self._path_for(s3_key)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(file_content)
+            os.replace(temp_name, target)
+        except Exception as e:
+            logger.error(f"Local storage upload error: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to store file: {str(e)}"
+            )
+        return {
+            "s3_key": s3_key,
+            "s3_url": self._generate_s3_url(s3_key),
+            "bucket": self.bucket_name,
+            "file_name": file_name,
+            "folder": folder,
+            "file_size": len(file_content),
+        }
+
+    def upload_file_from_path(
+        self,
+        file_path: str,
+        folder: str = "",
+        content_type: str = "application/octet-stream",
+        public: bool = False,
+    ) -> dict:
+        if not os.path.exists(file_path):
+            raise HTTPException(
+                status_code=400,
+                detail=f"File not found: {file_path}"
+            )
+        file_name = os.path.basename(file_path)
+        s3_key = f"{folder}/{file_name}" if folder else file_name
+        target = self._path_for(s3_key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(file_path, target)
+        return {
+            "s3_key": s3_key,
+            "s3_url": self._generate_s3_url(s3_key),
+            "bucket": self.bucket_name,
+            "file_name": file_name,
+            "folder": folder,
+            "file_size": target.stat().st_size,
+        }
+
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        *,
+        file_name: str,
+        folder: str = "",
+        content_type: str = "application/octet-stream",
+    ) -> dict:
+        s3_key = f"{folder}/{file_name}" if folder else file_name
+        target = self._path_for(s3_key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        total_size = 0
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                async for chunk in chunks:
+                    total_size += len(chunk)
+                    await run_storage_io(handle.write, chunk)
+            os.replace(temp_name, target)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        return {
+            "s3_key": s3_key,
+            "s3_url": self._generate_s3_url(s3_key),
+            "bucket": self.bucket_name,
+            "file_name": file_name,
+            "folder": folder,
+            "file_size": total_size,
+        }
+
+    def delete_file(self, s3_key: str) -> bool:
+        try:
+            self._path_for(s3_key).unlink()
+            return True
+        except (OSError, ValueError) as e:
+            logger.error(f"Error deleting file from local storage: {e}")
+            return False
+
+    def get_file(self, s3_key: str) -> Optional[bytes]:
+        try:
+            return self._path_for(s3_key).read_bytes()
+        except (OSError, ValueError):
+            logger.warning(f"File not found in local storage: {s3_key}")
+            return None
+
+    def download_to_path(self, s3_key: str, dest_path: Path) -> bool:
+        try:
+            source = self._path_for(s3_key)
+        except ValueError:
+            return False
+        if not source.is_file():
+            return False
+        shutil.copyfile(source, dest_path)
+        return True
+
+    def read_range(self, s3_key: str, start: int, end: int) -> Optional[bytes]:
+        try:
+            with self._path_for(s3_key).open("rb") as handle:
+                handle.seek(start)
+                return handle.read(end - start + 1)
+        except (OSError, ValueError):
+            return None
+
+    def get_file_url(self, s3_key: str) -> str:
+        return self._generate_s3_url(s3_key)
+
+    def _generate_s3_url(self, s3_key: str) -> str:
+        return f"{self.base_url}/{s3_key}"
+
+    def file_exists(self, s3_key: str) -> bool:
+        try:
+            return self._path_for(s3_key).is_file()
+        except ValueError:
+            return False
+
+    def get_file_metadata(self, s3_key: str) -> Optional[dict]:
+        try:
+            stat = self._path_for(s3_key).stat()
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            return None
+        return {
+            "size": stat.st_size,
+            "content_type": None,
+            "last_modified": stat.st_mtime,
+            "etag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        }
+
+    def list_files(self, folder: str = "") -> list:
+        base = self.root / folder if folder else self.root
+        if not base.is_dir():
+            return []
+        return sorted(
+            path.relative_to(self.root).as_posix()
+            for path in base.rglob("*")
+            if path.is_file() and path.suffix != ".tmp"
+        )
@@ -21,12 +21,17 @@ from ..schemas import (
     StudentProfileResponse,
     StudentSignupRequest,
 )
+from . import upload_session_service
+from .watch_heartbeat_buffer import get_watch_heartbeat_buffer
 from ..utils.file_handler import delete_file, get_file_url, save_uploaded_file
-from ..utils.student_portal_security import hash_password, verify_password
+from ..utils.roster_context_cache import get_roster_context_cache
+from ..utils.student_portal_security import hash_password_async, verify_password_async
 
 
 CHAT_ATTACHMENT_SUBDIR = "chat_attachments"
 VIDEOS_SUBDIR = "videos"
+CHAT_PAGE_DEFAULT_SIZE = 50
+CHAT_PAGE_MAX_SIZE = 200
 
 
 DEFAULT_VIDEO_SAMPLES: List[Dict[str, Any]] = []
@@ -166,6 +171,68 @@ async def upload_static_video(
     return _prepare_video_payload(video_record)
 
 
+async def create_video_upload_session(
+    *,
+    file_name: str,
+    content_type: str,
+    file_size: int,
+    checksum_sha256: Optional[str],
+    part_size: Optional[int],
+    part_checksums_sha256: Optional[List[str]],
+    title: str,
+    subject: Optional[str],
+    description: Optional[str],
+    std: Optional[str],
+    current_context: Dict[str, Optional[str]],
+    enrollment_number: str,
+) -> Dict[str, Any]:
+    return await upload_session_service.create_upload_session(
+        kind="student_video",
+        owner=f"student:{enrollment_number}",
+        subfolder=f"admin_{current_context['admin_id']}",
+        file_name=file_name,
+        content_type=content_type,
+        file_size=file_size,
+        checksum_sha256=checksum_sha256,
+        part_size=part_size,
+        part_checksums_sha256=part_checksums_sha256,
+        metadata={
+            "title": title,
+            "subject": subject,
+            "description": description,
+            "std": std,
+        },
+    )
+
+
+async def complete_video_upload_session(
+    *,
+    session_token: str,
+    parts: Optional[List[Dict[str, Any]]],
+    current_context: Dict[str, Optional[str]],
+    enrollment_number: str,
+) -> Dict[str, Any]:
+    file_info = await upload_session_service.complete_upload_session(
+        session_token=session_token,
+        kind="student_video",
+        owner=f"student:{enrollment_number}",
+        parts=parts,
+    )
+    details = file_info["metadata"]
+    video_record = student_portal_video_repository.create_video(
+        admin_id=current_context["admin_id"],
+        std=details.get("std"),
+        subject=details.get("subject"),
+        title=details.get("title"),
+        description=details.get("description"),
+        chapter_name=None,
+        duration_seconds=None,
+        video_url=file_info["s3_url"],
+        thumbnail_url=None,
+    )
+    return _prepare_video_payload(video_record)
+
+
 def create_external_video(
     *,
     title: str,
@@ -220,7 +287,7 @@ def _require_enrollment(enrollment_number: str) -> str:
     return normalized
 
 
-def signup_student(payload: StudentSignupRequest) -> None:
+async def signup_student(payload: StudentSignupRequest) -> None:
     enrollment_number = _require_enrollment(payload.enrollment_number)
     existing_account = student_portal_repository.get_student_account_by_enrollment(enrollment_number)
     if existing_account is not None:
@@ -231,11 +298,11 @@ def signup_student(payload: StudentSignupRequest) -> None:
 
     student_portal_repository.create_student_account(
         enrollment_number=enrollment_number,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password_async(payload.password),
     )
 
 
-def _bootstrap_account_from_roster(enrollment_number: str) -> Optional[Dict[str, Any]]:
+async def _bootstrap_account_from_roster(enrollment_number: str) -> Optional[Dict[str, Any]]:
     roster_entry = student_portal_repository.get_roster_entry(enrollment_number)
     auto_password = roster_entry.get("auto_password") if roster_entry else None
     if not auto_password:
@@ -243,11 +310,11 @@ def _bootstrap_account_from_roster(enrollment_number: str) -> Optional[Dict[str,
 
     return student_portal_repository.upsert_student_account(
         enrollment_number=enrollment_number,
-        password_hash=hash_password(auto_password),
+        password_hash=await hash_password_async(auto_password),
     )
 
 
-def authenticate_student(payload: StudentLoginRequest) -> Dict[str, object]:
+async def authenticate_student(payload: StudentLoginRequest) -> Dict[str, object]:
     enrollment_number = _require_enrollment(payload.enrollment_number)
     
     # Check if student exists in roster (not deleted)
@@ -260,8 +327,8 @@ def authenticate_student(payload: StudentLoginRequest) -> Dict[str, object]:
     
     account = student_portal_repository.get_student_account_by_enrollment(enrollment_number)
     if account is None:
-        account = _bootstrap_account_from_roster(enrollment_number)
-    if account is None or not verify_password(payload.password, account["password_hash"]):
+        account = await _bootstrap_account_from_roster(enrollment_number)
+    if account is None or not await verify_password_async(payload.password, account["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid enrollment number or password",
@@ -280,13 +347,13 @@ def logout_student(enrollment_number: str) -> None:
     _require_enrollment(enrollment_number)
 
 
-def change_student_password(*, enrollment_number: str, current_password: str, new_password: str) -> None:
+async def change_student_password(*, enrollment_number: str, current_password: str, new_password: str) -> None:
     normalized = _require_enrollment(enrollment_number)
     account = student_portal_repository.get_student_account_by_enrollment(normalized)
     if account is None:
-        account = _bootstrap_account_from_roster(normalized)
+        account = await _bootstrap_account_from_roster(normalized)
 
-    if account is None or not verify_password(current_password, account["password_hash"]):
+    if account is None or not await verify_password_async(current_password, account["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
@@ -296,7 +363,7 @@ def change_student_password(*, enrollment_number: str, current_password: str, ne
     if not trimmed_new_password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="New password cannot be empty")
 
-    password_hash = hash_password(trimmed_new_password)
+    password_hash = await hash_password_async(trimmed_new_password)
     updated = student_portal_repository.update_student_password(normalized, password_hash)
     if updated is None:
         updated = student_portal_repository.upsert_student_account(
@@ -401,9 +468,13 @@ def get_roster_context(
     *,
     admin_id: Optional[int] = None,
 ) -> Dict[str, Optional[str]]:
-    context = student_portal_repository.get_student_roster_context(
+    context = get_roster_context_cache().get_or_load(
         enrollment_number,
-        admin_id=admin_id,
+        admin_id,
+        lambda: student_portal_repository.get_student_roster_context(
+            enrollment_number,
+            admin_id=admin_id,
+        ),
     )
 
     if context is None:
@@ -479,23 +550,80 @@ def list_chat_peers(current_context: Dict[str, Optional[str]]) -> List[Dict[str,
                 "last_message": latest_message_preview,
                 "last_message_at": latest.get("created_at"),
                 "last_message_sender": latest.get("sender_enrollment"),
+                "unread_count": latest.get("unread_count") or 0,
             }
         )
 
     return peers_payload
 
 
-def list_chat_messages(
+def get_chat_history(
     *,
     current_context: Dict[str, Optional[str]],
     peer_context: Dict[str, Optional[str]],
-) -> List[Dict[str, Any]]:
+    limit: int = CHAT_PAGE_DEFAULT_SIZE,
+    before_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """One keyset page of a conversation plus whether more messages lie beyond it."""
+    page_size = max(1, min(limit, CHAT_PAGE_MAX_SIZE))
     records = student_portal_repository.fetch_chat_messages(
         admin_id=current_context["admin_id"],
         enrollment_a=current_context["enrollment_number"],
         enrollment_b=peer_context["enrollment_number"],
+        limit=page_size + 1,
+        before_id=before_id,
+        after_id=after_id,
+    )
+    if before_id is None:
+        # Loading the newest messages (or catching up on them) means the student has seen them.
+        student_portal_repository.mark_conversation_read(
+            admin_id=current_context["admin_id"],
+            reader_enrollment=current_context["enrollment_number"],
+            peer_enrollment=peer_context["enrollment_number"],
+        )
+    has_more = len(records) > page_size
+    if has_more:
+        # The extra row sits on the far side of the page in the paging direction.
+        records = records[:page_size] if after_id is not None else records[1:]
+    messages = [_prepare_chat_message(record) for record in records]
+    return {
+        "messages": messages,
+        "has_more": has_more,
+        "oldest_id": messages[0]["id"] if messages else None,
+        "newest_id": messages[-1]["id"] if messages else None,
+    }
+
+
+def list_chat_messages(
+    *,
+    current_context: Dict[str, Optional[str]],
+    peer_context: Dict[str, Optional[str]],
+) -> List[Dict[str, Any]]:
+    return get_chat_history(current_context=current_context, peer_context=peer_context)["messages"]
+
+
+def sync_chat_messages(
+    *,
+    current_context: Dict[str, Optional[str]],
+    after_id: int,
+    limit: int = CHAT_PAGE_MAX_SIZE,
+) -> Dict[str, Any]:
+    """Everything the student sent or received after ``after_id``, for reconnecting clients."""
+    page_size = max(1, min(limit, CHAT_PAGE_MAX_SIZE))
+    records = student_portal_repository.fetch_chat_messages_since(
+        admin_id=current_context["admin_id"],
+        enrollment=current_context["enrollment_number"],
+        after_id=after_id,
+        limit=page_size + 1,
     )
-    return [_prepare_chat_message(record) for record in records]
+    has_more = len(records) > page_size
+    messages = [_prepare_chat_message(record) for record in records[:page_size]]
+    return {
+        "messages": messages,
+        "has_more": has_more,
+        "newest_id": messages[-1]["id"] if messages else after_id,
+    }
 
 
 def send_chat_message(
@@ -805,7 +933,7 @@ def set_video_subscription(
     )
 
 
-def record_video_watch(
+async def record_video_watch(
     *,
     current_context: Dict[str, Optional[str]],
     video_id: int,
@@ -823,11 +951,15 @@ def record_video_watch(
             video_id=video_id,
             duration_seconds=duration_seconds,
         )
-    student_portal_video_repository.record_watch_event(
-        video_id=video_id,
-        enrollment_number=enrollment_number,
-        watch_seconds=watch_seconds,
-    )
+    buffer = get_watch_heartbeat_buffer()
+    if buffer is None:
+        student_portal_video_repository.record_watch_event(
+            video_id=video_id,
+            enrollment_number=enrollment_number,
+            watch_seconds=watch_seconds,
+        )
+        return
+    await buffer.add(video_id, enrollment_number, watch_seconds)
 
 
 def list_watched_videos(
@@ -6,11 +6,7 @@ from contextlib import asynccontextmanager
 from typing import AsyncIterator, Dict, Optional
 
 from app.config import get_settings
-
-try:
-    import redis.asyncio as redis_async
-except ImportError:  # pragma: no cover
-    redis_async = None
+from app.utils.redis_client import create_redis_client, redis_async
 
 logger = logging.getLogger(__name__)
 
@@ -233,33 +229,6 @@ return 0
         }
 
 
-def _create_redis_client():
-    if redis_async is None:
-        raise RuntimeError("redis package is not installed")
-    settings = get_settings()
-    if settings.redis_url:
-        return redis_async.Redis.from_url(
-            settings.redis_url,
-            encoding=None,
-            decode_responses=False,
-        )
-    connection_kwargs = {
-        "host": settings.redis_host,
-        "port": settings.redis_port,
-        "db": settings.redis_db,
-        "password": settings.redis_password,
-        "encoding": None,
-        "decode_responses": False,
-    }
-    if settings.redis_ssl:
-        try:
-            ssl_connection_cls = redis_async.connection.SSLConnection
-        except AttributeError as exc:
-            raise RuntimeError("Installed redis client does not support SSL connections") from exc
-        connection_kwargs["connection_class"] = ssl_connection_cls
-    return redis_async.Redis(**connection_kwargs)
-
-
 def _build_queue_manager():
     settings = get_settings()
     backend = (settings.topic_extract_queue_backend or "memory").lower()
@@ -277,7 +246,7 @@ def _build_queue_manager():
             )
         else:
             try:
-                redis_client = _create_redis_client()
+                redis_client = create_redis_client()
                 logger.info(
                     "Topic extraction queue using Redis backend at %s:%s (db=%s)",
                     settings.redis_host if not settings.redis_url else "url",
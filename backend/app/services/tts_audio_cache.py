@@ -0,0 +1,231 @@
+"""Content-addressed on-disk cache for synthesized TTS audio."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_REQUESTS = Counter(
+    "tts_audio_cache_requests_total",
+    "TTS audio cache lookups",
+    ["result"],
+)
+TTS_CACHE_EVICTIONS = Counter(
+    "tts_audio_cache_evictions_total",
+    "TTS audio blobs evicted from the cache",
+)
+TTS_CACHE_BYTES = Gauge(
+    "tts_audio_cache_bytes",
+    "Bytes currently held by the TTS audio cache",
+)
+
+
+def normalize_tts_text(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry."""
+    normalized = unicodedata.normalize("NFC", text or "")
+    return " ".join(normalized.split())
+
+
+class TTSAudioCache:
+    """Size-bounded LRU store of MP3 blobs keyed by text, voice and audio config."""
+
+    _REMOTE_URL_LIMIT = 4096
+
+    def __init__(self, root: Path, *, max_bytes: int) -> None:
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        # key -> blob size, ordered from least to most recently used
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._remote_urls: "OrderedDict[str, str]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._load_index()
+
+    @staticmethod
+    def build_key(
+        text: str,
+        *,
+        language_code: str,
+        voice_name: str,
+        ssml_gender: str,
+        audio_encoding: str,
+    ) -> str:
+        material = "\x1f".join(
+            [
+                normalize_tts_text(text),
+                (language_code or "").lower(),
+                voice_name or "",
+                str(ssml_gender or ""),
+                str(audio_encoding or ""),
+            ]
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _blob_path(self, key: str) -> Path:
+        return self._root / key[:2] / f"{key}.mp3"
+
+    def _load_index(self) -> None:
+        blobs = []
+        for path in self._root.glob("*/*.mp3"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            blobs.append((stat.st_mtime, path.stem, stat.st_size))
+        blobs.sort()
+        with self._lock:
+            for _, key, size in blobs:
+                self._entries[key] = size
+                self._total_bytes += size
+            self._evict_locked()
+            TTS_CACHE_BYTES.set(self._total_bytes)
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the cached blob path for ``key`` or ``None`` on a miss."""
+        path = self._blob_path(key)
+        with self._lock:
+            known = key in self._entries
+            if known and path.is_file():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                TTS_CACHE_REQUESTS.labels(result="hit").inc()
+                return path
+            if known:
+                self._total_bytes -= self._entries.pop(key)
+                TTS_CACHE_BYTES.set(self._total_bytes)
+            self._misses += 1
+            TTS_CACHE_REQUESTS.labels(result="miss").inc()
+        return None
+
+    def materialize(self, key: str, target_path: Path) -> bool:
+        """Link (or copy) a cached blob to ``target_path``; False on a cache miss."""
+        blob = self.lookup(key)
+        if blob is None:
+            return False
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=target_path.parent, suffix=".tmp")
+        os.close(fd)
+        temp_path = Path(temp_name)
+        try:
+            temp_path.unlink()
+            try:
+                os.link(blob, temp_path)
+            except OSError:
+                shutil.copyfile(blob, temp_path)
+            temp_path.replace(target_path)
+            return True
+        except OSError as exc:
+            logger.warning("Failed to materialize cached audio %s: %s", key, exc)
+            temp_path.unlink(missing_ok=True)
+            return False
+
+    def store(self, key: str, source_path: Path) -> Optional[Path]:
+        """Add an already written MP3 file to the cache under ``key``."""
+        blob = self._blob_path(key)
+        try:
+            size = source_path.stat().st_size
+        except OSError:
+            return None
+        if self._max_bytes and size > self._max_bytes:
+            return None
+        try:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(dir=blob.parent, suffix=".tmp")
+            os.close(fd)
+            temp_path = Path(temp_name)
+            temp_path.unlink()
+            try:
+                os.link(source_path, temp_path)
+            except OSError:
+                shutil.copyfile(source_path, temp_path)
+            temp_path.replace(blob)
+        except OSError as exc:
+            logger.warning("Failed to store audio %s in TTS cache: %s", key, exc)
+            return None
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict_locked()
+            TTS_CACHE_BYTES.set(self._total_bytes)
+        return blob
+
+    def _evict_locked(self) -> None:
+        if not self._max_bytes:
+            return
+        while self._total_bytes > self._max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._remote_urls.pop(key, None)
+            try:
+                self._blob_path(key).unlink(missing_ok=True)
+            except OSError as exc:  # pragma: no cover - best effort cleanup
+                logger.debug("Failed to evict TTS blob %s: %s", key, exc)
+            TTS_CACHE_EVICTIONS.inc()
+
+    def get_remote_url(self, key: str) -> Optional[str]:
+        """Return the public URL a blob was previously uploaded to, if known."""
+        with self._lock:
+            url = self._remote_urls.get(key)
+            if url is not None:
+                self._remote_urls.move_to_end(key)
+                self._hits += 1
+                TTS_CACHE_REQUESTS.labels(result="hit").inc()
+            return url
+
+    def remember_remote_url(self, key: str, url: str) -> None:
+        with self._lock:
+            self._remote_urls[key] = url
+            self._remote_urls.move_to_end(key)
+            while len(self._remote_urls) > self._REMOTE_URL_LIMIT:
+                self._remote_urls.popitem(last=False)
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+_cache_instance: Optional[TTSAudioCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_audio_cache() -> Optional[TTSAudioCache]:
+    """Return the process-wide audio cache, or ``None`` when caching is disabled."""
+    global _cache_instance
+    settings = get_settings()
+    if not settings.tts_cache_enabled:
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                default_root = Path(__file__).parent.parent.parent / "storage" / "tts_cache"
+                root = Path(settings.tts_cache_root) if settings.tts_cache_root else default_root
+                _cache_instance = TTSAudioCache(root, max_bytes=settings.tts_cache_max_bytes)
+    return _cache_instance
+
+
+__all__ = ["TTSAudioCache", "get_tts_audio_cache", "normalize_tts_text"]
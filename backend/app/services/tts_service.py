@@ -7,12 +7,14 @@ import os
 import re
 import tempfile
 from pathlib import Path
-from typing import Iterator, Optional, Tuple
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
 
 from google.api_core.exceptions import GoogleAPICallError
 from google.cloud import texttospeech
 from google.oauth2 import service_account
 
+from app.services.tts_audio_cache import TTSAudioCache, get_tts_audio_cache
+
 logger = logging.getLogger(__name__)
 
 class GoogleTTSService:
@@ -45,13 +47,21 @@ class GoogleTTSService:
         storage_root: str = "./storage/chapter_lectures",
         *,
         credentials_path: Optional[str] = None,
+        chunk_concurrency: int = 4,
+        audio_cache: Optional[TTSAudioCache] = None,
     ) -> None:
         self._storage_root = Path(storage_root)
         self._storage_root.mkdir(parents=True, exist_ok=True)
+        self._chunk_concurrency = max(1, chunk_concurrency)
+        self._audio_cache = audio_cache if audio_cache is not None else get_tts_audio_cache()
 
         resolved_credentials = self._resolve_credentials_path(credentials_path)
         self._client = self._build_client(resolved_credentials)
 
+    @property
+    def audio_cache(self) -> Optional[TTSAudioCache]:
+        return self._audio_cache
+
     async def synthesize_text(
         self,
         *,
@@ -61,8 +71,13 @@ class GoogleTTSService:
         filename: str,
         subfolder: str | None = None,
         model: str | None = None,
+        on_part: Optional[Callable[[bytes], None]] = None,
     ) -> Optional[Path]:
-        """Generate an MP3 file for the provided text chunk."""
+        """Generate an MP3 file for the provided text chunk.
+
+        ``on_part`` receives MP3 data in playback order as soon as each leading
+        chunk is synthesized, so callers can stream audio before the file exists.
+        """
         normalized_text = self._sanitize_text((text or "").strip())
         if not normalized_text:
             logger.info(
@@ -74,89 +89,142 @@ class GoogleTTSService:
 
         target_path = self._build_audio_path(lecture_id, filename, subfolder=subfolder)
         voice_params = self._voice_for_voice_model(language, model)
+        cache_key = self._cache_key(normalized_text, voice_params)
 
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
+        if self._audio_cache is not None:
+            reused = await loop.run_in_executor(
+                None,
+                self._audio_cache.materialize,
+                cache_key,
+                target_path,
+            )
+            if reused:
+                logger.info("Reused cached TTS audio for %s", target_path)
+                if on_part is not None:
+                    on_part(await loop.run_in_executor(None, target_path.read_bytes))
+                return target_path
+
+        try:
+            parts = await self._synthesize_chunks(
+                list(self._chunk_text(normalized_text)),
+                voice_params,
+                on_part=on_part,
+            )
+        except (GoogleAPICallError, ValueError) as exc:
+            logger.error(
+                "Failed to synthesize audio for lecture %s: %s",
+                target_path.name,
+                exc,
+            )
+            logger.exception("Full TTS error details for %s:", target_path.name)
+            return None
+
+        result = await loop.run_in_executor(
             None,
-            self._write_audio_file,
-            normalized_text,
-            voice_params,
+            self._write_audio_parts,
+            parts,
             target_path,
         )
+        if result and self._audio_cache is not None:
+            await loop.run_in_executor(None, self._audio_cache.store, cache_key, result)
+        return result
+
+    def cache_key_for(self, text: str, language: str, model: str | None = None) -> str:
+        """Return the content address used for ``text`` spoken with the given voice."""
+        normalized_text = self._sanitize_text((text or "").strip())
+        return self._cache_key(normalized_text, self._voice_for_voice_model(language, model))
 
-    # def _write_audio_file(
-    #     self,
-    #     text: str,
-    #     voice: texttospeech.VoiceSelectionParams,
-    #     target_path: Path,
-    # ) -> Optional[Path]:
-    #     temp_path: Optional[Path] = None
-    #     try:
-    #         target_path.parent.mkdir(parents=True, exist_ok=True)
-    #         with tempfile.NamedTemporaryFile(
-    #             mode="wb",
-    #             delete=False,
-    #             dir=target_path.parent,
-    #             suffix=".tmp",
-    #         ) as temp_file:
-    #             temp_path = Path(temp_file.name)
-    #             for chunk_text in self._chunk_text(text):
-    #                 response = self._client.synthesize_speech(
-    #                     input=texttospeech.SynthesisInput(text=chunk_text),
-    #                     voice=voice,
-    #                     audio_config=texttospeech.AudioConfig(
-    #                         audio_encoding=texttospeech.AudioEncoding.MP3
-    #                     ),
-    #                 )
-    #                 temp_file.write(response.audio_content)
-    #         temp_path.replace(target_path)
-    #         logger.info("Generated lecture audio at %s", target_path)
-    #         return target_path
-    #     except (GoogleAPICallError, OSError, ValueError) as exc:
-    #         logger.error(
-    #             "Failed to synthesize audio for lecture %s: %s",
-    #             target_path.name,
-    #             exc,
-    #         )
-    #         logger.exception("Full TTS error details for %s:", target_path.name)
-    #         for path in filter(None, [temp_path, target_path]):
-    #             try:
-    #                 if path.exists():
-    #                     path.unlink(missing_ok=True)
-    #             except Exception:  # pragma: no cover - best effort cleanup
-    #                 pass
-    #         return None
-    def _write_audio_file(
+    @staticmethod
+    def _cache_key(text: str, voice: texttospeech.VoiceSelectionParams) -> str:
+        return TTSAudioCache.build_key(
+            text,
+            language_code=voice.language_code,
+            voice_name=voice.name,
+            ssml_gender=str(voice.ssml_gender),
+            audio_encoding=str(texttospeech.AudioEncoding.MP3),
+        )
+
+    async def _synthesize_chunks(
         self,
-        text: str,
+        chunks: Sequence[str],
+        voice: texttospeech.VoiceSelectionParams,
+        *,
+        on_part: Optional[Callable[[bytes], None]] = None,
+    ) -> List[bytes]:
+        """Synthesize chunks concurrently, returning MP3 parts in chunk order."""
+        if not chunks:
+            return []
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self._chunk_concurrency)
+
+        async def _run(chunk_text: str) -> bytes:
+            async with semaphore:
+                return await loop.run_in_executor(None, self._synthesize_chunk, chunk_text, voice)
+
+        tasks = [asyncio.ensure_future(_run(chunk)) for chunk in chunks]
+        parts: List[bytes] = []
+        try:
+            # Await in chunk order so parts can be emitted as soon as every
+            # earlier chunk is ready, while later chunks keep synthesizing.
+            for task in tasks:
+                part = await task
+                parts.append(part)
+                if on_part is not None:
+                    on_part(part)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return parts
+
+    def _synthesize_chunk(
+        self,
+        chunk_text: str,
         voice: texttospeech.VoiceSelectionParams,
+    ) -> bytes:
+        response = self._client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=chunk_text),
+            voice=voice,
+            audio_config=texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.MP3
+            ),
+        )
+        return response.audio_content
+
+    def _write_audio_parts(
+        self,
+        parts: Sequence[bytes],
         target_path: Path,
     ) -> Optional[Path]:
+        # Write to a temp file and rename so readers never see a partial MP3 and
+        # files hard-linked from the audio cache are never truncated in place.
+        temp_path: Optional[Path] = None
         try:
-            with open(target_path, "wb") as audio_file:
-                for chunk_text in self._chunk_text(text):
-                    response = self._client.synthesize_speech(
-                        input=texttospeech.SynthesisInput(text=chunk_text),
-                        voice=voice,
-                        audio_config=texttospeech.AudioConfig(
-                            audio_encoding=texttospeech.AudioEncoding.MP3
-                        ),
-                    )
-                    audio_file.write(response.audio_content)
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                mode="wb",
+                delete=False,
+                dir=target_path.parent,
+                suffix=".tmp",
+            ) as temp_file:
+                temp_path = Path(temp_file.name)
+                for part in parts:
+                    temp_file.write(part)
+            temp_path.replace(target_path)
             logger.info("Generated lecture audio at %s", target_path)
             return target_path
-        except (GoogleAPICallError, OSError, ValueError) as exc:
+        except OSError as exc:
             logger.error(
-                "Failed to synthesize audio for lecture %s: %s",
+                "Failed to write audio for lecture %s: %s",
                 target_path.name,
                 exc,
             )
-            logger.exception("Full TTS error details for %s:", target_path.name)
-            try:
-                if target_path.exists():
-                    target_path.unlink(missing_ok=True)
-            except Exception:  # pragma: no cover - best effort cleanup
-                pass
+            if temp_path is not None:
+                try:
+                    temp_path.unlink(missing_ok=True)
+                except Exception:  # pragma: no cover - best effort cleanup
+                    pass
             return None
 
     def _build_client(self, credentials_path: str) -> texttospeech.TextToSpeechClient:
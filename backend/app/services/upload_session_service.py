@@ -0,0 +1,312 @@
+"""Presigned direct-to-storage upload sessions with server-side completion checks."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import math
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+
+from app.config import get_settings
+from app.repository import upload_session_repository
+from app.services.s3_service import MIN_MULTIPART_PART_SIZE, run_storage_io
+from app.utils.file_handler import check_file_signature
+from app.utils.s3_file_handler import DEFAULT_MAX_FILE_SIZE, get_s3_service
+
+logger = logging.getLogger(__name__)
+
+_SESSION_TOKEN_TYPE = "upload_session"
+_SESSION_ALGORITHM = "HS256"
+_MAX_MULTIPART_PARTS = 10_000
+
+
+@dataclass(frozen=True)
+class UploadTarget:
+    folder: str
+    allowed_types: FrozenSet[str]
+    allowed_extensions: FrozenSet[str]
+    max_size: int
+
+
+UPLOAD_TARGETS: Dict[str, UploadTarget] = {
+    "chapter_material": UploadTarget(
+        folder="pdfs",
+        allowed_types=frozenset({"application/pdf"}),
+        allowed_extensions=frozenset({".pdf"}),
+        max_size=DEFAULT_MAX_FILE_SIZE,
+    ),
+    "student_video": UploadTarget(
+        folder="videos",
+        allowed_types=frozenset({"video/mp4", "video/x-m4v", "video/quicktime", "video/webm", "video/x-matroska"}),
+        allowed_extensions=frozenset({".mp4", ".mov", ".mkv", ".webm"}),
+        max_size=500 * 1024 * 1024,
+    ),
+    # SVG stays on the proxied upload: markup has no magic bytes to check here.
+    "lecture_cover_photo": UploadTarget(
+        folder="images",
+        allowed_types=frozenset({"image/jpeg", "image/png", "image/webp"}),
+        allowed_extensions=frozenset({".jpg", ".jpeg", ".png", ".webp"}),
+        max_size=DEFAULT_MAX_FILE_SIZE,
+    ),
+}
+
+
+def _get_presigning_storage():
+    storage = get_s3_service(get_settings())
+    if not hasattr(storage, "generate_presigned_put"):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Direct uploads require the S3 storage backend",
+        )
+    return storage
+
+
+def _validate_declared_file(target: UploadTarget, file_name: str, content_type: str, file_size: int) -> str:
+    extension = os.path.splitext(file_name or "")[1].lower()
+    if extension not in target.allowed_extensions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file extension. Allowed extensions: {', '.join(sorted(target.allowed_extensions))}",
+        )
+    if content_type not in target.allowed_types:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file type. Allowed types: {', '.join(sorted(target.allowed_types))}",
+        )
+    if file_size <= 0 or file_size > target.max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size too large. Maximum allowed size is {target.max_size // (1024 * 1024)}MB",
+        )
+    return extension
+
+
+def _decode_sha256(checksum: Optional[str]) -> bytes:
+    try:
+        digest = base64.b64decode(checksum or "", validate=True)
+    except (binascii.Error, ValueError):
+        digest = b""
+    if len(digest) != hashlib.sha256().digest_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Checksums must be base64-encoded SHA-256 digests",
+        )
+    return digest
+
+
+def _composite_checksum(part_checksums: List[str]) -> str:
+    """The checksum S3 reports for an object assembled from parts with these checksums."""
+    digests = b"".join(_decode_sha256(checksum) for checksum in part_checksums)
+    return f"{base64.b64encode(hashlib.sha256(digests).digest()).decode('ascii')}-{len(part_checksums)}"
+
+
+def _validate_parts(file_size: int, part_size: Optional[int], part_checksums: List[str]) -> int:
+    if not part_size or part_size < MIN_MULTIPART_PART_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"part_size must be at least {MIN_MULTIPART_PART_SIZE} bytes",
+        )
+    part_count = math.ceil(file_size / part_size)
+    if part_count > _MAX_MULTIPART_PARTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"part_size is too small; at most {_MAX_MULTIPART_PARTS} parts are allowed",
+        )
+    if len(part_checksums) != part_count:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Expected {part_count} part checksums for part_size {part_size}",
+        )
+    return part_size
+
+
+async def create_upload_session(
+    *,
+    kind: str,
+    owner: str,
+    subfolder: str,
+    file_name: str,
+    content_type: str,
+    file_size: int,
+    checksum_sha256: Optional[str] = None,
+    part_size: Optional[int] = None,
+    part_checksums_sha256: Optional[List[str]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Issue presigned URLs for uploading one file straight to storage.
+
+    Every upload is checksummed. A file sent in one request needs
+    ``checksum_sha256``, the base64 SHA-256 of the whole file, and gets a single
+    presigned PUT. A file sent in parts declares ``part_size`` and the base64
+    SHA-256 of each part in ``part_checksums_sha256``, and gets one presigned
+    URL per part; S3 checks each part against its checksum. The returned
+    ``session_token`` carries everything the completion step needs.
+    """
+    target = UPLOAD_TARGETS[kind]
+    extension = _validate_declared_file(target, file_name, content_type, file_size)
+    if part_checksums_sha256:
+        part_size = _validate_parts(file_size, part_size, part_checksums_sha256)
+        expected_checksum = _composite_checksum(part_checksums_sha256)
+    elif checksum_sha256:
+        _decode_sha256(checksum_sha256)
+        expected_checksum = checksum_sha256
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="checksum_sha256 or part_checksums_sha256 is required",
+        )
+    storage = _get_presigning_storage()
+    settings = get_settings()
+    expires_in = settings.upload_session_expiry_seconds
+
+    s3_key = f"{target.folder}/{subfolder}/{uuid.uuid4()}{extension}"
+    claims: Dict[str, Any] = {
+        "typ": _SESSION_TOKEN_TYPE,
+        "jti": uuid.uuid4().hex,
+        "kind": kind,
+        "owner": owner,
+        "key": s3_key,
+        "name": file_name,
+        "size": file_size,
+        "ctype": content_type,
+        "sha256": expected_checksum,
+        "meta": metadata or {},
+        "exp": datetime.utcnow() + timedelta(seconds=expires_in),
+    }
+
+    if not part_checksums_sha256:
+        upload = storage.generate_presigned_put(
+            s3_key,
+            content_type=content_type,
+            expires_in=expires_in,
+            checksum_sha256=checksum_sha256,
+        )
+        upload["method"] = "PUT"
+    else:
+        upload = await run_storage_io(
+            storage.create_presigned_multipart,
+            s3_key,
+            content_type=content_type,
+            part_checksums_sha256=part_checksums_sha256,
+            expires_in=expires_in,
+        )
+        upload["method"] = "MULTIPART"
+        upload["part_size"] = part_size
+        claims["upload_id"] = upload["upload_id"]
+
+    return {
+        "session_token": jwt.encode(claims, settings.secret_key, algorithm=_SESSION_ALGORITHM),
+        "s3_key": s3_key,
+        "expires_in": expires_in,
+        "upload": upload,
+    }
+
+
+def _decode_session(session_token: str, *, kind: str, owner: str) -> Dict[str, Any]:
+    try:
+        claims = jwt.decode(session_token, get_settings().secret_key, algorithms=[_SESSION_ALGORITHM])
+    except JWTError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired upload session") from exc
+    if not claims.get("jti"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired upload session")
+    if claims.get("typ") != _SESSION_TOKEN_TYPE or claims.get("kind") != kind or claims.get("owner") != owner:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Upload session does not belong to this user")
+    return claims
+
+
+async def _reject_upload(storage, s3_key: str, detail: str) -> None:
+    await storage.delete_file_async(s3_key)
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+async def complete_upload_session(
+    *,
+    session_token: str,
+    kind: str,
+    owner: str,
+    parts: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Finish an upload session and verify the stored object.
+
+    The object must match the declared size, content type and checksum (the
+    composite of the part checksums for multipart uploads) and start with the
+    magic bytes of its type; otherwise it is deleted. ``parts`` carry each
+    part's ETag and ``checksum_sha256``. Only the first few bytes are read back,
+    never the whole file. Each session completes once;
+    replaying its token is refused so it cannot register the object twice.
+    Returns ``file_info`` in the shape the upload helpers produce.
+    """
+    claims = _decode_session(session_token, kind=kind, owner=owner)
+    storage = _get_presigning_storage()
+    s3_key = claims["key"]
+
+    upload_id = claims.get("upload_id")
+    if upload_id:
+        if not parts:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Uploaded parts are required")
+        try:
+            await run_storage_io(storage.complete_multipart, s3_key, upload_id, parts)
+        except ClientError as exc:
+            logger.warning("Completing multipart upload %s failed: %s", s3_key, exc)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload could not be completed") from exc
+
+    try:
+        metadata = await storage.get_file_metadata_async(s3_key)
+    except ClientError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Storage is temporarily unavailable") from exc
+    if not metadata:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Uploaded file not found in storage")
+
+    if int(metadata.get("size") or 0) != int(claims["size"]):
+        await _reject_upload(storage, s3_key, "Uploaded file size does not match the declared size")
+    stored_type = (metadata.get("content_type") or "").split(";")[0].strip()
+    if stored_type != claims["ctype"]:
+        await _reject_upload(storage, s3_key, "Uploaded file type does not match the declared type")
+    stored_checksum = await run_storage_io(storage.get_object_checksum, s3_key)
+    if stored_checksum != claims["sha256"]:
+        await _reject_upload(storage, s3_key, "Uploaded file checksum does not match")
+
+    head = await run_storage_io(storage.read_range, s3_key, 0, 15)
+    try:
+        check_file_signature(head or b"", claims["ctype"])
+    except HTTPException as exc:
+        await _reject_upload(storage, s3_key, exc.detail)
+
+    consumed = await asyncio.to_thread(
+        upload_session_repository.consume_session,
+        jti=claims["jti"],
+        kind=kind,
+        owner=owner,
+        s3_key=s3_key,
+        expires_at=datetime.fromtimestamp(int(claims["exp"]), tz=timezone.utc),
+    )
+    if not consumed:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload session was already completed")
+
+    # A composite checksum is not a hash of the file, so parted uploads get none.
+    content_hash = None if upload_id else base64.b64decode(claims["sha256"]).hex()
+
+    return {
+        "content_hash": content_hash,
+        "filename": claims["name"],
+        "saved_filename": os.path.basename(s3_key),
+        "s3_key": s3_key,
+        "s3_url": storage.get_file_url(s3_key),
+        "file_size": int(claims["size"]),
+        "metadata": claims.get("meta") or {},
+    }
+
+
+__all__ = ["UPLOAD_TARGETS", "UploadTarget", "complete_upload_session", "create_upload_session"]
@@ -0,0 +1,232 @@
+"""Accumulates student video watch heartbeats and writes them in periodic batches."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from ..config import get_settings
+from ..repository import student_portal_video_repository
+from ..utils.redis_client import create_redis_client, redis_available
+
+logger = logging.getLogger(__name__)
+
+WATCH_HEARTBEATS = Counter(
+    "video_watch_heartbeats_total",
+    "Watch heartbeats accepted into the buffer",
+)
+WATCH_FLUSH_ROWS = Histogram(
+    "video_watch_flush_rows",
+    "Distinct (video, student) pairs written per heartbeat flush",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+WATCH_FLUSH_FAILURES = Counter(
+    "video_watch_flush_failures_total",
+    "Heartbeat flushes that failed and were dropped or re-queued",
+)
+
+_FLUSH_CHUNK_SIZE = 500
+
+Entry = Tuple[int, str, int]
+
+
+class WatchHeartbeatBuffer(ABC):
+    """
+    Sums watch seconds per ``(video_id, enrollment)`` and flushes every interval.
+
+    Writes go through :func:`student_portal_video_repository.apply_watch_batch`,
+    which keeps the per-heartbeat duration clamping and rolls the video totals
+    up in the same transaction. Chunks whose write fails are put back into the
+    buffer and retried on the next flush; a crash loses at most one interval.
+    """
+
+    def __init__(self, *, interval_seconds: float) -> None:
+        self._interval = max(0.1, interval_seconds)
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def add(self, video_id: int, enrollment_number: str, watch_seconds: int) -> None:
+        if watch_seconds <= 0:
+            return
+        await self._accumulate(int(video_id), enrollment_number, int(watch_seconds))
+        WATCH_HEARTBEATS.inc()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    @abstractmethod
+    async def _accumulate(self, video_id: int, enrollment_number: str, watch_seconds: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _drain(self) -> Tuple[List[Entry], Optional[str]]:
+        """Take the buffered sums; the second item identifies the claim for ``_settle``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _settle(self, claim: Optional[str], failed: List[Entry]) -> None:
+        """Put ``failed`` back into the buffer and release the claim."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _has_pending(self) -> bool:
+        raise NotImplementedError
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.flush()
+            except Exception as exc:  # pragma: no cover - keep the loop alive
+                logger.warning("Watch heartbeat flush failed: %s", exc)
+            if not await self._has_pending():
+                return
+
+    async def flush(self) -> int:
+        entries, claim = await self._drain()
+        if entries:
+            WATCH_FLUSH_ROWS.observe(len(entries))
+        written = 0
+        failed: List[Entry] = []
+        for start in range(0, len(entries), _FLUSH_CHUNK_SIZE):
+            chunk = entries[start:start + _FLUSH_CHUNK_SIZE]
+            try:
+                written += await asyncio.to_thread(student_portal_video_repository.apply_watch_batch, chunk)
+            except Exception as exc:
+                WATCH_FLUSH_FAILURES.inc()
+                logger.warning("Re-queueing %d watch heartbeat rows after write failure: %s", len(chunk), exc)
+                failed.extend(chunk)
+        if entries or claim is not None:
+            await self._settle(claim, failed)
+        return written
+
+    async def close(self) -> None:
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+        await self.flush()
+
+
+class MemoryWatchHeartbeatBuffer(WatchHeartbeatBuffer):
+    """Per-worker buffer; each worker flushes its own sums."""
+
+    def __init__(self, *, interval_seconds: float) -> None:
+        super().__init__(interval_seconds=interval_seconds)
+        self._pending: Dict[Tuple[int, str], int] = {}
+
+    async def _accumulate(self, video_id: int, enrollment_number: str, watch_seconds: int) -> None:
+        key = (video_id, enrollment_number)
+        self._pending[key] = self._pending.get(key, 0) + watch_seconds
+
+    async def _drain(self) -> Tuple[List[Entry], Optional[str]]:
+        pending, self._pending = self._pending, {}
+        return [(video_id, enrollment, seconds) for (video_id, enrollment), seconds in pending.items()], None
+
+    async def _settle(self, claim: Optional[str], failed: List[Entry]) -> None:
+        for video_id, enrollment, seconds in failed:
+            await self._accumulate(video_id, enrollment, seconds)
+
+    async def _has_pending(self) -> bool:
+        return bool(self._pending)
+
+
+class RedisWatchHeartbeatBuffer(WatchHeartbeatBuffer):
+    """
+    Buffer shared by every worker through one Redis hash.
+
+    Heartbeats are ``HINCRBY``-ed into the hash; a flush atomically renames it
+    to a private key, so whichever worker flushes first takes the whole batch.
+    The private key is deleted only once every chunk was written or re-queued.
+    """
+
+    def __init__(self, redis_client, *, interval_seconds: float, key: str = "video-watch:pending") -> None:
+        super().__init__(interval_seconds=interval_seconds)
+        self.redis = redis_client
+        self.key = key
+
+    async def _accumulate(self, video_id: int, enrollment_number: str, watch_seconds: int) -> None:
+        await self.redis.hincrby(self.key, f"{video_id}:{enrollment_number}", watch_seconds)
+
+    async def _drain(self) -> Tuple[List[Entry], Optional[str]]:
+        claimed = f"{self.key}:flush:{uuid.uuid4().hex}"
+        try:
+            await self.redis.rename(self.key, claimed)
+        except Exception as exc:
+            # RENAME fails with "no such key" when another worker already took the batch.
+            if "no such key" not in str(exc).lower():
+                raise
+            return [], None
+        raw = await self.redis.hgetall(claimed)
+        entries: List[Entry] = []
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            video_id, _, enrollment = field.partition(":")
+            try:
+                entries.append((int(video_id), enrollment, int(value)))
+            except ValueError:
+                logger.debug("Skipping malformed watch heartbeat field %r", field)
+        return entries, claimed
+
+    async def _settle(self, claim: Optional[str], failed: List[Entry]) -> None:
+        if claim is None:
+            return
+        # Re-queue and release in one transaction so a failed chunk is neither lost nor counted twice.
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for video_id, enrollment, seconds in failed:
+                pipe.hincrby(self.key, f"{video_id}:{enrollment}", seconds)
+            pipe.delete(claim)
+            await pipe.execute()
+
+    async def _has_pending(self) -> bool:
+        return bool(await self.redis.exists(self.key))
+
+
+def build_watch_heartbeat_buffer() -> Optional[WatchHeartbeatBuffer]:
+    settings = get_settings()
+    if settings.video_watch_flush_seconds <= 0:
+        return None
+    if (settings.video_watch_buffer_backend or "memory").lower() == "redis":
+        if not redis_available():
+            logger.warning(
+                "Watch heartbeat buffer configured for Redis backend, but redis package is not installed. "
+                "Buffering per worker."
+            )
+        else:
+            try:
+                return RedisWatchHeartbeatBuffer(
+                    create_redis_client(),
+                    interval_seconds=settings.video_watch_flush_seconds,
+                )
+            except Exception as exc:
+                logger.exception("Failed to initialize Redis watch heartbeat buffer: %s", exc)
+    return MemoryWatchHeartbeatBuffer(interval_seconds=settings.video_watch_flush_seconds)
+
+
+_buffer: Optional[WatchHeartbeatBuffer] = None
+_buffer_built = False
+
+
+def get_watch_heartbeat_buffer() -> Optional[WatchHeartbeatBuffer]:
+    """Process-wide buffer, or ``None`` when heartbeats are written synchronously."""
+    global _buffer, _buffer_built
+    if not _buffer_built:
+        _buffer = build_watch_heartbeat_buffer()
+        _buffer_built = True
+    return _buffer
+
+
+async def flush_watch_heartbeats() -> None:
+    """Write whatever is buffered; called on shutdown."""
+    if _buffer is not None:
+        await _buffer.close()
+
+
+__all__ = [
+    "MemoryWatchHeartbeatBuffer",
+    "RedisWatchHeartbeatBuffer",
+    "WatchHeartbeatBuffer",
+    "build_watch_heartbeat_buffer",
+    "flush_watch_heartbeats",
+    "get_watch_heartbeat_buffer",
+]
@@ -9,8 +9,9 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
 from ..config import settings
-from ..repository import auth_repository, member_repository, registration_repository
+from ..repository import auth_repository, member_repository
 from ..schemas import WorkType
+from .principal_cache import get_principal_cache
 
 ALGORITHM = "HS256"
 _security = HTTPBearer()
@@ -60,11 +61,15 @@ def _normalize_admin_record(admin: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def _get_admin_record(user_id: int) -> Optional[Dict[str, Any]]:
-    admin = auth_repository.get_admin_by_id(user_id)
-    if admin:
-        return admin
-    admin = registration_repository.get_admin_by_id(user_id)
-    return admin
+    return get_principal_cache().get_or_load(
+        "admin", user_id, lambda: auth_repository.get_admin_principal(user_id)
+    )
+
+
+def _get_member_record(member_id: int) -> Optional[Dict[str, Any]]:
+    return get_principal_cache().get_or_load(
+        "member", member_id, lambda: member_repository.get_member_by_id(member_id)
+    )
 
 
 def _ensure_utc(dt: datetime) -> datetime:
@@ -107,13 +112,16 @@ def _resolve_user_payload(token: str) -> Dict[str, Any]:
         }
 
     if role == "member":
-        member = member_repository.get_member_by_id(user_id)
+        member = _get_member_record(user_id)
         if not member:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Member not found")
         if not member["active"]:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Member account is inactive")
 
-        admin = auth_repository.get_admin_by_id(member["admin_id"])
+        admin = _get_admin_record(member["admin_id"])
+        # Members belong to ``admins`` rows; a registration-only record does not count.
+        if admin and "admin_id" not in admin:
+            admin = None
         now_utc = datetime.now(timezone.utc)
         admin_expiry = admin.get("expiry_date") if admin else None
         if not admin or not admin["active"] or (admin_expiry and now_utc > _ensure_utc(admin_expiry)):
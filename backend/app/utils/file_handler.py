@@ -1,6 +1,7 @@
 """File handling utilities for uploads."""
 from __future__ import annotations
 
+import asyncio
 import base64
 import binascii
 import io
@@ -8,7 +9,7 @@ import os
 import re
 import uuid
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import AsyncIterator, List, Optional, Set
 
 from fastapi import HTTPException, UploadFile
 from PIL import Image
@@ -22,6 +23,25 @@ DEFAULT_ALLOWED_TYPES = {"image/jpeg", "image/png", "image/svg+xml", "image/webp
 ALLOWED_PDF_EXTENSIONS = {".pdf"}
 ALLOWED_PDF_TYPES = {"application/pdf"}
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Leading bytes every file of the given type must start with. ``(offset, bytes)``
+# entries match further in: ISO media files open with a box size before "ftyp".
+_ISO_MEDIA_SIGNATURES = ((4, b"ftyp"),)
+_EBML_SIGNATURES = (b"\x1a\x45\xdf\xa3",)
+FILE_SIGNATURES = {
+    "application/pdf": (b"%PDF-",),
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/webp": (b"RIFF",),
+    "video/mp4": _ISO_MEDIA_SIGNATURES,
+    "video/x-m4v": _ISO_MEDIA_SIGNATURES,
+    # Older QuickTime files may start with a movie or media data atom instead.
+    "video/quicktime": _ISO_MEDIA_SIGNATURES + ((4, b"moov"), (4, b"mdat"), (4, b"wide"), (4, b"free")),
+    "video/webm": _EBML_SIGNATURES,
+    "video/x-matroska": _EBML_SIGNATURES,
+}
+
 DATA_URL_PATTERN = re.compile(r"^data:(?P<mime>[\w.+\-\/]+);base64,(?P<data>.+)$")
 MIMETYPE_EXTENSION_MAP = {
     "image/jpeg": ".jpg",
@@ -124,6 +144,59 @@ def validate_file(
     return True
 
 
+def _matches_signature(head: bytes, signature) -> bool:
+    if isinstance(signature, tuple):
+        offset, magic = signature
+        return head[offset:offset + len(magic)] == magic
+    return head.startswith(signature)
+
+
+def check_file_signature(head: bytes, content_type: Optional[str]) -> None:
+    """Reject uploads whose leading bytes do not match their declared type."""
+    signatures = FILE_SIGNATURES.get((content_type or "").lower())
+    if signatures and not any(_matches_signature(head, signature) for signature in signatures):
+        raise HTTPException(
+            status_code=400,
+            detail=f"File content does not match its declared type ({content_type})",
+        )
+
+
+async def iter_upload_chunks(
+    file: UploadFile,
+    *,
+    max_size: int,
+    content_type: Optional[str] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Yield an upload in fixed-size chunks, validating magic bytes and size on the fly.
+
+    Only one chunk is held in memory at a time, so arbitrarily large uploads are
+    rejected as soon as they cross ``max_size`` instead of after being buffered.
+    """
+    total = 0
+    first = True
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        if first:
+            check_file_signature(chunk, content_type if content_type is not None else file.content_type)
+            first = False
+        total += len(chunk)
+        if total > max_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File size too large. Maximum allowed size is {max_size // (1024 * 1024)}MB",
+            )
+        yield chunk
+
+
+def _verify_image_file(path: str) -> None:
+    with Image.open(path) as image:
+        image.verify()
+
+
 async def save_uploaded_file(
     file: UploadFile,
     subfolder: str = "",
@@ -155,25 +228,25 @@ async def save_uploaded_file(
     file_path = os.path.join(save_dir, saved_filename)
 
     try:
-        content = await file.read()
+        file_size = 0
+        with open(file_path, "wb") as f:
+            async for chunk in iter_upload_chunks(file, max_size=max_size):
+                f.write(chunk)
+                file_size += len(chunk)
 
         if file.content_type.startswith("image/") and file.content_type != "image/svg+xml":
             try:
-                image = Image.open(io.BytesIO(content))
-                image.verify()
+                await asyncio.to_thread(_verify_image_file, file_path)
             except Exception:
                 raise HTTPException(status_code=400, detail="Invalid image file")
 
-        with open(file_path, "wb") as f:
-            f.write(content)
-
         relative_path = os.path.relpath(file_path, ".")
 
         return {
             "filename": file.filename,
             "saved_filename": saved_filename,
             "file_path": relative_path,
-            "file_size": len(content),
+            "file_size": file_size,
         }
 
     except Exception as exc:
@@ -1,39 +1,149 @@
 """Shared password hashing helpers using bcrypt."""
 from __future__ import annotations
 
-import bcrypt
+import asyncio
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Sequence, TypeVar
 
-_MAX_BCRYPT_BYTES = 72
+from prometheus_client import Gauge, Histogram
 
+from ..password_hashing import hash_many, hash_password, truncate_password, verify_password
 
-def _truncate(password: str) -> bytes:
-    encoded = password.encode("utf-8")
-    if len(encoded) <= _MAX_BCRYPT_BYTES:
-        return encoded
+logger = logging.getLogger(__name__)
+
+_MAX_BATCH_CHUNK = 64
+_WORKER_MODULE = hash_password.__module__
+
+T = TypeVar("T")
+
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Password hash/verify jobs submitted to the hashing pool and not yet finished",
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Time from submitting a password job to its result, including queueing",
+    ["operation"],
+)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _pool_workers() -> int:
+    from ..config import get_settings
+
+    return max(0, get_settings().password_hash_workers)
+
+
+def _pool_context():
+    """
+    Start workers from a clean process rather than forking this one.
+
+    The app process already runs threads (the default executor, the storage
+    pool, psycopg pools), and a fork can leave a child holding one of their
+    locks. The forkserver only preloads the bcrypt module, so new workers --
+    including replacements after a ``BrokenProcessPool`` -- start thread-free.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([_WORKER_MODULE])
+        return context
+    return multiprocessing.get_context("spawn")
 
-    trimmed = encoded[:_MAX_BCRYPT_BYTES]
-    while True:
-        try:
-            return trimmed.decode("utf-8").encode("utf-8")
-        except UnicodeDecodeError:
-            trimmed = trimmed[:-1]
-            if not trimmed:
-                raise ValueError("Password is empty after truncation")
 
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared hashing pool, or ``None`` when hashing runs on threads."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = _pool_workers()
+                if workers == 0:
+                    return None
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context())
+    return _pool
 
-def truncate_password(password: str) -> str:
-    """Return a UTF-8 string whose encoded form fits bcrypt requirements."""
-    return _truncate(password).decode("utf-8")
 
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
 
-def hash_password(password: str) -> str:
-    safe = _truncate(password)
-    return bcrypt.hashpw(safe, bcrypt.gensalt()).decode("utf-8")
 
+def shutdown_password_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
 
-def verify_password(password: str, hashed_password: str) -> bool:
+
+async def _run(operation: str, func: Callable[..., T], *args) -> T:
+    PASSWORD_HASH_QUEUE_DEPTH.inc()
+    started = time.perf_counter()
     try:
-        safe = _truncate(password)
-        return bcrypt.checkpw(safe, hashed_password.encode("utf-8"))
-    except ValueError:
-        return False
+        pool = _get_pool()
+        if pool is None:
+            return await asyncio.to_thread(func, *args)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool and retry once.
+            logger.warning("Password hashing pool broke; restarting it")
+            _reset_pool(pool)
+            pool = _get_pool()
+            if pool is None:
+                return await asyncio.to_thread(func, *args)
+            return await loop.run_in_executor(pool, func, *args)
+    finally:
+        PASSWORD_HASH_QUEUE_DEPTH.dec()
+        PASSWORD_HASH_SECONDS.labels(operation=operation).observe(time.perf_counter() - started)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash ``password`` on the hashing pool without blocking the event loop."""
+    return await _run("hash", hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """Check ``password`` against ``hashed_password`` on the hashing pool."""
+    return await _run("verify", verify_password, password, hashed_password)
+
+
+async def hash_passwords_async(passwords: Sequence[str]) -> List[str]:
+    """
+    Hash many passwords for bulk imports, preserving order.
+
+    The work is split into chunks so every pool worker stays busy while each
+    job still carries enough hashes to amortise the inter-process overhead.
+    """
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    workers = max(1, _pool_workers())
+    chunk_size = min(_MAX_BATCH_CHUNK, max(1, math.ceil(len(passwords) / workers)))
+    chunks = [passwords[index:index + chunk_size] for index in range(0, len(passwords), chunk_size)]
+    results = await asyncio.gather(*(_run("hash_batch", hash_many, chunk) for chunk in chunks))
+    return [hashed for chunk in results for hashed in chunk]
+
+
+__all__ = [
+    "hash_password",
+    "hash_password_async",
+    "hash_passwords_async",
+    "shutdown_password_pool",
+    "truncate_password",
+    "verify_password",
+    "verify_password_async",
+]
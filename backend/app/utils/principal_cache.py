@@ -0,0 +1,80 @@
+"""Short-lived in-process cache of the admin/member records behind access tokens."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config import get_settings
+from app.utils.ttl_cache import TTLCache
+
+_Key = Tuple[str, int]
+
+
+class PrincipalCache:
+    """
+    Cache of raw principal records keyed by ``(role, id)``.
+
+    Only the database rows are cached; expiry and active checks are still
+    evaluated on every request, so an account that lapses mid-TTL is rejected
+    right away. Writers call :func:`invalidate_admin` / :func:`invalidate_member`
+    so changes made through this process are visible immediately; other workers
+    pick them up once the TTL elapses.
+    """
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int) -> None:
+        self._entries: TTLCache[_Key, Dict[str, Any]] = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self._entries.enabled
+
+    def get_or_load(
+        self,
+        role: str,
+        principal_id: Any,
+        loader: Callable[[], Optional[Dict[str, Any]]],
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            key = (role, int(principal_id))
+        except (TypeError, ValueError):
+            return loader()
+        record = self._entries.get_or_load(key, lambda: _copy(loader()))
+        return _copy(record)
+
+    def invalidate(self, role: str, principal_id: Any) -> None:
+        try:
+            self._entries.pop((role, int(principal_id)))
+        except (TypeError, ValueError):
+            return
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _copy(record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return dict(record) if record is not None else None
+
+
+@lru_cache
+def get_principal_cache() -> PrincipalCache:
+    settings = get_settings()
+    return PrincipalCache(
+        ttl_seconds=settings.principal_cache_ttl_seconds,
+        max_entries=settings.principal_cache_max_entries,
+    )
+
+
+def invalidate_admin(admin_id: Any) -> None:
+    get_principal_cache().invalidate("admin", admin_id)
+
+
+def invalidate_member(member_id: Any) -> None:
+    get_principal_cache().invalidate("member", member_id)
+
+
+__all__ = [
+    "PrincipalCache",
+    "get_principal_cache",
+    "invalidate_admin",
+    "invalidate_member",
+]
@@ -0,0 +1,43 @@
+"""Shared factory for asyncio Redis clients built from application settings."""
+from __future__ import annotations
+
+from app.config import get_settings
+
+try:
+    import redis.asyncio as redis_async
+except ImportError:  # pragma: no cover
+    redis_async = None
+
+
+def redis_available() -> bool:
+    return redis_async is not None
+
+
+def create_redis_client():
+    if redis_async is None:
+        raise RuntimeError("redis package is not installed")
+    settings = get_settings()
+    if settings.redis_url:
+        return redis_async.Redis.from_url(
+            settings.redis_url,
+            encoding=None,
+            decode_responses=False,
+        )
+    connection_kwargs = {
+        "host": settings.redis_host,
+        "port": settings.redis_port,
+        "db": settings.redis_db,
+        "password": settings.redis_password,
+        "encoding": None,
+        "decode_responses": False,
+    }
+    if settings.redis_ssl:
+        try:
+            ssl_connection_cls = redis_async.connection.SSLConnection
+        except AttributeError as exc:
+            raise RuntimeError("Installed redis client does not support SSL connections") from exc
+        connection_kwargs["connection_class"] = ssl_connection_cls
+    return redis_async.Redis(**connection_kwargs)
+
+
+__all__ = ["create_redis_client", "redis_available", "redis_async"]
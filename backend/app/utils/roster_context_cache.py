@@ -0,0 +1,82 @@
+"""Short-lived in-process cache of student roster contexts keyed by enrollment number."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.config import get_settings
+from app.utils.ttl_cache import TTLCache
+
+_Key = Tuple[str, Optional[int]]
+
+
+def _normalize_enrollment(enrollment_number: Any) -> str:
+    return str(enrollment_number or "").strip().lower()
+
+
+class RosterContextCache:
+    """
+    Cache of roster/profile lookups keyed by ``(enrollment, admin_id)``.
+
+    Every socket handshake, chat call and classmate check resolves the same
+    handful of roster contexts, so they are served from memory for a short TTL.
+    Roster and profile writers call :func:`invalidate_roster_context` so edits
+    made through this process apply immediately; other workers converge once
+    the TTL elapses.
+    """
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int) -> None:
+        self._entries: TTLCache[_Key, Dict[str, Any]] = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self._entries.enabled
+
+    def get_or_load(
+        self,
+        enrollment_number: str,
+        admin_id: Optional[int],
+        loader: Callable[[], Optional[Dict[str, Any]]],
+    ) -> Optional[Dict[str, Any]]:
+        enrollment = _normalize_enrollment(enrollment_number)
+        if not enrollment:
+            return loader()
+        try:
+            key = (enrollment, int(admin_id) if admin_id is not None else None)
+        except (TypeError, ValueError):
+            return loader()
+        context = self._entries.get_or_load(key, lambda: _copy(loader()))
+        return _copy(context)
+
+    def invalidate(self, enrollment_numbers: Iterable[Any]) -> None:
+        targets = {_normalize_enrollment(value) for value in enrollment_numbers}
+        targets.discard("")
+        if targets:
+            self._entries.discard_where(lambda key: key[0] in targets)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _copy(context: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return dict(context) if context is not None else None
+
+
+@lru_cache
+def get_roster_context_cache() -> RosterContextCache:
+    settings = get_settings()
+    return RosterContextCache(
+        ttl_seconds=settings.roster_context_cache_ttl_seconds,
+        max_entries=settings.roster_context_cache_max_entries,
+    )
+
+
+def invalidate_roster_context(*enrollment_numbers: Any) -> None:
+    get_roster_context_cache().invalidate(enrollment_numbers)
+
+
+__all__ = [
+    "RosterContextCache",
+    "get_roster_context_cache",
+    "invalidate_roster_context",
+]
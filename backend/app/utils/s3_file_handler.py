@@ -1,16 +1,21 @@
 """S3-based file handling utilities for uploads."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import io
 import logging
 import os
+import threading
 import uuid
-from typing import List, Optional, Set
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
 
 from fastapi import HTTPException, UploadFile
 from PIL import Image
 
-from app.services.s3_service import S3Service
+from app.services.s3_service import LocalStorageService, S3Service, configure_storage_executor
+from app.utils.file_handler import iter_upload_chunks
 
 logger = logging.getLogger(__name__)
 
@@ -55,14 +60,53 @@ S3_FOLDERS = {
 }
 
 
-def get_s3_service(settings) -> S3Service:
-    """Get S3 service instance from settings."""
-    return S3Service(
-        access_key=settings.aws_access_key_id,
-        secret_key=settings.aws_secret_access_key,
-        region=settings.aws_region,
-        bucket_name=settings.aws_s3_bucket_name,
-    )
+_storage_services: Dict[Tuple, Union[S3Service, LocalStorageService]] = {}
+_storage_services_lock = threading.Lock()
+
+
+def get_s3_service(settings) -> Union[S3Service, LocalStorageService]:
+    """
+    Get the storage service configured in settings.
+
+    Clients are cached per configuration so the boto3 connection pool and retry
+    policy are set up once per process instead of on every request.
+    """
+    backend = (getattr(settings, "storage_backend", "s3") or "s3").lower()
+    if backend == "local":
+        default_root = Path(__file__).parent.parent.parent / "storage" / "object_store"
+        root = settings.local_storage_root or str(default_root)
+        cache_key: Tuple = ("local", root)
+    else:
+        cache_key = (
+            "s3",
+            settings.aws_access_key_id,
+            settings.aws_secret_access_key,
+            settings.aws_region,
+            settings.aws_s3_bucket_name,
+        )
+
+    service = _storage_services.get(cache_key)
+    if service is not None:
+        return service
+    with _storage_services_lock:
+        service = _storage_services.get(cache_key)
+        if service is None:
+            configure_storage_executor(settings.s3_executor_workers)
+            if backend == "local":
+                service = LocalStorageService(Path(root))
+            else:
+                service = S3Service(
+                    access_key=settings.aws_access_key_id,
+                    secret_key=settings.aws_secret_access_key,
+                    region=settings.aws_region,
+                    bucket_name=settings.aws_s3_bucket_name,
+                    max_pool_connections=settings.s3_max_pool_connections,
+                    max_attempts=settings.s3_max_attempts,
+                    multipart_part_size=settings.s3_multipart_part_size,
+                    multipart_concurrency=settings.s3_multipart_concurrency,
+                )
+            _storage_services[cache_key] = service
+    return service
 
 
 def validate_file(
@@ -99,6 +143,17 @@ def validate_file(
     return True
 
 
+async def _hashed(chunks: AsyncIterator[bytes], digest) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+
+def _verify_image(content: bytes) -> None:
+    image = Image.open(io.BytesIO(content))
+    image.verify()
+
+
 async def upload_pdf_to_s3(
     file: UploadFile,
     s3_service: S3Service,
@@ -123,8 +178,6 @@ async def upload_pdf_to_s3(
     )
 
     try:
-        content = await file.read()
-        
         # Generate unique filename
         if file.filename:
             file_ext = os.path.splitext(file.filename)[1]
@@ -138,13 +191,20 @@ async def upload_pdf_to_s3(
         if subfolder:
             s3_folder = f"{s3_folder}/{subfolder}"
         
-        # Upload to S3
-        result = s3_service.upload_file(
-            file_content=content,
+        # Stream to S3 part by part; the file is never fully buffered in memory
+        digest = hashlib.sha256()
+        result = await s3_service.upload_stream(
+            _hashed(
+                iter_upload_chunks(
+                    file,
+                    max_size=DEFAULT_MAX_FILE_SIZE,
+                    content_type="application/pdf",
+                ),
+                digest,
+            ),
             file_name=saved_filename,
             folder=s3_folder,
             content_type=file.content_type or "application/pdf",
-            public=True,
         )
         
         logger.info(f"PDF uploaded to S3: {result['s3_key']}")
@@ -154,7 +214,8 @@ async def upload_pdf_to_s3(
             "saved_filename": saved_filename,
             "s3_key": result["s3_key"],
             "s3_url": result["s3_url"],
-            "file_size": len(content),
+            "file_size": result["file_size"],
+            "content_hash": digest.hexdigest(),
         }
 
     except HTTPException:
@@ -193,8 +254,7 @@ async def upload_image_to_s3(
         # Validate image
         if file.content_type and file.content_type.startswith("image/") and file.content_type != "image/svg+xml":
             try:
-                image = Image.open(io.BytesIO(content))
-                image.verify()
+                await asyncio.to_thread(_verify_image, content)
             except Exception:
                 raise HTTPException(status_code=400, detail="Invalid image file")
         
@@ -212,7 +272,7 @@ async def upload_image_to_s3(
             s3_folder = f"{s3_folder}/{subfolder}"
         
         # Upload to S3
-        result = s3_service.upload_file(
+        result = await s3_service.upload_file_async(
             file_content=content,
             file_name=saved_filename,
             folder=s3_folder,
@@ -264,7 +324,7 @@ async def upload_audio_to_s3(
             s3_folder = f"{s3_folder}/{subfolder}"
         
         # Upload to S3
-        result = s3_service.upload_file(
+        result = await s3_service.upload_file_async(
             file_content=file_content,
             file_name=file_name,
             folder=s3_folder,
@@ -314,7 +374,7 @@ async def upload_lecture_json_to_s3(
         file_content = json_content.encode("utf-8")
         
         # Upload to S3
-        result = s3_service.upload_file(
+        result = await s3_service.upload_file_async(
             file_content=file_content,
             file_name=file_name,
             folder=s3_folder,
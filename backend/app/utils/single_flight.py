@@ -0,0 +1,222 @@
+"""Single-flight coordination so concurrent callers share one execution per key."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.config import get_settings
+from app.utils.redis_client import create_redis_client, redis_available
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent async work per key within this process.
+
+    The first caller for a key starts ``func`` as a detached task; every caller,
+    the first one included, awaits that task through ``asyncio.shield``. A caller
+    that is cancelled (e.g. its client disconnected) stops waiting without
+    cancelling the shared work the others are still waiting for.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def run(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even when every waiter went away.
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def is_running(self, key: str) -> bool:
+        return key in self._inflight
+
+
+class RedisFlightLock:
+    """
+    Cross-worker lease lock used to elect one worker per key.
+
+    The lease is renewed every third of ``lease_seconds`` while it is held, so
+    work that outlives the lease (a long synthesis) keeps other workers out. It
+    only lapses if the holder stops renewing it, e.g. because the worker died.
+    Waiters still give up after their own ``timeout_seconds`` and run the work
+    without exclusion, so that bound should exceed the slowest synthesis.
+    """
+
+    _RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+    _RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+    def __init__(
+        self,
+        redis_client,
+        *,
+        namespace: str,
+        lease_seconds: int,
+        poll_interval_ms: int,
+    ) -> None:
+        self.redis = redis_client
+        self.namespace = namespace
+        self.lease_ms = max(1, lease_seconds) * 1000
+        self.poll_interval = max(0.05, poll_interval_ms / 1000)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:flight:{key}"
+
+    @asynccontextmanager
+    async def hold(self, key: str, *, timeout_seconds: float) -> AsyncIterator[bool]:
+        """
+        Wait until this worker owns the lease for ``key`` and yield True.
+
+        Yields False if the lease could not be obtained before ``timeout_seconds``
+        or Redis is unreachable; callers then proceed without cross-worker exclusion.
+        """
+        token = uuid.uuid4().hex
+        redis_key = self._key(key)
+        deadline = time.monotonic() + timeout_seconds
+        acquired = False
+        try:
+            while True:
+                acquired = bool(await self.redis.set(redis_key, token, nx=True, px=self.lease_ms))
+                if acquired or time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(self.poll_interval)
+        except Exception as exc:  # pragma: no cover - degrade to in-process only
+            logger.warning("Redis single-flight lock failed for %s: %s", key, exc)
+            acquired = False
+        renewer = asyncio.create_task(self._keep_alive(redis_key, token)) if acquired else None
+        try:
+            yield acquired
+        finally:
+            if renewer is not None:
+                renewer.cancel()
+                with suppress(asyncio.CancelledError):
+                    await renewer
+            if acquired:
+                await self._release(redis_key, token)
+
+    async def _keep_alive(self, redis_key: str, token: str) -> None:
+        interval = self.lease_ms / 3000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await self.redis.eval(self._RENEW_LUA, 1, redis_key, token, self.lease_ms)
+            except Exception as exc:  # pragma: no cover - retried on the next tick
+                logger.warning("Failed to renew single-flight lock %s: %s", redis_key, exc)
+                continue
+            if not renewed:
+                logger.warning("Single-flight lock %s expired before it could be renewed", redis_key)
+                return
+
+    async def _release(self, redis_key: str, token: str) -> None:
+        try:
+            await self.redis.eval(self._RELEASE_LUA, 1, redis_key, token)
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Failed to release single-flight lock %s: %s", redis_key, exc)
+
+
+class CoordinatedSingleFlight:
+    """In-process single-flight with an optional cross-worker Redis lease."""
+
+    def __init__(
+        self,
+        *,
+        distributed: Optional[RedisFlightLock] = None,
+        wait_timeout_seconds: float = 120,
+    ) -> None:
+        self._local = SingleFlight()
+        self._distributed = distributed
+        self._wait_timeout_seconds = wait_timeout_seconds
+
+    async def run(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[T]],
+        *,
+        lookup: Optional[Callable[[], Awaitable[Optional[T]]]] = None,
+    ) -> T:
+        """
+        Run ``func`` once per key across callers.
+
+        ``lookup`` returns an already available result (e.g. a file another worker
+        just wrote) and is consulted once the cross-worker lease is held.
+        """
+        if self._distributed is None:
+            return await self._local.run(key, func)
+
+        async def _coordinated() -> T:
+            async with self._distributed.hold(key, timeout_seconds=self._wait_timeout_seconds):
+                if lookup is not None:
+                    existing = await lookup()
+                    if existing is not None:
+                        return existing
+                return await func()
+
+        return await self._local.run(key, _coordinated)
+
+    def is_running(self, key: str) -> bool:
+        """Whether this process already has work in flight for ``key``."""
+        return self._local.is_running(key)
+
+
+def build_single_flight(namespace: str) -> CoordinatedSingleFlight:
+    settings = get_settings()
+    backend = (settings.single_flight_backend or "memory").lower()
+    distributed: Optional[RedisFlightLock] = None
+    if backend == "redis":
+        if not redis_available():
+            logger.warning(
+                "Single-flight configured for Redis backend, but redis package is not installed. "
+                "Using in-process coordination only."
+            )
+        else:
+            try:
+                distributed = RedisFlightLock(
+                    create_redis_client(),
+                    namespace=namespace,
+                    lease_seconds=settings.single_flight_lease_seconds,
+                    poll_interval_ms=settings.single_flight_poll_interval_ms,
+                )
+            except Exception as exc:
+                logger.exception("Failed to initialize Redis single-flight lock: %s", exc)
+    return CoordinatedSingleFlight(
+        distributed=distributed,
+        wait_timeout_seconds=settings.single_flight_lease_seconds,
+    )
+
+
+__all__ = [
+    "CoordinatedSingleFlight",
+    "RedisFlightLock",
+    "SingleFlight",
+    "build_single_flight",
+]
@@ -1,7 +1,15 @@
 """Password hashing helpers for the student portal."""
 from __future__ import annotations
 
-from .passwords import hash_password as _bcrypt_hash_password, verify_password as _bcrypt_verify_password
+from typing import List, Sequence
+
+from .passwords import (
+    hash_password as _bcrypt_hash_password,
+    hash_password_async as _bcrypt_hash_password_async,
+    hash_passwords_async as _bcrypt_hash_passwords_async,
+    verify_password as _bcrypt_verify_password,
+    verify_password_async as _bcrypt_verify_password_async,
+)
 
 
 def hash_password(password: str) -> str:
@@ -13,3 +21,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return _bcrypt_verify_password(plain_password, hashed_password)
     except Exception:
         return False
+
+
+async def hash_password_async(password: str) -> str:
+    return await _bcrypt_hash_password_async(password)
+
+
+async def hash_passwords_async(passwords: Sequence[str]) -> List[str]:
+    return await _bcrypt_hash_passwords_async(passwords)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await _bcrypt_verify_password_async(plain_password, hashed_password)
+    except Exception:
+        return False
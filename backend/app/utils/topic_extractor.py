@@ -200,17 +200,30 @@ def _guess_language_by_script(text: str) -> Optional[str]:
     return best_code
 
 
-def read_pdf(pdf_path: Path) -> str:
+def format_pdf_pages(pages: Iterable[str]) -> str:
+    """Join per-page text in the same layout ``read_pdf`` produces."""
+    return "\n".join(
+        f"\n--- Page {page_number} ---\n{page_text.strip()}\n"
+        for page_number, page_text in enumerate(pages, start=1)
+        if page_text and page_text.strip()
+    )
+
+
+def read_pdf(pdf_path: Path, max_chars: Optional[int] = None) -> str:
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
     reader = PdfReader(str(pdf_path))
     text_parts: List[str] = []
+    collected = 0
     for page_number, page in enumerate(reader.pages, start=1):
         page_text = page.extract_text() or ""
         if not page_text.strip():
             continue
         text_parts.append(f"\n--- Page {page_number} ---\n{page_text.strip()}\n")
+        collected += len(text_parts[-1]) + 1
+        if max_chars is not None and collected >= max_chars:
+            break
 
     return "\n".join(text_parts)
 
@@ -1104,7 +1117,12 @@ def parse_topics_text(topics_text: str) -> List[Dict[str, Any]]:
     return flattened_topics
 
 
-def extract_topics_from_pdf(pdf_path: Path) -> Dict[str, Any]:
+def extract_topics_from_pdf(
+    pdf_path: Path,
+    *,
+    preloaded_text: Optional[str] = None,
+    preloaded_language: Optional[str] = None,
+) -> Dict[str, Any]:
     pdf_path = Path(pdf_path)
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
@@ -1115,6 +1133,11 @@ def extract_topics_from_pdf(pdf_path: Path) -> Dict[str, Any]:
     if VISION_API_AVAILABLE and is_vision_api_enabled():
         logger.info("Vision API is enabled; using Vision API for text extraction")
         pdf_text, language_code = extract_text_with_vision_api(pdf_path)
+    elif preloaded_text and preloaded_text.strip():
+        # Embedded text cached by the upload-time preprocessing pipeline
+        logger.info("Using preprocessed page text for %s", pdf_path.name)
+        pdf_text = preloaded_text
+        language_code = preloaded_language or detect_dominant_language(preloaded_text)
     else:
         pdf_text, language_code = extract_text_with_auto_language(pdf_path)
 
@@ -0,0 +1,88 @@
+"""Thread-safe in-process TTL + LRU map shared by the small lookup caches."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Map whose entries expire ``ttl_seconds`` after being stored and whose least
+    recently used entries are evicted beyond ``max_entries``.
+
+    ``ttl_seconds=None`` keeps entries until they are evicted or replaced, for
+    values that carry their own version. A TTL of zero disables the cache.
+    """
+
+    def __init__(self, *, ttl_seconds: Optional[float], max_entries: int) -> None:
+        self._ttl = None if ttl_seconds is None else max(0.0, ttl_seconds)
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl is None or self._ttl > 0
+
+    def get(self, key: K) -> Optional[V]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if cached[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def set(self, key: K, value: V) -> None:
+        if not self.enabled:
+            return
+        expires = float("inf") if self._ttl is None else time.monotonic() + self._ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: K, loader: Callable[[], Optional[V]]) -> Optional[V]:
+        """
+        Return the cached value or store what ``loader`` returns.
+
+        ``None`` results are not cached, so a record created right after a miss
+        is found on the next lookup.
+        """
+        if not self.enabled:
+            return loader()
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[K], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+__all__ = ["TTLCache"]
@@ -0,0 +1,44 @@
+"""
+Shared pytest setup for the backend.
+
+Run from ``backend/`` with the root ``requirements.txt`` installed. These are
+unit tests and do not need a database: the repositories create their tables
+when they are imported, so the Postgres cursor is swapped for one that
+discards every statement before any repository is loaded. Tests that depend
+on what a repository returns monkeypatch the repository function instead.
+"""
+from __future__ import annotations
+
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app import postgres  # noqa: E402
+
+
+class _DiscardingCursor:
+    rowcount = 0
+
+    def execute(self, *args, **kwargs) -> None:
+        return None
+
+    def executemany(self, *args, **kwargs) -> None:
+        return None
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+
+@contextmanager
+def _discarding_pg_cursor(*, dict_rows: bool = True):
+    yield _DiscardingCursor()
+
+
+postgres.get_pg_cursor = _discarding_pg_cursor
@@ -0,0 +1,97 @@
+from app.services.lecture_retrieval_service import LectureIndex
+
+SLIDES = [
+    {
+        "number": 1,
+        "title": "Cells",
+        "bullets": ["Cells are the basic unit of life"],
+        "narration": "Every living thing is made of cells.",
+    },
+    {
+        "number": 2,
+        "title": "Osmosis",
+        "bullets": ["Water moves across a semi-permeable membrane"],
+        "narration": "Osmosis moves water from a dilute solution to a concentrated one.",
+    },
+    {
+        "number": 3,
+        "title": "Photosynthesis",
+        "bullets": ["Plants turn light into sugar"],
+        "narration": "Chlorophyll captures light energy in the leaves.",
+    },
+]
+
+
+def test_search_ranks_the_matching_slide_first():
+    index = LectureIndex(SLIDES)
+
+    hits = index.search("How does osmosis move water?", top_k=2)
+
+    assert hits[0].slide_number == 2
+
+
+def test_search_returns_nothing_for_unrelated_questions():
+    index = LectureIndex(SLIDES)
+
+    assert index.search("hello there", top_k=3) == []
+
+
+def test_context_has_outline_and_stays_within_budget():
+    index = LectureIndex(SLIDES)
+
+    context = index.build_context("photosynthesis light", top_k=2, max_chars=300)
+
+    assert context.startswith("Slides: 1. Cells; 2. Osmosis; 3. Photosynthesis")
+    assert "[Slide 3: Photosynthesis]" in context
+    assert len(context) <= 300
+
+
+def _long_lecture(slide_count=20):
+    topics = ["osmosis", "diffusion", "respiration", "photosynthesis", "transpiration"]
+    return [
+        {
+            "number": number,
+            "title": f"Understanding {topics[number % len(topics)]} in living organisms, part {number}",
+            "narration": " ".join(
+                f"Sentence {sentence} explains how {topics[number % len(topics)]} works in slide {number}."
+                for sentence in range(8)
+            ),
+        }
+        for number in range(1, slide_count + 1)
+    ]
+
+
+def test_long_outline_leaves_room_for_whole_passages():
+    slides = _long_lecture()
+    index = LectureIndex(slides)
+    question = "How does transpiration work in slide 4?"
+
+    context = index.build_context(question, top_k=4, max_chars=1000)
+    outline, _, passages = context.partition("\n\n")
+
+    assert len(context) <= 1000
+    assert outline.startswith("Slides: 1. ") and outline.endswith("more")
+    assert len(outline) <= 250
+    best = index.search(question, top_k=1)[0]
+    assert f"[Slide {best.slide_number}: {best.title}] {best.text}" in passages
+
+
+def test_best_passage_is_kept_whole_when_it_exceeds_the_budget():
+    index = LectureIndex(_long_lecture(slide_count=3))
+    best = index.search("respiration", top_k=1)[0]
+
+    context = index.build_context("respiration", top_k=2, max_chars=200)
+
+    assert context == f"[Slide {best.slide_number}: {best.title}] {best.text}"
+
+
+def test_outline_shortens_titles_and_counts_the_rest():
+    index = LectureIndex(_long_lecture(slide_count=20))
+
+    outline = index.outline(120)
+
+    assert len(outline) <= 120
+    assert outline.startswith("Slides: 1. Understanding diffusion in…; 2. ")
+    shown = outline.count("…")
+    assert outline.endswith(f"; +{20 - shown} more")
+    assert index.outline(10) == ""
@@ -0,0 +1,38 @@
+from app.services.lecture_service import _split_complete_sentences
+
+
+def test_unfinished_text_stays_in_the_buffer():
+    assert _split_complete_sentences("No boundary yet") == ([], "No boundary yet")
+
+
+def test_finished_sentences_are_split_off():
+    sentences, tail = _split_complete_sentences(
+        "Photosynthesis turns light into sugar. Plants also need water to grow. And"
+    )
+
+    assert sentences == [
+        "Photosynthesis turns light into sugar.",
+        "Plants also need water to grow.",
+    ]
+    assert tail == "And"
+
+
+def test_short_sentences_are_carried_into_the_next_one():
+    sentences, tail = _split_complete_sentences("Yes. It is true. Osmosis moves water across membranes. ")
+
+    assert sentences == ["Yes. It is true. Osmosis moves water across membranes."]
+    assert tail == ""
+
+
+def test_short_sentence_without_follow_up_waits_in_the_tail():
+    sentences, tail = _split_complete_sentences("Photosynthesis turns light into sugar. Plants need water too. And")
+
+    assert sentences == ["Photosynthesis turns light into sugar."]
+    assert tail == "Plants need water too. And"
+
+
+def test_devanagari_danda_ends_a_sentence():
+    sentences, tail = _split_complete_sentences("प्रकाश संश्लेषण पौधों में होता है। यह प्रक्रिया")
+
+    assert sentences == ["प्रकाश संश्लेषण पौधों में होता है।"]
+    assert tail == "यह प्रक्रिया"
@@ -0,0 +1,87 @@
+import pytest
+
+from app.repository import material_blob_repository
+from app.services import material_dedup_service
+
+BUCKET_URL = "https://bucket.example/"
+
+
+class _FakeStorage:
+    def __init__(self, events):
+        self.events = events
+
+    def key_for_url(self, url):
+        return url[len(BUCKET_URL):] if url.startswith(BUCKET_URL) else None
+
+    async def delete_file_async(self, s3_key):
+        self.events.append(("delete", s3_key))
+        return True
+
+
+@pytest.fixture
+def events(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(material_dedup_service, "get_s3_service", lambda settings: _FakeStorage(recorded))
+    return recorded
+
+
+def _material(**overrides):
+    material = {
+        "id": 7,
+        "content_hash": "abc123",
+        "blob_hash": None,
+        "file_path": f"{BUCKET_URL}pdfs/admin_1/new.pdf",
+        "file_size": 2048,
+    }
+    material.update(overrides)
+    return material
+
+
+@pytest.mark.asyncio
+async def test_stored_duplicate_is_repointed_before_its_object_is_deleted(events, monkeypatch):
+    monkeypatch.setattr(
+        material_blob_repository,
+        "acquire_blob",
+        lambda **kwargs: {"created": False, "s3_key": "pdfs/admin_2/old.pdf", "file_url": f"{BUCKET_URL}pdfs/admin_2/old.pdf"},
+    )
+
+    def attach(material_id, *, blob_hash, file_path):
+        events.append(("attach", file_path))
+        return {**_material(), "blob_hash": blob_hash, "file_path": file_path}
+
+    monkeypatch.setattr(material_dedup_service, "attach_material_blob", attach)
+
+    result = await material_dedup_service.deduplicate_stored_material(_material())
+
+    assert events == [("attach", f"{BUCKET_URL}pdfs/admin_2/old.pdf"), ("delete", "pdfs/admin_1/new.pdf")]
+    assert result["blob_hash"] == "abc123"
+
+
+@pytest.mark.asyncio
+async def test_reference_is_returned_when_the_row_cannot_take_it(events, monkeypatch):
+    released = []
+    monkeypatch.setattr(
+        material_blob_repository,
+        "acquire_blob",
+        lambda **kwargs: {"created": False, "s3_key": "pdfs/admin_2/old.pdf", "file_url": f"{BUCKET_URL}pdfs/admin_2/old.pdf"},
+    )
+    monkeypatch.setattr(material_dedup_service, "attach_material_blob", lambda material_id, **kwargs: {})
+    monkeypatch.setattr(material_blob_repository, "release_blob", lambda content_hash: released.append(content_hash))
+
+    material = _material()
+    assert await material_dedup_service.deduplicate_stored_material(material) is material
+    assert released == ["abc123"]
+    assert events == []
+
+
+@pytest.mark.asyncio
+async def test_materials_holding_a_reference_or_stored_locally_are_skipped(events, monkeypatch):
+    def fail(**kwargs):
+        raise AssertionError("no blob lookup expected")
+
+    monkeypatch.setattr(material_blob_repository, "acquire_blob", fail)
+
+    await material_dedup_service.deduplicate_stored_material(_material(blob_hash="abc123"))
+    await material_dedup_service.deduplicate_stored_material(_material(file_path="/uploads/chapter.pdf"))
+    await material_dedup_service.deduplicate_stored_material(_material(content_hash=None))
+    assert events == []
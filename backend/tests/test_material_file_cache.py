@@ -0,0 +1,58 @@
+import pytest
+
+from app.services.material_file_cache import MaterialFileCache
+
+
+class _FakeStorage:
+    def __init__(self, content=b"%PDF-1.7 chapter", etag="v1"):
+        self.content = content
+        self.etag = etag
+
+    async def get_file_metadata_async(self, key):
+        if self.content is None:
+            return None
+        return {"etag": self.etag, "size": len(self.content)}
+
+    async def download_to_path_async(self, key, path):
+        if self.content is None:
+            return False
+        path.write_bytes(self.content)
+        return True
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return MaterialFileCache(tmp_path / "cache", max_bytes=1024, revalidate_seconds=0)
+
+
+@pytest.mark.asyncio
+async def test_object_deleted_while_pinned_is_removed_on_last_release(cache):
+    storage = _FakeStorage()
+    lease = await cache.acquire("pdfs/chapter.pdf", storage)
+    path = lease.path
+
+    storage.content = None
+    assert await cache.acquire("pdfs/chapter.pdf", storage) is None
+    # The reader still holds the file, and its bytes still count against the bound.
+    assert path.is_file()
+    assert cache.get_metrics()["bytes"] == len(b"%PDF-1.7 chapter")
+
+    lease.release()
+    assert not path.exists()
+    assert cache.get_metrics() == {"entries": 0, "bytes": 0, "max_bytes": 1024}
+
+
+@pytest.mark.asyncio
+async def test_replaced_object_keeps_the_new_copy_when_old_reader_releases(cache):
+    storage = _FakeStorage()
+    old_lease = await cache.acquire("pdfs/chapter.pdf", storage)
+
+    storage.content, storage.etag = b"%PDF-1.7 revised chapter", "v2"
+    new_lease = await cache.acquire("pdfs/chapter.pdf", storage)
+    old_lease.release()
+
+    assert new_lease.path.read_bytes() == b"%PDF-1.7 revised chapter"
+    assert cache.get_metrics()["bytes"] == len(b"%PDF-1.7 revised chapter")
+
+    new_lease.release()
+    assert cache.get_metrics()["bytes"] == len(b"%PDF-1.7 revised chapter")
@@ -0,0 +1,13 @@
+from app.services.lecture_retrieval_service import question_signature
+
+
+def test_signature_ignores_word_order_and_filler():
+    assert question_signature("What is osmosis?") == question_signature("osmosis, what is it")
+
+
+def test_signature_keeps_interrogatives_apart():
+    assert question_signature("What is osmosis?") != question_signature("Why osmosis?")
+
+
+def test_signature_of_stop_words_only_falls_back_to_text():
+    assert question_signature("What is it?") == "what is it?"
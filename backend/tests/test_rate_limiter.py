@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from app.realtime.rate_limiter import (
+    ConnectionWorkLimiter,
+    EventCoalescer,
+    RateLimit,
+    RealtimeRateLimiter,
+    TokenBucket,
+)
+
+
+def test_token_bucket_allows_burst_then_refills():
+    bucket = TokenBucket(RateLimit(rate=2.0, burst=3))
+    start = bucket.updated
+
+    assert [bucket.take(start) for _ in range(4)] == [True, True, True, False]
+    # Half a second at 2 tokens/s buys one more event, not two.
+    assert bucket.take(start + 0.5) is True
+    assert bucket.take(start + 0.5) is False
+
+
+def test_token_bucket_never_exceeds_capacity():
+    bucket = TokenBucket(RateLimit(rate=10.0, burst=2))
+    later = bucket.updated + 60
+
+    assert [bucket.take(later) for _ in range(3)] == [True, True, False]
+
+
+def test_limiter_passes_events_without_a_limit():
+    limiter = RealtimeRateLimiter({"chat:send": RateLimit(rate=0.001, burst=1)})
+
+    assert all(limiter.allow("presence:ping", "sid-1") for _ in range(50))
+
+
+def test_limiter_limits_each_connection_separately():
+    limiter = RealtimeRateLimiter({"chat:send": RateLimit(rate=0.001, burst=2)})
+
+    assert limiter.allow("chat:send", "sid-1")
+    assert limiter.allow("chat:send", "sid-1")
+    assert not limiter.allow("chat:send", "sid-1")
+    assert limiter.allow("chat:send", "sid-2")
+
+
+def test_identity_bucket_caps_a_student_across_tabs():
+    limiter = RealtimeRateLimiter(
+        {"chat:send": RateLimit(rate=0.001, burst=2)},
+        identity_multiplier=1.0,
+    )
+
+    assert limiter.allow("chat:send", "tab-1", "ENR001")
+    assert limiter.allow("chat:send", "tab-1", "ENR001")
+    # A new tab has a fresh connection bucket but shares the student's allowance.
+    assert not limiter.allow("chat:send", "tab-2", "ENR001")
+    assert limiter.allow("chat:send", "tab-3", "ENR002")
+
+
+def test_forget_resets_a_connection():
+    limiter = RealtimeRateLimiter({"chat:send": RateLimit(rate=0.001, burst=1)})
+
+    assert limiter.allow("chat:send", "sid-1")
+    assert not limiter.allow("chat:send", "sid-1")
+    limiter.forget("sid-1")
+    assert limiter.allow("chat:send", "sid-1")
+
+
+@pytest.mark.asyncio
+async def test_coalescer_sends_first_and_latest_payload():
+    coalescer = EventCoalescer("chat:typing", interval_seconds=0.05)
+    sent = []
+
+    async def send(payload):
+        sent.append(payload)
+
+    for state in ("typing-1", "typing-2", "typing-3"):
+        await coalescer.submit(("sid-1", "peer"), state, send)
+    assert sent == ["typing-1"]
+
+    await asyncio.sleep(0.1)
+    assert sent == ["typing-1", "typing-3"]
+
+
+@pytest.mark.asyncio
+async def test_coalescer_skips_trailing_emit_when_nothing_changed():
+    coalescer = EventCoalescer("chat:typing", interval_seconds=0.02)
+    sent = []
+
+    async def send(payload):
+        sent.append(payload)
+
+    await coalescer.submit("key", "typing", send)
+    await asyncio.sleep(0.05)
+    assert sent == ["typing"]
+
+
+@pytest.mark.asyncio
+async def test_coalescer_forget_drops_pending_windows():
+    coalescer = EventCoalescer("chat:typing", interval_seconds=0.05)
+    sent = []
+
+    async def send(payload):
+        sent.append(payload)
+
+    await coalescer.submit(("sid-1", "peer"), "a", send)
+    await coalescer.submit(("sid-1", "peer"), "b", send)
+    coalescer.forget(lambda key: key[0] == "sid-1")
+
+    await asyncio.sleep(0.1)
+    assert sent == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_work_limiter_rejects_when_connection_queue_is_full():
+    limiter = ConnectionWorkLimiter(max_pending=1)
+    release = asyncio.Event()
+    entered = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot("sid-1", "lecture:chat") as allowed:
+            assert allowed
+            entered.set()
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await entered.wait()
+
+    async with limiter.slot("sid-1", "lecture:chat") as allowed:
+        assert allowed is False
+    async with limiter.slot("sid-2", "lecture:chat") as allowed:
+        assert allowed is True
+
+    release.set()
+    await holder
+    async with limiter.slot("sid-1", "lecture:chat") as allowed:
+        assert allowed is True
+
+
+@pytest.mark.asyncio
+async def test_work_limiter_runs_one_call_at_a_time_per_connection():
+    limiter = ConnectionWorkLimiter(max_pending=3)
+    running = 0
+    peak = 0
+
+    async def work():
+        nonlocal running, peak
+        async with limiter.slot("sid-1", "lecture:chat") as allowed:
+            assert allowed
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(work() for _ in range(3)))
+    assert peak == 1
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import RedisFlightLock, SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "audio.mp3"
+
+    results = await asyncio.gather(*(flight.run("slide-1", work) for _ in range(5)))
+
+    assert results == ["audio.mp3"] * 5
+    assert calls == 1
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 42
+
+    leader = asyncio.create_task(flight.run("slide-1", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("slide-1", work))
+    await asyncio.sleep(0.01)
+
+    # The leader's client disconnected.
+    leader.cancel()
+
+    assert await follower == 42
+    assert leader.cancelled()
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_clear_the_key():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("tts down")
+
+    results = await asyncio.gather(
+        flight.run("slide-1", failing),
+        flight.run("slide-1", failing),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not flight.is_running("slide-1")
+
+    async def working():
+        return "ok"
+
+    assert await flight.run("slide-1", working) == "ok"
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.renewals = 0
+
+    async def set(self, key, value, *, nx, px):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token, *args):
+        if self.values.get(key) != token:
+            return 0
+        if "PEXPIRE" in script:
+            self.renewals += 1
+        else:
+            del self.values[key]
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_flight_lock_renews_its_lease_while_held():
+    redis = _FakeRedis()
+    lock = RedisFlightLock(redis, namespace="tts", lease_seconds=1, poll_interval_ms=50)
+
+    async with lock.hold("slide-1", timeout_seconds=1) as acquired:
+        assert acquired
+        await asyncio.sleep(0.75)
+        assert redis.renewals >= 2
+
+    assert redis.values == {}
+    renewals = redis.renewals
+    await asyncio.sleep(0.4)
+    assert redis.renewals == renewals
@@ -0,0 +1,39 @@
+import base64
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.s3_service import MIN_MULTIPART_PART_SIZE
+from app.services.upload_session_service import _composite_checksum, _validate_parts
+
+
+def _b64_sha256(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode("ascii")
+
+
+def test_composite_checksum_hashes_the_part_digests():
+    parts = [b"first part", b"second part"]
+    expected = hashlib.sha256(b"".join(hashlib.sha256(part).digest() for part in parts)).digest()
+
+    checksum = _composite_checksum([_b64_sha256(part) for part in parts])
+
+    assert checksum == f"{base64.b64encode(expected).decode('ascii')}-2"
+
+
+def test_composite_checksum_rejects_values_that_are_not_sha256():
+    with pytest.raises(HTTPException) as excinfo:
+        _composite_checksum([base64.b64encode(b"too short").decode("ascii")])
+
+    assert excinfo.value.status_code == 400
+
+
+def test_parts_must_cover_the_declared_size():
+    checksums = [_b64_sha256(b"part")] * 3
+    size = 2 * MIN_MULTIPART_PART_SIZE + 1
+
+    assert _validate_parts(size, MIN_MULTIPART_PART_SIZE, checksums) == MIN_MULTIPART_PART_SIZE
+    with pytest.raises(HTTPException):
+        _validate_parts(size, MIN_MULTIPART_PART_SIZE, checksums[:2])
+    with pytest.raises(HTTPException):
+        _validate_parts(size, MIN_MULTIPART_PART_SIZE - 1, checksums)
@@ -0,0 +1,55 @@
+import pytest
+
+from app.repository import student_portal_video_repository
+from app.services.watch_heartbeat_buffer import MemoryWatchHeartbeatBuffer
+
+
+@pytest.fixture
+def buffer():
+    heartbeat_buffer = MemoryWatchHeartbeatBuffer(interval_seconds=60)
+    yield heartbeat_buffer
+    if heartbeat_buffer._flusher is not None:
+        heartbeat_buffer._flusher.cancel()
+
+
+@pytest.mark.asyncio
+async def test_heartbeats_are_summed_per_video_and_student(buffer, monkeypatch):
+    written = []
+
+    def apply_watch_batch(entries):
+        written.extend(entries)
+        return len(entries)
+
+    monkeypatch.setattr(student_portal_video_repository, "apply_watch_batch", apply_watch_batch)
+    await buffer.add(7, "ENR001", 10)
+    await buffer.add(7, "ENR001", 15)
+    await buffer.add(8, "ENR001", 5)
+    await buffer.add(7, "ENR002", 0)
+
+    assert await buffer.flush() == 2
+    assert sorted(written) == [(7, "ENR001", 25), (8, "ENR001", 5)]
+    assert not await buffer._has_pending()
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_requeued_and_retried(buffer, monkeypatch):
+    def failing(entries):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(student_portal_video_repository, "apply_watch_batch", failing)
+    await buffer.add(7, "ENR001", 10)
+
+    assert await buffer.flush() == 0
+    assert await buffer._has_pending()
+
+    written = []
+
+    def apply_watch_batch(entries):
+        written.extend(entries)
+        return len(entries)
+
+    monkeypatch.setattr(student_portal_video_repository, "apply_watch_batch", apply_watch_batch)
+    await buffer.add(7, "ENR001", 5)
+
+    assert await buffer.flush() == 1
+    assert written == [(7, "ENR001", 15)]